@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 from pathlib import Path
@@ -69,10 +70,66 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠ Ошибка инициализации базы данных: {e}")
     
+    # Черты личности из БД (отсутствующие - из personality.baseline)
+    try:
+        from modules.personality.traits import personality
+        personality.load()
+    except Exception as e:
+        logger.warning(f"⚠ Черты личности не загружены, используются базовые значения: {e}")
+    
+    # Уроки адаптивного обучения из последней контрольной точки
+    try:
+        from modules.learning.adaptive_learning import adaptive_learner
+        adaptive_learner.load()
+    except Exception as e:
+        logger.warning(f"⚠ Уроки адаптивного обучения не загружены: {e}")
+    
+    # Граф концепций из фактов в БД: без него семантическая стадия припоминания пуста
+    try:
+        from modules.memory.knowledge_base import sync_graph
+        logger.info(f"✓ Граф концепций загружен: фактов {await asyncio.to_thread(sync_graph)}")
+    except Exception as e:
+        logger.warning(f"⚠ Граф концепций не загружен: {e}")
+    
+    # Горячая перезагрузка конфигураций модулей из data/configs
+    if hasattr(config_manager, "start_watching"):
+        config_manager.start_watching()
+    
+    # Прогрев пула процессов для CPU-емких вызовов модулей
+    try:
+        from core.executor import process_executor
+        await process_executor.start()
+    except Exception as e:
+        logger.warning(f"⚠ Пул процессов не запущен: {e}")
+    
+    # Бэкенд генерации ответов: модель загружается до первого запроса
+    try:
+        from modules.communication.response_generator import response_generator
+        await response_generator.start()
+    except Exception as e:
+        logger.warning(f"⚠ Бэкенд генерации ответов не загружен: {e}")
+    
+    # Фоновые задачи модулей: рефлексия, забывание, поиск привычек, обучение, сроки хранения истории
+    try:
+        from api.routes import get_orchestrator
+        from database.session import engine
+        get_orchestrator().start_background_jobs(engine)
+    except Exception as e:
+        logger.warning(f"⚠ Планировщик фоновых задач не запущен: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Завершение работы приложения...")
+    if hasattr(config_manager, "stop_watching"):
+        config_manager.stop_watching()
+    # Остановка фоновых потоков оркестратора (учет обращений, генерация ответов)
+    try:
+        from api import routes
+        if routes._orchestrator is not None:
+            routes._orchestrator.shutdown()
+    except Exception as e:
+        logger.warning(f"⚠ Ошибка остановки оркестратора: {e}")
 
 # Создание приложения FastAPI
 app = FastAPI(
@@ -17,6 +17,10 @@ class MemoryType(str, Enum):
     CONVERSATION = "conversation"
     KNOWLEDGE = "knowledge"
 
+class TagMatchMode(str, Enum):
+    AND = "and"
+    OR = "or"
+
 class PersonalityTrait(str, Enum):
     OPENNESS = "openness"
     CONSCIENTIOUSNESS = "conscientiousness"
@@ -48,11 +52,16 @@ class MemoryStoreRequest(BaseModel):
     content: str = Field(..., min_length=1, description="Содержимое для сохранения")
     memory_type: MemoryType = Field(..., description="Тип памяти")
     importance: float = Field(1.0, ge=0.0, le=10.0, description="Важность (0-10)")
+    tags: List[str] = Field(default_factory=list, max_length=50, description="Теги памяти")
 
 class MemoryRecallRequest(BaseModel):
     query: str = Field(..., min_length=1, description="Запрос для поиска")
     memory_type: Optional[MemoryType] = Field(None, description="Тип памяти для фильтрации")
     limit: int = Field(10, ge=1, le=100, description="Лимит результатов")
+    tags: List[str] = Field(default_factory=list, max_length=50, description="Теги для фильтрации")
+    tag_mode: TagMatchMode = Field(TagMatchMode.AND, description="Все теги (and) или любой из них (or)")
+    session_id: Optional[str] = Field(None, description="Сессия, задающая контекст припоминания")
+    include_stats: bool = Field(False, description="Вернуть статистику стадий ранжирования")
 
 class MoodUpdateRequest(BaseModel):
     mood: MoodType = Field(..., description="Новое настроение")
@@ -62,6 +71,7 @@ class MoodUpdateRequest(BaseModel):
 class PersonalityUpdateRequest(BaseModel):
     trait: PersonalityTrait = Field(..., description="Черта личности")
     value: float = Field(..., ge=0.0, le=1.0, description="Значение черты")
+    reason: Optional[str] = Field(None, description="Причина изменения")
 
 class ErrorResponse(BaseModel):
     detail: str = Field(..., description="Описание ошибки")
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, List, Optional
 import uuid
 from datetime import datetime
@@ -17,7 +18,9 @@ from api.models import (
 from core.orchestrator import Orchestrator
 from core.config import settings
 from core.state_manager import StateManager
+from database import crud
 from database.session import get_db
+from database.pagination import next_cursor, row_to_dict, stream_ndjson
 from sqlalchemy.orm import Session
 import logging
 
@@ -64,7 +67,7 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
         session_id = request.session_id or str(uuid.uuid4())
         orchestrator = get_orchestrator()
         
-        response_data = await orchestrator.process_chat(
+        response_data = await orchestrator.process_message(
             message=request.message,
             user_id=request.user_id,
             session_id=session_id,
@@ -181,7 +184,8 @@ async def store_memory(request: MemoryStoreRequest, db: Session = Depends(get_db
         memory_id = await orchestrator.store_memory(
             content=request.content,
             memory_type=request.memory_type,
-            metadata=request.metadata,
+            importance=request.importance,
+            tags=request.tags,
             db=db
         )
 
@@ -209,14 +213,22 @@ async def recall_memory(request: MemoryRecallRequest, db: Session = Depends(get_
             )
 
         orchestrator = get_orchestrator()
+        stats = {} if request.include_stats else None
         memories = await orchestrator.recall_memory(
             query=request.query,
             memory_type=request.memory_type,
             limit=request.limit,
+            tags=request.tags,
+            tag_mode=request.tag_mode,
+            session_id=request.session_id,
+            stats=stats,
             db=db
         )
 
-        return {"memories": memories[:request.limit]}
+        response = {"memories": memories[:request.limit]}
+        if stats is not None:
+            response["stats"] = stats
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -281,14 +293,14 @@ async def update_personality(request: PersonalityUpdateRequest):
 
         orchestrator = get_orchestrator()
         result = await orchestrator.update_personality(
-            trait=request.trait,
+            trait=request.trait.value,
             value=request.value,
             reason=request.reason
         )
 
         return {
             "status": result.get("status", "success"),
-            "trait": result.get("trait", request.trait),
+            "trait": result.get("trait", request.trait.value),
             "value": result.get("value", request.value),
             "message": "Черта личности успешно обновлена"
         }
@@ -301,6 +313,106 @@ async def update_personality(request: PersonalityUpdateRequest):
             detail=f"Ошибка обновления личности: {str(e)}"
         )
 
+# Постраничные списки (keyset-курсор) и потоковая выгрузка истории
+def _page(fetch, limit: int) -> Dict[str, Any]:
+    try:
+        items = fetch()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {
+        "items": [row_to_dict(item) for item in items],
+        "next_cursor": next_cursor(items, limit)
+    }
+
+def _ndjson(query, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_ndjson(query),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/interactions")
+async def list_interactions(session_id: Optional[str] = None,
+                            user_id: Optional[str] = None,
+                            cursor: Optional[str] = None,
+                            limit: int = Query(100, ge=1, le=1000),
+                            db: Session = Depends(get_db)):
+    if session_id:
+        return _page(lambda: crud.crud_interaction.get_session_interactions(db, session_id, limit, cursor), limit)
+    if user_id:
+        return _page(lambda: crud.crud_interaction.get_user_interactions(db, user_id, limit, cursor), limit)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Нужно указать session_id или user_id"
+    )
+
+@router.get("/memories")
+async def list_memories(memory_type: Optional[str] = None,
+                        cursor: Optional[str] = None,
+                        limit: int = Query(100, ge=1, le=1000),
+                        db: Session = Depends(get_db)):
+    return _page(lambda: crud.crud_memory.get_multi(db, memory_type, limit, cursor), limit)
+
+@router.get("/logs")
+async def list_logs(level: Optional[str] = None,
+                    cursor: Optional[str] = None,
+                    limit: int = Query(100, ge=1, le=1000),
+                    db: Session = Depends(get_db)):
+    return _page(lambda: crud.crud_system_log.get_recent_logs(db, level, limit, cursor), limit)
+
+@router.get("/export/interactions")
+async def export_interactions(session_id: Optional[str] = None,
+                              user_id: Optional[str] = None,
+                              db: Session = Depends(get_db)):
+    return _ndjson(crud.crud_interaction.export_query(db, session_id, user_id), "interactions.ndjson")
+
+@router.get("/export/memories")
+async def export_memories(memory_type: Optional[str] = None, db: Session = Depends(get_db)):
+    return _ndjson(crud.crud_memory.export_query(db, memory_type), "memories.ndjson")
+
+@router.get("/export/logs")
+async def export_logs(level: Optional[str] = None, db: Session = Depends(get_db)):
+    return _ndjson(crud.crud_system_log.export_query(db, level), "logs.ndjson")
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    from core.cache import cache_stats
+    return {"caches": cache_stats(), "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/generation/stats")
+async def get_generation_stats():
+    from modules.communication.response_generator import response_generator
+    return {"generation": response_generator.stats(), "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/executor/health")
+async def get_executor_health():
+    from core.executor import process_executor
+    return {"executor": await process_executor.health(), "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/scheduler")
+async def get_scheduler():
+    from core.scheduler import job_scheduler
+    return {"scheduler": job_scheduler.stats(), "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/learning/stats")
+async def get_learning_stats(limit: int = 20):
+    from modules.learning.adaptive_learning import adaptive_learner
+    return {
+        "learning": adaptive_learner.stats(),
+        "lessons": adaptive_learner.lessons()[:limit],
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/reactions/stats")
+async def get_reaction_stats():
+    from modules.reactions.reaction_triggers import reaction_engine
+    return {"reactions": reaction_engine.stats(), "timestamp": datetime.utcnow().isoformat()}
+
+@router.get("/moral/stats")
+async def get_moral_compass_stats():
+    from modules.character.moral_compass import moral_compass
+    return {"moral_compass": moral_compass.stats(), "timestamp": datetime.utcnow().isoformat()}
+
 @router.get("/modules")
 async def list_modules():
     try:
@@ -346,7 +458,18 @@ async def root():
             "memory_recall": "/memory/recall (POST)",
             "mood_update": "/mood/update (POST)",
             "personality_update": "/personality/update (POST)",
-            "modules": "/modules (GET)"
+            "modules": "/modules (GET)",
+            "interactions": "/interactions (GET)",
+            "memories": "/memories (GET)",
+            "logs": "/logs (GET)",
+            "export": "/export/{interactions|memories|logs} (GET, NDJSON)",
+            "cache_stats": "/cache/stats (GET)",
+            "generation_stats": "/generation/stats (GET)",
+            "executor_health": "/executor/health (GET)",
+            "scheduler": "/scheduler (GET)",
+            "learning_stats": "/learning/stats (GET)",
+            "reaction_stats": "/reactions/stats (GET)",
+            "moral_compass_stats": "/moral/stats (GET)"
         },
         "documentation": "/docs",
         "openapi_spec": "/openapi.json"
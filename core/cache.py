@@ -0,0 +1,184 @@
+"""
+Кеш ответов: LRU с TTL, учетом объема и объединением одинаковых запросов
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from core.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """Исключение вычисления, которое никто не дождался, не логируется asyncio как потерянное"""
+    if not task.cancelled():
+        task.exception()
+
+def estimate_size(value: Any) -> int:
+    """Оценка объема значения в байтах (по JSON представлению)"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode())
+    except (TypeError, ValueError):
+        return len(repr(value).encode())
+
+def normalize_text(text: str) -> str:
+    """Нормализация пользовательского ввода для ключа кеша"""
+    return " ".join((text or "").lower().replace("ё", "е").split())
+
+class ResponseCache:
+    """
+    Кеш детерминированных ответов
+
+    Записи вытесняются по LRU при превышении max_entries или max_bytes и
+    истекают через ttl_seconds. invalidate() очищает кеш и увеличивает
+    generation - номер поколения, который вызывающий код включает в ключи,
+    чтобы результат вычисления, начатого до инвалидации, не попал в кеш.
+    Одинаковые одновременные запросы (get_or_compute) вычисляются один раз.
+    """
+
+    def __init__(self, name: str, config_provider: Callable = None):
+        self.name = name
+        self._config_provider = config_provider or (lambda: config_manager.system.performance.response_cache)
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Значение из кеша (default при промахе)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """
+        Сохранение значения
+
+        Args:
+            generation: Поколение, в котором значение было вычислено; если кеш
+                с тех пор инвалидирован, значение не сохраняется
+
+        Returns:
+            True, если значение сохранено
+        """
+        config = self.config
+        if not config.enabled:
+            return False
+        size = estimate_size(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            if size > config.max_bytes:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, size, time.monotonic() + config.ttl_seconds)
+            self.bytes += size
+            while self._entries and (len(self._entries) > config.max_entries or self.bytes > config.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            return True
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Значение из кеша или результат compute()
+
+        compute() выполняется отдельной задачей, которую все запросы с тем же
+        ключом ждут через shield: отмена одного запроса (например, разрыв
+        соединения клиента) не отменяет вычисление для остальных.
+        Исключение compute() передается всем ожидающим и не кешируется.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.get_running_loop().create_task(self._compute(key, compute, self.generation))
+                task.add_done_callback(_retrieve_exception)
+                self._inflight[key] = task
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await compute()
+            self.set(key, value, generation)
+            return value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is asyncio.current_task():
+                    del self._inflight[key]
+
+    def invalidate(self) -> None:
+        """Сброс всех записей и переход к новому поколению"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики кеша"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+            }
+
+# Кеш детерминированных ответов чата (инвалидируется при смене настроения)
+response_cache = ResponseCache("response")
+# Кеш результатов припоминания (инвалидируется при изменении памяти)
+recall_cache = ResponseCache("recall")
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Метрики всех кешей ответов"""
+    return {cache.name: cache.stats() for cache in (response_cache, recall_cache)}
@@ -1,9 +1,18 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Mapping, Callable, get_type_hints, get_origin, get_args
+from dataclasses import dataclass, field, fields, is_dataclass
+from types import MappingProxyType
+import collections.abc
+import json
+import logging
 import os
+import threading
+import weakref
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 class Settings(BaseSettings):
     """Настройки приложения"""
     
@@ -83,37 +92,613 @@ def get_settings() -> Settings:
     """Функция для dependency injection"""
     return settings
 
-# Дополнительные утилиты конфигурации
+# Типизированные конфигурации модулей
+@dataclass(frozen=True, slots=True)
+class ShortTermMemoryConfig:
+    capacity: int = 20
+    decay_rate: float = 0.1
+    consolidation_threshold: float = 0.7
+
+@dataclass(frozen=True, slots=True)
+class LongTermMemoryConfig:
+    capacity: int = 1000
+    retention_period: int = 2592000
+    organization_strategy: str = "semantic"
+    # Типы памяти, к которым применяются емкость и забывание (short_term и факты базы знаний - нет)
+    memory_types: Tuple[str, ...] = ("long_term", "episode")
+
+@dataclass(frozen=True, slots=True)
+class KnowledgeBaseConfig:
+    fact_retention: bool = True
+    concept_mapping: bool = True
+    inference_capability: bool = True
+    # Период синхронизации графа концепций с фактами в БД
+    sync_interval_seconds: int = 60
+
+@dataclass(frozen=True, slots=True)
+class RecallConfig:
+    relevance_threshold: float = 0.3
+    association_strength: float = 0.6
+    context_sensitivity: float = 0.8
+    # Веса компонент итоговой оценки ранжирования припоминания
+    text_weight: float = 0.5
+    semantic_weight: float = 0.25
+    context_weight: float = 0.15
+    recency_weight: float = 0.1
+    recency_half_life: int = 604800
+    candidate_limit: int = 200
+    context_window: int = 5
+
+@dataclass(frozen=True, slots=True)
+class ContextConfig:
+    # Бюджет контекста в символах; max_tokens > 0 дополнительно ограничивает его
+    max_chars: int = 4000
+    max_tokens: int = 0
+    chars_per_token: float = 4.0
+    recent_turns: int = 6
+    memory_share: float = 0.3
+    recall_limit: int = 5
+    summary_max_chars: int = 600
+    summary_concepts: int = 12
+    max_sessions: int = 1024
+
+@dataclass(frozen=True, slots=True)
+class MemoryConfig:
+    short_term: ShortTermMemoryConfig = field(default_factory=ShortTermMemoryConfig)
+    long_term: LongTermMemoryConfig = field(default_factory=LongTermMemoryConfig)
+    knowledge_base: KnowledgeBaseConfig = field(default_factory=KnowledgeBaseConfig)
+    recall: RecallConfig = field(default_factory=RecallConfig)
+    context: ContextConfig = field(default_factory=ContextConfig)
+
+@dataclass(frozen=True, slots=True)
+class EmotionDetectionConfig:
+    # "lexicon" - лексиконы lexicon_dir/emotion_*.json, "transformer" - модель model_name
+    classifier: str = "lexicon"
+    lexicon_dir: str = "data/lexicons"
+    model_name: str = ""
+    batch_size: int = 256
+    # Метки модели -> base_states
+    label_map: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+@dataclass(frozen=True, slots=True)
+class MoodConfig:
+    base_states: Tuple[str, ...] = ("happy", "sad", "angry", "neutral", "excited")
+    decay_rate: float = 0.1
+    intensity_threshold: float = 0.3
+    update_interval: int = 5
+    emotion_detection: EmotionDetectionConfig = field(default_factory=EmotionDetectionConfig)
+
+@dataclass(frozen=True, slots=True)
+class ConsciousnessConfig:
+    self_awareness_level: float = 0.7
+    reflection_interval_seconds: int = 300
+    introspection_depth: float = 0.8
+
+@dataclass(frozen=True, slots=True)
+class SubconsciousConfig:
+    background_processing: bool = True
+    dream_simulation: bool = False
+    associative_thinking: bool = True
+    # Очередь фоновых процессов ограничена; при переполнении вытесняются старые
+    max_background_processes: int = 256
+    process_interval_seconds: int = 60
+
+@dataclass(frozen=True, slots=True)
+class DecisionMakingConfig:
+    rationality_weight: float = 0.6
+    emotional_weight: float = 0.3
+    intuitive_weight: float = 0.1
+    confidence_threshold: float = 0.6
+    # Температура softmax уверенности: меньше - увереннее выбор при малом отрыве
+    temperature: float = 0.1
+    # Сила влияния черт личности на веса признаков (0 - без влияния)
+    personality_influence: float = 0.5
+
+@dataclass(frozen=True, slots=True)
+class LearningParametersConfig:
+    experience_absorption_rate: float = 0.8
+    pattern_recognition_sensitivity: float = 0.7
+    concept_formation_threshold: float = 0.5
+    # Шаг онлайн-обновления; фактический шаг - learning_rate * experience_absorption_rate
+    learning_rate: float = 0.1
+    # Очередь событий взаимодействия; при переполнении вытесняются самые старые
+    max_pending_events: int = 1024
+    # Сессий, для которых помнится последний ответ (ждущий реакции пользователя)
+    max_tracked_sessions: int = 10000
+    process_interval_seconds: int = 30
+    checkpoint_interval_seconds: int = 300
+    # Сила дрейфа черты стиля общения по реакции пользователя (0 - без дрейфа)
+    trait_drift_weight: float = 1.0
+    # Выбор корзины стиля с лучшей ожидаемой реакцией вместо корзины черты
+    reward_guided_style: bool = True
+    # Насколько ожидаемая реакция другой корзины должна быть выше, чтобы ее выбрать
+    style_selection_margin: float = 0.2
+    # Реакций на корзину, после которых ее оценке доверяют при выборе
+    style_min_count: int = 5
+    # Вероятность оставить корзину черты, чтобы продолжать собирать реакции на нее
+    style_exploration_rate: float = 0.1
+
+@dataclass(frozen=True, slots=True)
+class PsycheConfig:
+    consciousness: ConsciousnessConfig = field(default_factory=ConsciousnessConfig)
+    subconscious: SubconsciousConfig = field(default_factory=SubconsciousConfig)
+    decision_making: DecisionMakingConfig = field(default_factory=DecisionMakingConfig)
+    learning_parameters: LearningParametersConfig = field(default_factory=LearningParametersConfig)
+
+@dataclass(frozen=True, slots=True)
+class StyleConfig:
+    templates_path: str = "data/templates/responses_ru.json"
+    # Черта личности, по значению которой выбирается вариант шаблона
+    trait: str = "extraversion"
+    # Границы корзин черты: low < edges[0] <= mid < edges[1] <= high
+    bucket_edges: Tuple[float, ...] = (0.34, 0.67)
+    # Период проверки изменения файла шаблонов при выборе шаблона, с (0 - при каждом выборе)
+    reload_check_seconds: float = 2.0
+
+@dataclass(frozen=True, slots=True)
+class CommunicationConfig:
+    style: StyleConfig = field(default_factory=StyleConfig)
+
+@dataclass(frozen=True, slots=True)
+class PersonalityConfig:
+    # Базовые значения черт Big Five; отсутствующие черты равны 0.5
+    baseline: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+    # Доля сигнала опыта, переходящая в черту за одно обновление
+    drift_rate: float = 0.02
+    # Предельное изменение черты за одно обновление
+    max_drift_step: float = 0.05
+    # Изменения, накопленные за это время, сохраняются в БД одним пакетом
+    persist_debounce_seconds: float = 5.0
+
+@dataclass(frozen=True, slots=True)
+class HabitMiningConfig:
+    # Взаимодействий, читаемых из БД за один запрос
+    chunk_size: int = 5000
+    # Длины n-грамм по основам слов сообщений пользователя
+    ngram_sizes: Tuple[int, ...] = (2, 3)
+    # Длина последовательности намерений внутри сессии (0 - не учитывать)
+    intent_sequence_length: int = 2
+    # Count-min sketch частот паттернов: ширина (степень двойки) и число строк
+    sketch_width: int = 65536
+    sketch_depth: int = 4
+    # Сколько самых частых паттернов-кандидатов удерживается между запусками
+    top_k: int = 200
+    # Частота, начиная с которой паттерн становится привычкой
+    min_support: int = 5
+    # Частота, при которой сила привычки достигает 1 - 1/e
+    strength_scale: float = 50.0
+    # Сессий, для которых помнятся последние намерения
+    max_tracked_sessions: int = 10000
+
+@dataclass(frozen=True, slots=True)
+class MoralRuleConfig:
+    name: str = ""
+    # Ценность, которую защищает правило (ключ moral_compass.values)
+    value: str = ""
+    # block - текст отклоняется, flag - только отмечается в вердикте
+    action: str = "block"
+    # input - сообщение пользователя, response - ответ системы, any - оба
+    scope: str = "any"
+    # Слова и фразы (сравниваются по основам) и регулярные выражения
+    terms: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+
+@dataclass(frozen=True, slots=True)
+class MoralCompassConfig:
+    enabled: bool = True
+    # Иерархия ценностей: больший приоритет важнее при нескольких нарушениях
+    values: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    rules: Tuple[MoralRuleConfig, ...] = ()
+    # Вердиктов, запоминаемых по хешу текста
+    cache_size: int = 4096
+    # Ответ вместо отклоненного
+    refusal_response: str = "Извините, я не могу помочь с этим."
+
+@dataclass(frozen=True, slots=True)
+class CharacterConfig:
+    habits: HabitMiningConfig = field(default_factory=HabitMiningConfig)
+    moral_compass: MoralCompassConfig = field(default_factory=MoralCompassConfig)
+
+@dataclass(frozen=True, slots=True)
+class ReactionRuleConfig:
+    name: str = ""
+    # Условия срабатывания; пустое условие не проверяется, в непустом достаточно одного значения
+    intent: Tuple[str, ...] = ()
+    mood: Tuple[str, ...] = ()
+    emotion: Tuple[str, ...] = ()
+    words: Tuple[str, ...] = ()
+    # Черта личности -> [min, max]
+    traits: Mapping[str, Tuple[float, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    # Минимум воспоминаний, припомненных для сообщения
+    min_memory_hits: int = 0
+    # {"type": "emotional", "emotion", "intensity"} или {"type": "behavioral", "action", ...}
+    reaction: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    # Больший приоритет - раньше в списке реакций
+    priority: int = 0
+
+@dataclass(frozen=True, slots=True)
+class ReactionsConfig:
+    enabled: bool = True
+    # Реакций на одно сообщение, не более
+    max_reactions: int = 3
+    rules: Tuple[ReactionRuleConfig, ...] = ()
+
+@dataclass(frozen=True, slots=True)
+class ModuleSettings:
+    enabled: bool = True
+    priority: str = "medium"
+
+@dataclass(frozen=True, slots=True)
+class ResponseCacheConfig:
+    enabled: bool = True
+    max_entries: int = 1024
+    max_bytes: int = 4194304
+    ttl_seconds: int = 300
+
+@dataclass(frozen=True, slots=True)
+class ExecutorConfig:
+    # Пул нужен тяжелым вызовам (классификатор эмоций transformer); без пула они идут в поток
+    enabled: bool = False
+    # 0 - число ядер минус один
+    max_workers: int = 0
+    # Буферы от этого размера передаются через разделяемую память
+    shm_threshold_bytes: int = 1048576
+    # Функции прогрева рабочих процессов: "module:function"
+    warmup: Tuple[str, ...] = ()
+
+@dataclass(frozen=True, slots=True)
+class PerformanceConfig:
+    max_concurrent_requests: int = 100
+    response_timeout: int = 30
+    memory_limit_mb: int = 512
+    response_cache: ResponseCacheConfig = field(default_factory=ResponseCacheConfig)
+    executor: ExecutorConfig = field(default_factory=ExecutorConfig)
+
+@dataclass(frozen=True, slots=True)
+class SecurityConfig:
+    rate_limiting: bool = True
+    max_requests_per_minute: int = 60
+    input_validation: bool = True
+
+@dataclass(frozen=True, slots=True)
+class GenerationConfig:
+    # stub - ответ без модели; transformers - локальная модель model_name; onnx - экспорт в onnxruntime
+    backend: str = "stub"
+    model_name: str = ""
+    max_new_tokens: int = 64
+    max_batch_size: int = 8
+    max_wait_ms: float = 5.0
+    queue_size: int = 1024
+    # CPU: динамическая int8 квантизация, потоки torch (0 - по умолчанию), ядра рабочего потока
+    quantize: bool = True
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    cpu_affinity: Tuple[int, ...] = ()
+    # KV-кеш диалогов
+    kv_cache: bool = True
+    kv_cache_sessions: int = 64
+    max_context_tokens: int = 1024
+    # Файл весов для mmap и путь ONNX модели (бэкенд onnx)
+    weights_cache_dir: str = "data/models"
+    onnx_path: str = ""
+
+@dataclass(frozen=True, slots=True)
+class JobScheduleConfig:
+    # Переопределение расписания задачи: cron имеет приоритет над interval_seconds
+    enabled: bool = True
+    interval_seconds: float = 0.0
+    cron: str = ""
+    priority: str = ""
+
+@dataclass(frozen=True, slots=True)
+class SchedulerConfig:
+    enabled: bool = True
+    workers: int = 2
+    tick_seconds: float = 1.0
+    # Случайное отклонение интервала запуска (доля интервала)
+    jitter: float = 0.1
+    # Задачи medium/low откладываются, пока глубина очереди допуска не ниже этого значения
+    max_foreground_depth: int = 4
+    load_backoff_seconds: float = 5.0
+    # Доля процессорного времени приоритета в окне budget_window_seconds (нет ключа - без ограничения)
+    budget_window_seconds: int = 60
+    cpu_budget: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({"medium": 0.2, "low": 0.05}))
+    # Запусков приоритета в минуту (0 - без ограничения)
+    rate_per_minute: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    # Приоритет (nice) рабочих потоков в Linux
+    niceness: int = 10
+    jobs: Mapping[str, JobScheduleConfig] = field(default_factory=lambda: MappingProxyType({}))
+
+@dataclass(frozen=True, slots=True)
+class SystemConfig:
+    name: str = "Anthropomorphic AI Core"
+    version: str = "1.0.0"
+    description: str = ""
+    modules: Mapping[str, ModuleSettings] = field(default_factory=lambda: MappingProxyType({}))
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    security: SecurityConfig = field(default_factory=SecurityConfig)
+    generation: GenerationConfig = field(default_factory=GenerationConfig)
+    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
+
+@dataclass(frozen=True, slots=True)
+class RetentionTableConfig:
+    # None - используется memory.long_term.retention_period
+    retention_seconds: Optional[int] = None
+    archive: bool = True
+
+@dataclass(frozen=True, slots=True)
+class RetentionConfig:
+    enabled: bool = True
+    check_interval_seconds: int = 3600
+    partition_months_ahead: int = 2
+    # SQLite: месяцев истории в основных таблицах; более старые уходят в архивные шарды и не читаются
+    sqlite_hot_months: int = 2
+    archive_directory: str = "data/archive"
+    tables: Mapping[str, RetentionTableConfig] = field(default_factory=lambda: MappingProxyType({}))
+
+# Соответствие имени модуля (имя файла без суффикса _config) и типа конфигурации
+CONFIG_TYPES: Dict[str, type] = {
+    "memory": MemoryConfig,
+    "mood": MoodConfig,
+    "psyche": PsycheConfig,
+    "communication": CommunicationConfig,
+    "personality": PersonalityConfig,
+    "character": CharacterConfig,
+    "reactions": ReactionsConfig,
+    "system": SystemConfig,
+    "retention": RetentionConfig,
+}
+
+def _convert_value(hint: Any, value: Any) -> Any:
+    """Приведение сырого JSON значения к типу поля"""
+    if is_dataclass(hint) and isinstance(value, dict):
+        return build_config(hint, value)
+    origin = get_origin(hint)
+    if origin in (tuple, Tuple) and isinstance(value, (list, tuple)):
+        args = get_args(hint)
+        if len(args) == 2 and args[1] is Ellipsis and is_dataclass(args[0]):
+            return tuple(_convert_value(args[0], item) for item in value)
+        return tuple(value)
+    if origin in (dict, collections.abc.Mapping):
+        args = get_args(hint)
+        value_hint = args[1] if len(args) == 2 else Any
+        return MappingProxyType({k: _convert_value(value_hint, v) for k, v in (value or {}).items()})
+    return value
+
+def build_config(config_type: type, data: Dict[str, Any]) -> Any:
+    """
+    Построение неизменяемого типизированного объекта конфигурации из словаря
+    
+    Неизвестные ключи игнорируются, отсутствующие берутся из значений по умолчанию.
+    """
+    hints = get_type_hints(config_type)
+    kwargs = {}
+    for f in fields(config_type):
+        if f.name in data:
+            kwargs[f.name] = _convert_value(hints[f.name], data[f.name])
+    return config_type(**kwargs)
+
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """Неизменяемый снимок всех конфигураций модулей определенной версии"""
+    version: int
+    raw: Mapping[str, Dict[str, Any]]
+    typed: Mapping[str, Any]
+
 class ConfigManager:
     """Менеджер конфигурации для динамических настроек"""
     
-    def __init__(self):
-        self._module_configs = {}
+    def __init__(self, config_dir: Path = Path("data/configs")):
+        self._config_dir = Path(config_dir)
+        self._lock = threading.RLock()
+        self._subscribers: Dict[str, List[Any]] = {}
+        self._file_stamps: Dict[str, Tuple[int, int]] = {}
+        self._watcher: Optional["ConfigWatcher"] = None
+        self._snapshot = ConfigSnapshot(version=0, raw=MappingProxyType({}), typed=MappingProxyType({}))
         self._load_module_configs()
     
+    @property
+    def _module_configs(self) -> Mapping[str, Dict[str, Any]]:
+        return self._snapshot.raw
+    
     def _load_module_configs(self):
         """Загрузка конфигураций модулей из JSON файлов"""
-        config_dir = Path("data/configs")
-        if config_dir.exists():
-            for config_file in config_dir.glob("*.json"):
-                module_name = config_file.stem.replace("_config", "")
-                try:
-                    import json
-                    with open(config_file, 'r', encoding='utf-8') as f:
-                        self._module_configs[module_name] = json.load(f)
-                    print(f"✓ Конфигурация загружена: {module_name}")
-                except Exception as e:
-                    print(f"⚠ Ошибка загрузки конфигурации {config_file}: {e}")
+        if self._config_dir.exists():
+            self.reload()
+            for module_name in self._snapshot.raw:
+                print(f"✓ Конфигурация загружена: {module_name}")
         else:
             print("⚠ Директория configs не найдена, используются настройки по умолчанию")
+            self._swap(dict(self._snapshot.raw))
+    
+    def _read_config_file(self, config_file: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠ Ошибка загрузки конфигурации {config_file}: {e}")
+            return None
+    
+    def reload(self) -> List[str]:
+        """
+        Перечитывание изменившихся файлов конфигурации
+        
+        Перечитываются только файлы с изменившимися mtime/размером; при наличии
+        изменений атомарно подменяется снимок конфигурации и уведомляются подписчики.
+        
+        Returns:
+            Список имен модулей, конфигурация которых изменилась
+        """
+        with self._lock:
+            stamps = {}
+            if self._config_dir.exists():
+                for config_file in self._config_dir.glob("*.json"):
+                    try:
+                        stat = config_file.stat()
+                    except OSError:
+                        continue
+                    stamps[config_file.stem.replace("_config", "")] = (config_file, (stat.st_mtime_ns, stat.st_size))
+            
+            raw = dict(self._snapshot.raw)
+            changed = []
+            for module_name, (config_file, stamp) in stamps.items():
+                if self._file_stamps.get(module_name) == stamp:
+                    continue
+                data = self._read_config_file(config_file)
+                if data is None:
+                    # Битый файл (например, в процессе записи) - оставляем прежнюю версию
+                    continue
+                self._file_stamps[module_name] = stamp
+                if raw.get(module_name) != data:
+                    raw[module_name] = data
+                    changed.append(module_name)
+            for module_name in list(self._file_stamps):
+                if module_name not in stamps:
+                    del self._file_stamps[module_name]
+                    raw.pop(module_name, None)
+                    changed.append(module_name)
+            
+            if changed or self._snapshot.version == 0:
+                self._swap(raw, changed)
+            return changed
+    
+    def _parse(self, module_name: str, data: Optional[Dict[str, Any]]) -> Any:
+        config_type = CONFIG_TYPES.get(module_name)
+        if config_type is None:
+            return None
+        section = (data or {}).get(module_name, data or {})
+        try:
+            return build_config(config_type, section)
+        except Exception as e:
+            logger.error(f"Ошибка разбора конфигурации {module_name}: {e}")
+            return self._snapshot.typed.get(module_name) or config_type()
+    
+    def _swap(self, raw: Dict[str, Any], changed: Optional[List[str]] = None):
+        """Атомарная подмена снимка конфигурации новой версией"""
+        old = self._snapshot
+        changed = changed if changed is not None else list(raw)
+        typed = dict(old.typed)
+        for module_name in CONFIG_TYPES:
+            if module_name in changed or module_name not in typed:
+                typed[module_name] = self._parse(module_name, raw.get(module_name))
+        self._snapshot = ConfigSnapshot(
+            version=old.version + 1,
+            raw=MappingProxyType(raw),
+            typed=MappingProxyType(typed)
+        )
+        for module_name in changed:
+            self._notify(module_name, old.typed.get(module_name), typed.get(module_name))
+    
+    # Быстрый доступ к типизированным конфигурациям (O(1), без обхода словарей)
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return self._snapshot
+    
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+    
+    @property
+    def memory(self) -> MemoryConfig:
+        return self._snapshot.typed["memory"]
+    
+    @property
+    def mood(self) -> MoodConfig:
+        return self._snapshot.typed["mood"]
+    
+    @property
+    def psyche(self) -> PsycheConfig:
+        return self._snapshot.typed["psyche"]
+    
+    @property
+    def communication(self) -> CommunicationConfig:
+        return self._snapshot.typed["communication"]
+    
+    @property
+    def personality(self) -> PersonalityConfig:
+        return self._snapshot.typed["personality"]
+    
+    @property
+    def character(self) -> CharacterConfig:
+        return self._snapshot.typed["character"]
+    
+    @property
+    def reactions(self) -> ReactionsConfig:
+        return self._snapshot.typed["reactions"]
+    
+    @property
+    def system(self) -> SystemConfig:
+        return self._snapshot.typed["system"]
+    
+    @property
+    def retention(self) -> RetentionConfig:
+        return self._snapshot.typed["retention"]
+    
+    def get_typed_config(self, module_name: str) -> Any:
+        """Получение типизированной конфигурации модуля"""
+        return self._snapshot.typed.get(module_name)
     
     def get_module_config(self, module_name: str, default: Any = None) -> Dict:
         """Получение конфигурации модуля"""
-        return self._module_configs.get(module_name, default or {})
+        return self._snapshot.raw.get(module_name, default or {})
     
     def update_module_config(self, module_name: str, config: Dict):
         """Обновление конфигурации модуля"""
-        self._module_configs[module_name] = config
+        with self._lock:
+            raw = dict(self._snapshot.raw)
+            raw[module_name] = config
+            self._swap(raw, [module_name])
+    
+    # Подписки на изменения конфигурации
+    def subscribe(self, module_name: str, callback: Callable[[Any, Any], None]) -> None:
+        """
+        Подписка на изменение конфигурации модуля
+        
+        Args:
+            module_name: Имя модуля (memory, mood, psyche, system, ...)
+            callback: Функция (new_config, old_config); связанные методы
+                хранятся по слабой ссылке и не удерживают объект
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._subscribers.setdefault(module_name, []).append(ref)
+    
+    def unsubscribe(self, module_name: str, callback: Callable[[Any, Any], None]) -> None:
+        """Отмена подписки на изменение конфигурации модуля"""
+        with self._lock:
+            refs = self._subscribers.get(module_name, [])
+            self._subscribers[module_name] = [ref for ref in refs if ref() not in (None, callback)]
+    
+    def _notify(self, module_name: str, old_config: Any, new_config: Any):
+        refs = self._subscribers.get(module_name, [])
+        alive = []
+        for ref in refs:
+            callback = ref()
+            if callback is None:
+                continue
+            alive.append(ref)
+            try:
+                callback(new_config, old_config)
+            except Exception as e:
+                logger.error(f"Ошибка в подписчике конфигурации {module_name}: {e}")
+        self._subscribers[module_name] = alive
+        logger.info(f"Конфигурация {module_name} обновлена (версия {self._snapshot.version})")
+    
+    # Отслеживание изменений файлов
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Запуск фонового отслеживания директории конфигураций"""
+        with self._lock:
+            if self._watcher and self._watcher.is_alive():
+                return
+            self._watcher = ConfigWatcher(self, interval)
+            self._watcher.start()
+    
+    def stop_watching(self) -> None:
+        """Остановка отслеживания директории конфигураций"""
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher:
+            watcher.stop()
     
     def get_all_configs(self) -> Dict[str, Any]:
         """Получение всех конфигураций"""
@@ -126,8 +711,29 @@ class ConfigManager:
                 "api_port": settings.API_PORT,
                 "render_env": settings.RENDER_ENV
             },
-            "modules": self._module_configs
+            "modules": dict(self._snapshot.raw)
         }
 
+class ConfigWatcher(threading.Thread):
+    """Фоновый поток, опрашивающий mtime файлов конфигурации"""
+    
+    def __init__(self, manager: ConfigManager, interval: float = 2.0):
+        super().__init__(name="config-watcher", daemon=True)
+        self._manager = manager
+        self._interval = interval
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                self._manager.reload()
+            except Exception as e:
+                logger.error(f"Ошибка перезагрузки конфигурации: {e}")
+    
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self is not threading.current_thread():
+            self.join(timeout)
+
 # Глобальный экземпляр менеджера конфигурации
-config_manager = ConfigManager()
\ No newline at end of file
+config_manager = ConfigManager()
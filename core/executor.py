@@ -0,0 +1,314 @@
+"""
+Пул процессов для CPU-емких вызовов модулей из обработки запросов
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.config import config_manager
+from core.exceptions import ModuleExecutionError
+
+logger = logging.getLogger(__name__)
+
+# Ресурсы, загруженные в рабочем процессе функциями прогрева (модели, лексиконы)
+_WORKER_RESOURCES: Dict[str, Any] = {}
+
+def worker_resource(name: str, default: Any = None) -> Any:
+    """Ресурс, подготовленный прогревом в текущем рабочем процессе"""
+    return _WORKER_RESOURCES.get(name, default)
+
+def _resolve(path: str) -> Callable:
+    """Функция по пути вида 'package.module:function'"""
+    module_name, _, attr = path.partition(":")
+    target = importlib.import_module(module_name)
+    for name in attr.split("."):
+        target = getattr(target, name)
+    return target
+
+def _warm_worker(warmups: Sequence[str]) -> None:
+    """Инициализатор рабочего процесса: однократная загрузка ресурсов"""
+    for path in warmups:
+        try:
+            result = _resolve(path)()
+            if result is not None:
+                _WORKER_RESOURCES[path] = result
+        except Exception as e:
+            logger.error(f"Ошибка прогрева {path}: {e}")
+
+# Передача данных: pickle 5 с внешними буферами. Крупные буферы идут через
+# разделяемую память (имя, размер), мелкие - байтами в том же сообщении.
+@dataclass
+class Payload:
+    data: bytes
+    buffers: List[Tuple[str, Any, int]]
+
+def encode(obj: Any, shm_threshold: int) -> Tuple[Payload, List[SharedMemory]]:
+    """Сериализация объекта; возвращает также созданные блоки разделяемой памяти"""
+    raw_buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=raw_buffers.append)
+    buffers, segments = [], []
+    for buffer in raw_buffers:
+        view = buffer.raw()
+        if view.nbytes >= shm_threshold:
+            segment = SharedMemory(create=True, size=max(view.nbytes, 1))
+            segment.buf[:view.nbytes] = view
+            segments.append(segment)
+            buffers.append(("shm", segment.name, view.nbytes))
+        else:
+            buffers.append(("inline", bytes(view), view.nbytes))
+    return Payload(data, buffers), segments
+
+def decode(payload: Payload, copy: bool) -> Tuple[Any, List[SharedMemory]]:
+    """
+    Восстановление объекта
+
+    Args:
+        copy: Скопировать данные из разделяемой памяти (иначе объект ссылается
+            на нее, и блоки можно закрыть только после освобождения объекта)
+    """
+    buffers, segments = [], []
+    for kind, value, size in payload.buffers:
+        if kind == "inline":
+            buffers.append(value)
+            continue
+        segment = SharedMemory(name=value)
+        segments.append(segment)
+        buffers.append(bytes(segment.buf[:size]) if copy else segment.buf[:size])
+    return pickle.loads(payload.data, buffers=buffers), segments
+
+def _release(segments: List[SharedMemory], unlink: bool) -> None:
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            # На память еще ссылается объект; блок закроется при его сборке
+            logger.debug(f"Блок {segment.name} еще используется")
+        if unlink:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+def _run_task(path: str, payload: Payload, shm_threshold: int) -> Payload:
+    """Выполнение задачи в рабочем процессе"""
+    (args, kwargs), input_segments = decode(payload, copy=False)
+    try:
+        result = _resolve(path)(*args, **kwargs)
+        output, output_segments = encode(result, shm_threshold)
+        del result
+    finally:
+        del args, kwargs
+        _release(input_segments, unlink=False)
+    # Блоки результата освобождает вызывающий процесс
+    _release(output_segments, unlink=False)
+    return output
+
+def _ping() -> Dict[str, Any]:
+    return {"pid": os.getpid(), "resources": sorted(_WORKER_RESOURCES)}
+
+def _function_path(func: Callable) -> str:
+    if isinstance(func, str):
+        return func
+    if func.__name__ == "<lambda>" or "<locals>" in func.__qualname__:
+        raise ValueError(f"Функция {func.__qualname__} должна быть объявлена на уровне модуля")
+    return f"{func.__module__}:{func.__qualname__}"
+
+@dataclass
+class _Worker:
+    """Рабочий процесс: однопроцессный пул и число назначенных ему задач"""
+    pool: ProcessPoolExecutor
+    pending: int = 0
+
+class ProcessExecutor:
+    """
+    Управляемый пул процессов для CPU-емких вызовов модулей
+
+    Рабочие процессы запускаются через spawn по мере надобности (или все
+    сразу в start()) и прогреваются функциями из performance.executor.warmup
+    (путь 'module:function'; результат доступен в процессе через
+    worker_resource(путь)). Задача назначается свободному процессу, а если
+    свободных нет - наименее загруженному. Аргументы и результаты передаются
+    pickle 5 с внешними буферами, крупные буферы (массивы NumPy) - через
+    разделяемую память. Каждая задача ограничена по времени
+    performance.response_timeout; зависший или аварийно завершившийся процесс
+    заменяется новым, задачи других процессов при этом не затрагиваются.
+
+    Через пул идут только вызовы без состояния на пути запроса: сейчас это
+    тяжелый классификатор эмоций (EmotionalFilter.analyze_async). Оценка
+    решений psyche и обновления адаптивного обучения выполняются в потоках
+    планировщика фоновых задач и меняют состояние процесса сервера (веса
+    черт, оценки уроков), поэтому в пул не передаются.
+    """
+
+    def __init__(self, config_provider: Callable = None):
+        self._config_provider = config_provider or (lambda: config_manager.system.performance)
+        self._lock = threading.Lock()
+        self._workers: List[Optional[_Worker]] = []
+        self.restarts = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    @property
+    def max_workers(self) -> int:
+        workers = self.config.executor.max_workers
+        return workers if workers > 0 else max((os.cpu_count() or 2) - 1, 1)
+
+    def _spawn(self) -> _Worker:
+        return _Worker(ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context("spawn"),
+            initializer=_warm_worker,
+            initargs=(tuple(self.config.executor.warmup),)
+        ))
+
+    def _slot(self, index: int) -> _Worker:
+        """Процесс слота index (с запуском); вызывается под блокировкой"""
+        worker = self._workers[index]
+        if worker is None:
+            worker = self._workers[index] = self._spawn()
+        return worker
+
+    def _acquire(self) -> Tuple[int, _Worker]:
+        """Процесс для новой задачи: свободный, новый или наименее загруженный"""
+        with self._lock:
+            size = self.max_workers
+            if len(self._workers) < size:
+                self._workers.extend([None] * (size - len(self._workers)))
+            slots = range(size)
+            index = next((i for i in slots if self._workers[i] is not None and not self._workers[i].pending), None)
+            if index is None:
+                index = next((i for i in slots if self._workers[i] is None), None)
+            if index is None:
+                index = min(slots, key=lambda i: self._workers[i].pending)
+            worker = self._slot(index)
+            worker.pending += 1
+            return index, worker
+
+    def _done(self, worker: _Worker) -> None:
+        with self._lock:
+            worker.pending -= 1
+
+    async def start(self) -> None:
+        """Запуск и прогрев всех рабочих процессов"""
+        if not self.config.executor.enabled:
+            return
+        with self._lock:
+            size = self.max_workers
+            if len(self._workers) < size:
+                self._workers.extend([None] * (size - len(self._workers)))
+            workers = [self._slot(index) for index in range(size)]
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(worker.pool, _ping) for worker in workers))
+        logger.info(f"Пул процессов запущен: {size} процессов")
+
+    def _replace(self, index: int, worker: _Worker, reason: str) -> None:
+        """Остановка одного процесса; слот получит новый процесс при следующей задаче"""
+        with self._lock:
+            if index >= len(self._workers) or self._workers[index] is not worker:
+                return
+            self._workers[index] = None
+        self.restarts += 1
+        logger.warning(f"Перезапуск рабочего процесса {index}: {reason}")
+        # Зависший процесс не завершится сам
+        for process in list(getattr(worker.pool, "_processes", {}).values()):
+            process.terminate()
+        worker.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Выполнение func(*args, **kwargs) в пуле процессов
+
+        Args:
+            func: Функция уровня модуля (или путь 'module:function')
+            timeout: Ограничение времени; по умолчанию performance.response_timeout
+
+        Raises:
+            ModuleExecutionError: Истекло время или рабочий процесс вышел из строя
+        """
+        path = _function_path(func)
+        config = self.config
+        if not config.executor.enabled:
+            # Без пула вызов уходит в поток, чтобы не блокировать event loop
+            return await asyncio.to_thread(_resolve(path), *args, **kwargs)
+
+        timeout = timeout if timeout is not None else config.response_timeout
+        payload, segments = encode((args, kwargs), config.executor.shm_threshold_bytes)
+        loop = asyncio.get_running_loop()
+        index, worker = self._acquire()
+        try:
+            future = loop.run_in_executor(worker.pool, _run_task, path, payload, config.executor.shm_threshold_bytes)
+            output = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._replace(index, worker, f"{path} не завершилась за {timeout} с")
+            raise ModuleExecutionError("executor", path, f"превышено время выполнения {timeout} с")
+        except BrokenProcessPool as e:
+            self.failed += 1
+            self._replace(index, worker, f"процесс сломан: {e}")
+            raise ModuleExecutionError("executor", path, "рабочий процесс аварийно завершился")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._done(worker)
+            _release(segments, unlink=True)
+
+        result, output_segments = decode(output, copy=True)
+        _release(output_segments, unlink=True)
+        self.completed += 1
+        return result
+
+    async def health(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """Проверка запущенных процессов: каждый должен ответить за timeout секунд"""
+        if not self.config.executor.enabled:
+            return {"status": "disabled"}
+        started = time.perf_counter()
+        with self._lock:
+            workers = [(index, worker) for index, worker in enumerate(self._workers) if worker is not None]
+        loop = asyncio.get_running_loop()
+
+        async def ping(index: int, worker: _Worker):
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(worker.pool, _ping), timeout)
+            except (asyncio.TimeoutError, BrokenProcessPool) as e:
+                self._replace(index, worker, f"проверка не пройдена: {e!r}")
+                return None
+
+        replies = await asyncio.gather(*(ping(index, worker) for index, worker in workers))
+        return {
+            "status": "healthy" if all(replies) else "restarted",
+            "workers": self.max_workers,
+            "running": len(workers),
+            "pids": sorted({reply["pid"] for reply in replies if reply}),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            if worker is not None:
+                worker.pool.shutdown(wait=wait, cancel_futures=True)
+
+# Глобальный пул процессов для CPU-емких вызовов
+process_executor = ProcessExecutor()
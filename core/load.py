@@ -0,0 +1,55 @@
+"""
+Учет текущей нагрузки переднего плана (обработка запросов пользователя)
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+class LoadTracker:
+    """
+    Глубина очереди допуска: запросы в обработке плюс очереди модулей
+
+    Модули с собственными очередями (например, генерация ответов)
+    регистрируют источник глубины; фоновые задачи сверяются с depth(),
+    чтобы уступать ресурсы запросам пользователя.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Callable[[], int]] = {}
+        self.active = 0
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Учет запроса переднего плана на время его обработки"""
+        with self._lock:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def register_source(self, name: str, depth: Callable[[], int]) -> None:
+        with self._lock:
+            self._sources[name] = depth
+
+    def _source_depths(self) -> Dict[str, int]:
+        depths = {}
+        for name, depth in list(self._sources.items()):
+            try:
+                depths[name] = int(depth())
+            except Exception:
+                depths[name] = 0
+        return depths
+
+    def depth(self) -> int:
+        """Суммарная глубина очереди допуска"""
+        return self.active + sum(self._source_depths().values())
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"active": self.active, **self._source_depths()}
+
+# Глобальный учет нагрузки
+load_tracker = LoadTracker()
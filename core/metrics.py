@@ -0,0 +1,54 @@
+"""
+Простые метрики процесса: гистограммы с фиксированными границами
+"""
+
+import bisect
+import threading
+from typing import Dict, Sequence
+
+# Границы по умолчанию для задержек в миллисекундах
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+class Histogram:
+    """
+    Гистограмма с фиксированными верхними границами корзин
+
+    Корзина i считает наблюдения value <= buckets[i]; последняя (+Inf) -
+    все, что больше. Хранит также сумму, количество и максимум.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def snapshot(self) -> Dict[str, object]:
+        """Состояние гистограммы для API"""
+        with self._lock:
+            labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+            return {
+                "count": self.count,
+                "sum": round(self.total, 3),
+                "mean": round(self.total / self.count, 3) if self.count else 0.0,
+                "max": round(self.max, 3),
+                "buckets": dict(zip(labels, self._counts)),
+            }
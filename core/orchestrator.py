@@ -2,12 +2,16 @@
 Оркестратор для управления взаимодействием между модулями AI системы
 """
 
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from core.cache import normalize_text, recall_cache, response_cache
+from core.load import load_tracker
 from core.state_manager import state_manager
 from core.exceptions import ModuleInitializationError, ModuleExecutionError
+from modules.senses.input_parser import TextInput, input_parser
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -64,6 +68,12 @@ class Orchestrator:
         """
         Обработка входящего сообщения через все модули
         """
+        # Фоновые задачи уступают ресурсы, пока идет обработка запросов
+        with load_tracker.track():
+            return await self._process_message(message, user_id, session_id, db)
+    
+    async def _process_message(self, message: str, user_id: Optional[str],
+                               session_id: Optional[str], db: Session) -> Dict[str, Any]:
         try:
             logger.info(f"Обработка сообщения: '{message}'")
             
@@ -75,13 +85,41 @@ class Orchestrator:
                 "session_id": session_id
             })
             
+            session_id = session_id or f"session_{datetime.utcnow().timestamp()}"
+            # Сообщение разбирается один раз; модули получают готовые токены
+            parsed = input_parser.parse(message)
+            context = self._build_context(parsed, session_id, db) if db else None
+            
+            from modules.communication.communication_style import FALLBACK_INTENT
+            
+            emotion = await self._perceive_emotion(parsed)
+            user_emotion = emotion.emotion if emotion else None
+            intent = self._detect_intent(parsed) or FALLBACK_INTENT
+            reactions = await self._react(
+                parsed, intent, user_emotion, len(context.memory_ids) if context else 0
+            )
+            mood = self._get_current_mood()
+            bucket = self._style_bucket(intent, mood)
+            
+            # Проверка сообщения моральным компасом идет параллельно с генерацией ответа
+            from modules.character.moral_compass import moral_compass
+            
+            response, input_verdict = await asyncio.gather(
+                self._cached_response(parsed, mood, context.text if context else "", session_id, bucket),
+                moral_compass.check_async(parsed.text, "input")
+            )
+            response, verdicts = self._apply_moral_compass(response, input_verdict)
+            
             # Временная реализация до интеграции с реальными модулями
             response_data = {
-                "response": self._generate_response(message),
-                "mood": self._get_current_mood(),
-                "memory_used": False,
-                "session_id": session_id or f"session_{datetime.utcnow().timestamp()}"
+                "response": response,
+                "mood": mood,
+                "memory_used": bool(context and context.memory_ids),
+                "session_id": session_id,
+                "reactions": [reaction.rule for reaction in reactions],
+                "constraints": list(dict.fromkeys(rule for verdict in verdicts for rule in verdict.rules))
             }
+            self._record_experience(session_id, intent, mood, bucket, emotion)
             
             # Сохранение взаимодействия в БД
             if db:
@@ -90,10 +128,12 @@ class Orchestrator:
                     crud.crud_interaction.create(db, {
                         "user_id": user_id,
                         "session_id": response_data["session_id"],
-                        "message": message,
-                        "response": response_data["response"],
-                        "mood": response_data["mood"],
-                        "timestamp": datetime.utcnow()
+                        "user_input": message,
+                        "user_emotion": user_emotion,
+                        "ai_response": response_data["response"],
+                        "ai_emotion": response_data["mood"],
+                        # Намерение нужно поиску привычек (последовательности намерений)
+                        "context_data": {"intent": intent}
                     })
                 except Exception as e:
                     logger.warning(f"Не удалось сохранить взаимодействие в БД: {e}")
@@ -105,18 +145,167 @@ class Orchestrator:
             logger.error(f"Ошибка обработки сообщения: {e}")
             raise ModuleExecutionError("orchestrator", "process_message", str(e))
     
-    def _generate_response(self, message: str) -> str:
-        """Генерация ответа на сообщение"""
-        message_lower = message.lower()
+    async def _perceive_emotion(self, message: TextInput):
+        """Эмоция пользователя; достаточно сильная эмоция меняет настроение системы"""
+        try:
+            from core.config import config_manager
+            from modules.senses.sensory_processor import sensory_processor
+            
+            emotion = (await sensory_processor.perceive(message)).emotion
+            if (emotion.emotion != "neutral"
+                    and emotion.intensity >= config_manager.mood.intensity_threshold
+                    and emotion.emotion != self._get_current_mood()):
+                await self.update_mood(emotion.emotion, emotion.intensity, "эмоция пользователя")
+            return emotion
+        except Exception as e:
+            logger.warning(f"Не удалось определить эмоцию сообщения: {e}")
+            return None
+    
+    async def _react(self, message: TextInput, intent: str, user_emotion: Optional[str], memory_hits: int) -> list:
+        """Реакции по правилам триггеров: смена настроения и поведенческие действия"""
+        try:
+            from core.config import config_manager
+            from modules.personality.traits import personality
+            from modules.reactions.behavioral import behavioral_responder
+            from modules.reactions.emotional_response import select_emotion
+            from modules.reactions.reaction_triggers import TriggerFacts, reaction_engine
+            
+            parsed = input_parser.parse(message)
+            reactions = reaction_engine.evaluate(TriggerFacts(
+                intent=intent,
+                mood=self._get_current_mood(),
+                emotion=user_emotion,
+                stems=frozenset(parsed.stems),
+                traits=personality.snapshot(),
+                memory_hits=memory_hits,
+            ))
+            shift = select_emotion(reactions)
+            if (shift is not None
+                    and shift.intensity >= config_manager.mood.intensity_threshold
+                    and shift.emotion != self._get_current_mood()):
+                await self.update_mood(shift.emotion, shift.intensity, f"реакция {shift.rule}")
+            behavioral_responder.apply(reactions)
+            return reactions
+        except Exception as e:
+            logger.warning(f"Не удалось обработать реакции на сообщение: {e}")
+            return []
+    
+    def _apply_moral_compass(self, response: str, input_verdict) -> tuple:
+        """
+        Ответ с учетом ограничений ценностей
+
+        Returns:
+            (ответ или отказ, если сообщение или ответ отклонены; вердикты)
+        """
+        from modules.character.moral_compass import moral_compass
         
-        if any(word in message_lower for word in ["привет", "hello", "hi"]):
-            return "Привет! Я антропоморфный AI. Как я могу помочь?"
-        elif any(word in message_lower for word in ["как дела", "как ты"]):
-            return "У меня всё отлично! Я только начинаю развиваться, но уже могу с вами общаться."
-        elif any(word in message_lower for word in ["пока", "bye", "до свидания"]):
-            return "До свидания! Было приятно пообщаться."
-        else:
-            return f"Вы сказали: '{message}'. Я всё запоминаю и учусь на нашем общении. Система находится в стадии активной разработки."
+        if not input_verdict.allowed:
+            logger.info(f"Сообщение отклонено моральным компасом: {input_verdict.rules}")
+            return moral_compass.config.refusal_response, [input_verdict]
+        accepted, verdicts = moral_compass.filter([response])
+        if accepted is None:
+            logger.info(f"Ответ отклонен моральным компасом: {verdicts[-1].rules}")
+            accepted = moral_compass.config.refusal_response
+        return accepted, [input_verdict] + verdicts
+    
+    def _record_experience(self, session_id: str, intent: str, mood: str, bucket: str, emotion) -> None:
+        """Событие для адаптивного обучения: только постановка в очередь, обучение идет в фоне"""
+        try:
+            from modules.learning.experience_processor import InteractionEvent, experience_processor
+            
+            experience_processor.submit(InteractionEvent(
+                session_id=session_id,
+                intent=intent,
+                mood=mood,
+                bucket=bucket,
+                user_emotion=emotion.emotion if emotion else None,
+                intensity=emotion.intensity if emotion else 0.0,
+            ))
+        except Exception as e:
+            logger.warning(f"Не удалось зарегистрировать опыт взаимодействия: {e}")
+    
+    def _build_context(self, message: TextInput, session_id: str, db: Session):
+        """Контекст диалога: сводка сессии, последние реплики и припомненная память"""
+        try:
+            from core.config import config_manager
+            from modules.memory.context_assembler import context_assembler
+            from modules.memory.recall_system import memory_access_tracker, recall_ranker
+            
+            result = recall_ranker.rank(
+                db, message, limit=config_manager.memory.context.recall_limit, session_id=session_id
+            )
+            memories = [
+                {"id": mem.id, "content": mem.content, "score": score}
+                for mem, score in zip(result.memories, result.scores)
+            ]
+            context = context_assembler.assemble(db, session_id, memories)
+            memory_access_tracker.record(context.memory_ids)
+            return context
+        except Exception as e:
+            logger.warning(f"Не удалось собрать контекст диалога: {e}")
+            return None
+    
+    async def _cached_response(self, message: TextInput, mood: str, context: str = "",
+                               session_id: Optional[str] = None, bucket: Optional[str] = None) -> str:
+        """Ответ на сообщение; ответы на типовые намерения берутся из кеша"""
+        parsed = input_parser.parse(message)
+        if self._detect_intent(parsed) is None:
+            from modules.communication.response_generator import response_generator
+            return await response_generator.generate(parsed.text, context, session_id)
+        
+        from modules.communication.communication_style import style_engine
+        
+        bucket = bucket or style_engine.bucket(self._style_trait_value())
+        
+        async def compute():
+            return self._generate_response(parsed, bucket)
+        
+        key = (
+            "chat", " ".join(parsed.tokens), mood, bucket,
+            style_engine.version, response_cache.generation
+        )
+        return await response_cache.get_or_compute(key, compute)
+    
+    def _detect_intent(self, message: TextInput) -> Optional[str]:
+        """Типовое намерение сообщения с детерминированным ответом"""
+        parsed = input_parser.parse(message)
+        
+        if parsed.has_word("привет", "hello", "hi"):
+            return "greeting"
+        elif parsed.has_phrase("как дела") or parsed.has_phrase("как ты"):
+            return "wellbeing"
+        elif parsed.has_word("пока", "bye") or parsed.has_phrase("до свидания"):
+            return "farewell"
+        return None
+    
+    def _generate_response(self, message: TextInput, bucket: Optional[str] = None) -> str:
+        """Генерация ответа на сообщение по шаблонам стиля общения"""
+        from modules.communication.communication_style import FALLBACK_INTENT, style_engine
+        
+        parsed = input_parser.parse(message)
+        intent = self._detect_intent(parsed) or FALLBACK_INTENT
+        return style_engine.render(
+            intent, self._get_current_mood(), self._style_trait_value(), bucket, message=parsed.text
+        )
+    
+    def _style_trait_value(self) -> float:
+        """Значение черты личности, задающей вариант шаблона ответа"""
+        from modules.communication.communication_style import style_engine
+        from modules.personality.traits import personality
+        
+        return style_engine.trait_value(personality.snapshot())
+    
+    def _style_bucket(self, intent: str, mood: str) -> str:
+        """Корзина стиля ответа: по черте личности с поправкой на ожидаемую реакцию пользователя"""
+        from modules.communication.communication_style import style_engine
+        
+        bucket = style_engine.bucket(self._style_trait_value())
+        try:
+            from modules.learning.adaptive_learning import adaptive_learner
+            return adaptive_learner.preferred_bucket(intent, mood, bucket)
+        except Exception as e:
+            logger.warning(f"Не удалось выбрать корзину стиля по опыту: {e}")
+            return bucket
     
     def _get_current_mood(self) -> str:
         """Получение текущего настроения системы"""
@@ -126,6 +315,7 @@ class Orchestrator:
                          content: str, 
                          memory_type: str = "fact",
                          importance: float = 1.0,
+                         tags: Optional[List[str]] = None,
                          db: Session = None) -> str:
         """
         Сохранение информации в память
@@ -139,12 +329,18 @@ class Orchestrator:
             if db:
                 try:
                     from database import crud
-                    crud.crud_memory.create(db, {
+                    db_memory = crud.crud_memory.create(db, {
                         "content": content,
                         "memory_type": memory_type,
-                        "importance": importance,
-                        "timestamp": datetime.utcnow()
+                        "importance": importance
                     })
+                    memory_id = str(db_memory.id)
+                    recall_cache.invalidate()
+                    if tags:
+                        from modules.memory.tag_index import tag_index
+                        tag_ids = [tag.id for tag in crud.crud_tag.get_or_create_many(db, tags)]
+                        crud.crud_tag.attach(db, db_memory.id, tag_ids)
+                        tag_index.add(db_memory.id, tag_ids)
                 except Exception as e:
                     logger.warning(f"Не удалось сохранить память в БД: {e}")
             
@@ -158,30 +354,41 @@ class Orchestrator:
                           query: str, 
                           memory_type: Optional[str] = None,
                           limit: int = 10,
+                          tags: Optional[List[str]] = None,
+                          tag_mode: str = "and",
+                          session_id: Optional[str] = None,
+                          stats: Optional[Dict[str, Any]] = None,
                           db: Session = None) -> List[Dict[str, Any]]:
         """
         Поиск информации в памяти
+        
+        Если передан словарь stats, в него записываются число кандидатов и
+        время каждой стадии ранжирования.
         """
         try:
             logger.info(f"Поиск в памяти: '{query}'")
             
-            # Временная реализация
             memories = []
             
             if db:
                 try:
-                    # ✅ ДОБАВИТЬ локальный импорт
-                    from database import crud
-                    db_memories = crud.crud_memory.search(db, query, memory_type, limit)
-                    memories = [
-                        {
-                            "id": str(mem.id),
-                            "content": mem.content,
-                            "memory_type": mem.memory_type,
-                            "timestamp": mem.timestamp.isoformat()
-                        }
-                        for mem in db_memories
-                    ]
+                    from modules.memory.recall_system import memory_access_tracker
+                    
+                    async def compute():
+                        return self._rank_memories(db, query, memory_type, limit, tags, tag_mode, session_id, stats)
+                    
+                    if stats is None and not session_id:
+                        # Контекст сессии меняется с каждой репликой - такие запросы не кешируются
+                        key = (
+                            "recall", normalize_text(query), memory_type, limit,
+                            tuple(sorted(normalize_text(tag) for tag in tags or [])), tag_mode,
+                            recall_cache.generation
+                        )
+                        memories = list(await recall_cache.get_or_compute(key, compute))
+                    else:
+                        memories = await compute()
+                    # Обращения учитываются в памяти и сбрасываются в БД пакетами
+                    memory_access_tracker.record(int(mem["id"]) for mem in memories)
                 except Exception as e:
                     logger.warning(f"Не удалось выполнить поиск в БД: {e}")
             
@@ -191,6 +398,42 @@ class Orchestrator:
             logger.error(f"Ошибка поиска в памяти: {e}")
             raise ModuleExecutionError("orchestrator", "recall_memory", str(e))
     
+    def _rank_memories(self, db: Session, query: str, memory_type: Optional[str], limit: int,
+                       tags: Optional[List[str]], tag_mode: str, session_id: Optional[str],
+                       stats: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Ранжированный поиск в БД с фильтрацией по тегам"""
+        from modules.memory.recall_system import recall_ranker
+        
+        memory_ids = None
+        if tags:
+            memory_ids = self._find_tagged_memory_ids(db, tags, tag_mode)
+            if not memory_ids:
+                return []
+        result = recall_ranker.rank(db, query, memory_type, limit, memory_ids, session_id)
+        if stats is not None:
+            stats.update(result.stages)
+        return [
+            {
+                "id": str(mem.id),
+                "content": mem.content,
+                "memory_type": mem.memory_type,
+                "score": round(score, 4),
+                "timestamp": mem.created_at.isoformat() if mem.created_at else None
+            }
+            for mem, score in zip(result.memories, result.scores)
+        ]
+    
+    def _find_tagged_memory_ids(self, db: Session, tags: List[str], tag_mode: str = "and") -> List[int]:
+        """Идентификаторы памяти с заданными тегами по индексу тегов"""
+        from database import crud
+        from modules.memory.tag_index import tag_index
+        
+        tag_index.sync(db)
+        names = [name.strip().lower() for name in tags if name and name.strip()]
+        ids_by_name = crud.crud_tag.get_ids_by_names(db, names)
+        mode = getattr(tag_mode, "value", tag_mode)
+        return tag_index.query([ids_by_name.get(name) for name in names], mode).tolist()
+    
     async def update_mood(self, mood: str, intensity: float = 1.0, reason: Optional[str] = None):
         """
         Обновление настроения системы
@@ -204,6 +447,7 @@ class Orchestrator:
             logger.info(f"Обновление настроения: {mood} (интенсивность: {intensity})")
             
             self._state_manager.set_state("current_mood", mood)
+            response_cache.invalidate()
             
             # Сохранение в историю настроений
             mood_data = {
@@ -227,16 +471,31 @@ class Orchestrator:
             trait: Черта личности
             value: Новое значение
         """
+        await self.update_personality(trait, value)
+    
+    async def update_personality(self, trait: str, value: float, reason: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Обновление черты личности
+        
+        Значение применяется к модели черт сразу, в БД сохраняется отложенно.
+        
+        Args:
+            trait: Черта личности
+            value: Новое значение
+            reason: Причина изменения
+        """
+        from modules.personality.traits import personality
+        
         try:
-            logger.info(f"Обновление черты личности: {trait} = {value}")
-            
-            personality = self._state_manager.get_state("personality", {})
-            personality[trait] = value
-            self._state_manager.set_state("personality", personality)
-            
+            trait = getattr(trait, "value", trait)
+            logger.info(f"Обновление черты личности: {trait} = {value} ({reason or 'без причины'})")
+            snapshot = personality.set_trait(trait, value)
+            return {"status": "success", "trait": trait, "value": round(snapshot[trait], 4), "version": snapshot.version}
+        except ModuleExecutionError:
+            raise
         except Exception as e:
             logger.error(f"Ошибка обновления личности: {e}")
-            raise ModuleExecutionError("orchestrator", "update_personality_trait", str(e))
+            raise ModuleExecutionError("orchestrator", "update_personality", str(e))
     
     def get_system_state(self) -> Dict[str, Any]:
         """
@@ -266,8 +525,46 @@ class Orchestrator:
         """Проверка инициализации оркестратора"""
         return self._initialized
     
+    def start_background_jobs(self, engine=None):
+        """
+        Регистрация фоновых задач модулей и запуск планировщика
+        
+        Args:
+            engine: Движок БД для обслуживания сроков хранения (None - без него)
+        """
+        from core.scheduler import job_scheduler
+        from modules.character import habits
+        from modules.learning import adaptive_learning
+        from modules.memory import knowledge_base, long_term
+        from modules.psyche import subconscious
+        
+        subconscious.register_jobs(job_scheduler)
+        long_term.register_jobs(job_scheduler)
+        knowledge_base.register_jobs(job_scheduler)
+        habits.register_jobs(job_scheduler)
+        adaptive_learning.register_jobs(job_scheduler)
+        if engine is not None:
+            from database.retention import RetentionManager, register_jobs
+            register_jobs(job_scheduler, RetentionManager(engine))
+        job_scheduler.start()
+    
     def shutdown(self):
         """Завершение работы оркестратора"""
         logger.info("Завершение работы оркестратора")
+        from modules.communication.response_generator import response_generator
+        from modules.memory.recall_system import memory_access_tracker
+        from modules.learning.adaptive_learning import adaptive_learner
+        from modules.personality.traits import personality
+        from core.executor import process_executor
+        from core.scheduler import job_scheduler
+        # Отмена фоновых задач до остановки ресурсов, которые они используют
+        job_scheduler.shutdown()
+        memory_access_tracker.stop()
+        # Обучение на оставшихся событиях до сохранения черт, которые оно смещает
+        adaptive_learner.learn_pending()
+        adaptive_learner.checkpoint()
+        personality.stop()
+        response_generator.shutdown()
+        process_executor.shutdown()
         self._initialized = False
         self._state_manager.set_state("system_status", "shutdown")
\ No newline at end of file
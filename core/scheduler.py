@@ -0,0 +1,487 @@
+"""
+Планировщик фоновых задач модулей: приоритеты, бюджеты и расписания
+"""
+
+import asyncio
+import inspect
+import itertools
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Optional, Union
+
+from core.config import config_manager
+from core.load import load_tracker
+from core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты в порядке убывания (как modules.*.priority в system_config)
+PRIORITIES = ("high", "medium", "low")
+DEFAULT_PRIORITY = "medium"
+
+class IntervalTrigger:
+    """Запуск через фиксированный интервал (секунды или функция, возвращающая их)"""
+
+    def __init__(self, seconds: Union[float, Callable[[], float]]):
+        self._seconds = seconds
+
+    @property
+    def interval(self) -> float:
+        seconds = self._seconds() if callable(self._seconds) else self._seconds
+        return max(float(seconds), 0.001)
+
+    def next_after(self, now: float, jitter: float = 0.0) -> float:
+        return now + self.interval * (1 + random.uniform(-jitter, jitter))
+
+    def describe(self) -> str:
+        return f"every {self.interval:g}s"
+
+class CronTrigger:
+    """
+    Расписание в формате cron: 'минута час день месяц день_недели'
+
+    Поля поддерживают *, списки (1,15), диапазоны (1-5) и шаг (*/10, 0-30/5);
+    день недели 0-6, 0 - воскресенье. Время - локальное.
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Выражение cron должно содержать 5 полей: '{expression}'")
+        self.expression = expression
+        fields = [self._parse(part, low, high) for part, (low, high) in zip(parts, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        # Как в cron: если ограничены и день месяца, и день недели, достаточно любого
+        self._day_or = parts[2] != "*" and parts[4] != "*"
+
+    @staticmethod
+    def _parse(part: str, low: int, high: int) -> FrozenSet[int]:
+        values = set()
+        for item in part.split(","):
+            span, _, step = item.partition("/")
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(v) for v in span.split("-", 1))
+            else:
+                start = end = int(span)
+            if not (low <= start <= end <= high):
+                raise ValueError(f"Значение cron '{item}' вне диапазона {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return frozenset(values)
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        return (day or weekday) if self._day_or else (day and weekday)
+
+    def next_after(self, now: float, jitter: float = 0.0) -> float:
+        moment = datetime.fromtimestamp(now).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Выражение cron '{self.expression}' не срабатывает")
+
+    def describe(self) -> str:
+        return f"cron '{self.expression}'"
+
+@dataclass
+class JobContext:
+    """Контекст запуска задачи: бюджет и признак отмены"""
+    name: str
+    # Предел time.thread_time() для задачи (inf - без ограничения)
+    cpu_deadline: float
+    cancel_event: threading.Event
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def should_stop(self) -> bool:
+        """Задаче пора остановиться: отмена или исчерпан бюджет"""
+        return self.cancelled or time.thread_time() >= self.cpu_deadline
+
+@dataclass
+class ScheduledJob:
+    """Задача планировщика и ее метрики"""
+    name: str
+    func: Callable[[JobContext], Any]
+    trigger: Any
+    priority: Optional[str] = None
+    module: Optional[str] = None
+    next_run: float = 0.0
+    scheduled_at: float = 0.0
+    state: str = "idle"
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    runs: int = 0
+    failures: int = 0
+    skipped_load: int = 0
+    skipped_budget: int = 0
+    skipped_rate: int = 0
+    coalesced: int = 0
+    last_run_at: Optional[str] = None
+    last_duration_ms: float = 0.0
+    last_cpu_ms: float = 0.0
+    last_error: Optional[str] = None
+    duration_ms: Histogram = field(default_factory=Histogram)
+
+class CpuBudget:
+    """Бюджет процессорного времени на окно фиксированной длины"""
+
+    def __init__(self):
+        self.window_started = time.monotonic()
+        self.spent = 0.0
+
+    def remaining(self, fraction: float, window: float) -> float:
+        now = time.monotonic()
+        if now - self.window_started >= window:
+            self.window_started = now
+            self.spent = 0.0
+        return fraction * window - self.spent
+
+    def charge(self, cpu_seconds: float) -> None:
+        self.spent += cpu_seconds
+
+class JobScheduler:
+    """
+    Единый планировщик фоновых задач модулей
+
+    Поток-диспетчер ставит наступившие задачи в очередь с приоритетом
+    (high, medium, low; по умолчанию - приоритет модуля из
+    system.modules), рабочие потоки с пониженным приоритетом (nice) берут
+    их по порядку. Перед запуском проверяются:
+      - нагрузка переднего плана: задачи medium/low откладываются, пока
+        глубина очереди допуска не ниже max_foreground_depth;
+      - частота: не больше rate_per_minute запусков приоритета в минуту;
+      - бюджет процессорного времени приоритета на окно budget_window_seconds.
+    Задача не ставится в очередь повторно, пока предыдущий запуск не
+    завершен; пропущенные периоды объединяются в один запуск.
+    Настройки system.scheduler.jobs позволяют переопределить расписание
+    (interval_seconds или cron), приоритет и включение задачи.
+    """
+
+    def __init__(self, config_provider: Callable = None, load: Callable[[], int] = None):
+        self._config_provider = config_provider or (lambda: config_manager.system.scheduler)
+        self._load = load or load_tracker.depth
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._queued = {priority: 0 for priority in PRIORITIES}
+        self._sequence = itertools.count()
+        self._budgets = {priority: CpuBudget() for priority in PRIORITIES}
+        self._run_times: Dict[str, Deque[float]] = {priority: deque() for priority in PRIORITIES}
+        self._cron_cache: Dict[str, CronTrigger] = {}
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    # Регистрация задач
+
+    def add_job(self, name: str, func: Callable[[JobContext], Any], trigger: Any,
+                priority: Optional[str] = None, module: Optional[str] = None,
+                start_now: bool = False) -> ScheduledJob:
+        """
+        Регистрация задачи (повторная регистрация заменяет задачу)
+
+        Args:
+            func: Функция func(context) или корутина; долгие задачи должны
+                проверять context.should_stop()
+            trigger: IntervalTrigger или CronTrigger
+            priority: high/medium/low; по умолчанию - приоритет модуля
+            start_now: Первый запуск сразу, а не через период
+        """
+        if priority is not None and priority not in PRIORITIES:
+            raise ValueError(f"Неизвестный приоритет задачи {name}: {priority}")
+        job = ScheduledJob(name, func, trigger, priority, module)
+        now = time.time()
+        job.next_run = job.scheduled_at = now if start_now else self._trigger(job).next_after(now, self.config.jitter)
+        with self._lock:
+            self._jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    def remove_job(self, name: str) -> bool:
+        with self._lock:
+            job = self._jobs.pop(name, None)
+        if job is not None:
+            job.cancel_event.set()
+        return job is not None
+
+    def get_job(self, name: str) -> Optional[ScheduledJob]:
+        return self._jobs.get(name)
+
+    def _override(self, job: ScheduledJob):
+        return self.config.jobs.get(job.name)
+
+    def _trigger(self, job: ScheduledJob):
+        override = self._override(job)
+        if override is not None and override.cron:
+            trigger = self._cron_cache.get(override.cron)
+            if trigger is None:
+                trigger = self._cron_cache[override.cron] = CronTrigger(override.cron)
+            return trigger
+        if override is not None and override.interval_seconds:
+            return IntervalTrigger(override.interval_seconds)
+        return job.trigger
+
+    def priority_of(self, job: ScheduledJob) -> str:
+        override = self._override(job)
+        if override is not None and override.priority:
+            return override.priority
+        if job.priority:
+            return job.priority
+        module = config_manager.system.modules.get(job.module) if job.module else None
+        return module.priority if module is not None and module.priority in PRIORITIES else DEFAULT_PRIORITY
+
+    def _enabled(self, job: ScheduledJob) -> bool:
+        override = self._override(job)
+        if override is not None and not override.enabled:
+            return False
+        module = config_manager.system.modules.get(job.module) if job.module else None
+        return module is None or module.enabled
+
+    def _reschedule(self, job: ScheduledJob, now: float) -> None:
+        job.next_run = job.scheduled_at = self._trigger(job).next_after(now, self.config.jitter)
+
+    def _defer(self, job: ScheduledJob, now: float) -> None:
+        job.next_run = now + self.config.load_backoff_seconds
+
+    # Диспетчеризация и выполнение
+
+    def tick(self, now: Optional[float] = None) -> List[str]:
+        """
+        Постановка наступивших задач в очередь
+
+        Returns:
+            Имена поставленных задач
+        """
+        now = time.time() if now is None else now
+        enqueued = []
+        with self._lock:
+            for job in self._jobs.values():
+                if job.next_run > now or job.state != "idle":
+                    continue
+                if not self._enabled(job):
+                    self._reschedule(job, now)
+                    continue
+                priority = self.priority_of(job)
+                job.state = "queued"
+                self._queued[priority] += 1
+                self._queue.put((PRIORITIES.index(priority), job.next_run, next(self._sequence), job, priority))
+                enqueued.append(job.name)
+        return enqueued
+
+    def run_next(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Выполнение следующей задачи из очереди
+
+        Returns:
+            Имя выполненной задачи или None (очередь пуста, задача отложена)
+        """
+        try:
+            rank, _, _, job, priority = self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._queued[priority] -= 1
+        if job.cancel_event.is_set() or self._jobs.get(job.name) is not job:
+            job.state = "idle"
+            return None
+
+        config = self.config
+        now = time.time()
+        if rank > 0 and self._load() >= config.max_foreground_depth:
+            job.skipped_load += 1
+            return self._release(job, now)
+        if not self._admit_rate(priority, config.rate_per_minute.get(priority, 0)):
+            job.skipped_rate += 1
+            return self._release(job, now)
+        fraction = config.cpu_budget.get(priority)
+        remaining = float("inf")
+        if fraction is not None:
+            remaining = self._budgets[priority].remaining(fraction, config.budget_window_seconds)
+            if remaining <= 0:
+                job.skipped_budget += 1
+                return self._release(job, now)
+
+        self._execute(job, priority, remaining)
+        with self._lock:
+            job.state = "idle"
+            self._reschedule(job, time.time())
+        self._wakeup.set()
+        return job.name
+
+    def _release(self, job: ScheduledJob, now: float) -> None:
+        with self._lock:
+            job.state = "idle"
+            self._defer(job, now)
+        return None
+
+    def _admit_rate(self, priority: str, limit: int) -> bool:
+        if limit <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            times = self._run_times[priority]
+            while times and now - times[0] >= 60:
+                times.popleft()
+            if len(times) >= limit:
+                return False
+            times.append(now)
+            return True
+
+    def _execute(self, job: ScheduledJob, priority: str, cpu_remaining: float) -> None:
+        trigger = self._trigger(job)
+        if isinstance(trigger, IntervalTrigger):
+            # Периоды, прошедшие с планового запуска, выполняются одним запуском
+            job.coalesced += int((time.time() - job.scheduled_at) // trigger.interval)
+        job.state = "running"
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        context = JobContext(job.name, cpu_started + cpu_remaining, job.cancel_event)
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                asyncio.run(job.func(context))
+            else:
+                job.func(context)
+            job.runs += 1
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Ошибка фоновой задачи {job.name}: {e}")
+        finally:
+            cpu = time.thread_time() - cpu_started
+            self._budgets[priority].charge(cpu)
+            job.last_cpu_ms = round(cpu * 1000, 3)
+            job.last_duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            job.last_run_at = datetime.utcnow().isoformat()
+            job.duration_ms.observe(job.last_duration_ms)
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self.tick()
+            with self._lock:
+                next_run = min((job.next_run for job in self._jobs.values() if job.state == "idle"), default=None)
+            wait = self.config.tick_seconds if next_run is None else next_run - time.time()
+            self._wakeup.wait(min(max(wait, 0.01), self.config.tick_seconds))
+            self._wakeup.clear()
+
+    def _worker_loop(self) -> None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.config.niceness)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Приоритет рабочего потока не изменен: {e}")
+        while not self._stop_event.is_set():
+            self.run_next(timeout=0.5)
+
+    # Жизненный цикл
+
+    def start(self) -> None:
+        """Запуск диспетчера и рабочих потоков"""
+        config = self.config
+        if not config.enabled:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stop_event.clear()
+            for job in self._jobs.values():
+                job.cancel_event.clear()
+            self._threads = [threading.Thread(target=self._dispatch_loop, name="scheduler-dispatch", daemon=True)]
+            self._threads += [
+                threading.Thread(target=self._worker_loop, name=f"scheduler-worker-{i}", daemon=True)
+                for i in range(max(config.workers, 1))
+            ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Планировщик задач запущен: {len(self._jobs)} задач, {max(config.workers, 1)} потоков")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Остановка: отмена выполняющихся задач и очистка очереди"""
+        self._stop_event.set()
+        self._wakeup.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+            for job in self._jobs.values():
+                job.cancel_event.set()
+        while True:
+            try:
+                _, _, _, job, priority = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._queued[priority] -= 1
+                job.state = "idle"
+        for thread in threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stats(self) -> Dict[str, Any]:
+        """Очереди, бюджеты и метрики задач"""
+        config = self.config
+        with self._lock:
+            jobs = {
+                name: {
+                    "module": job.module,
+                    "priority": self.priority_of(job),
+                    "trigger": self._trigger(job).describe(),
+                    "state": job.state,
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "skipped_load": job.skipped_load,
+                    "skipped_rate": job.skipped_rate,
+                    "skipped_budget": job.skipped_budget,
+                    "coalesced": job.coalesced,
+                    "last_run_at": job.last_run_at,
+                    "last_duration_ms": job.last_duration_ms,
+                    "last_cpu_ms": job.last_cpu_ms,
+                    "last_error": job.last_error,
+                    "next_run_at": datetime.utcfromtimestamp(job.next_run).isoformat() if job.next_run else None,
+                    "duration_ms": job.duration_ms.snapshot(),
+                }
+                for name, job in self._jobs.items()
+            }
+            queues = dict(self._queued)
+        return {
+            "running": self.running,
+            "workers": max(config.workers, 1),
+            "foreground_depth": self._load(),
+            "queues": queues,
+            "budgets": {
+                priority: {
+                    "budget_ms": round(config.cpu_budget[priority] * config.budget_window_seconds * 1000, 3),
+                    "spent_ms": round(self._budgets[priority].spent * 1000, 3),
+                }
+                for priority in PRIORITIES if priority in config.cpu_budget
+            },
+            "jobs": jobs,
+        }
+
+# Глобальный планировщик фоновых задач
+job_scheduler = JobScheduler()
@@ -1,24 +1,38 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_, desc, text, bindparam, update
+from typing import List, Optional, Dict, Any, Tuple, Callable
 import uuid
 from datetime import datetime, timedelta
 
 from database.models import (
     SystemState, 
     Memory, 
+    Tag, 
     Interaction, 
     MoodHistory,
     PersonalityTrait,
     CharacterHabit,
     LearningExperience,
-    SystemLog
+    SystemLog,
+    memory_tags
 )
+from database.pagination import apply_keyset, keyset_order
+
+# Наибольший список id, передаваемый в SQL как IN (...); SQLite ограничивает число параметров
+MAX_IN_IDS = 500
+# Тип забытой (пониженной) памяти: не выдается без явного запроса этого типа
+DORMANT_MEMORY_TYPE = "dormant"
+
+def _memory_type_filter(memory_type: Optional[str]):
+    """Фильтр по типу памяти; без типа исключается забытая память"""
+    if memory_type:
+        return Memory.memory_type == memory_type
+    return or_(Memory.memory_type.is_(None), Memory.memory_type != DORMANT_MEMORY_TYPE)
 
 class CRUDSystemState:
     def get_current(self, db: Session) -> Optional[SystemState]:
         """Получение текущего состояния системы"""
-        return db.query(SystemState).order_by(desc(SystemState.timestamp)).first()
+        return db.query(SystemState).order_by(desc(SystemState.created_at)).first()
     
     def create(self, db: Session, state_data: Dict[str, Any]) -> SystemState:
         """Создание новой записи состояния системы"""
@@ -37,6 +51,27 @@ class CRUDSystemState:
             db.commit()
             db.refresh(db_state)
         return db_state
+    
+    def get_parameter(self, db: Session, name: str, default: Any = None) -> Any:
+        """Значение из system_parameters текущего состояния системы"""
+        state = self.get_current(db)
+        return (state.system_parameters or {}).get(name, default) if state else default
+    
+    def set_parameter(self, db: Session, name: str, value: Any, commit: bool = True) -> None:
+        """
+        Запись значения в system_parameters текущего состояния системы
+        
+        Args:
+            commit: False - значение фиксируется вместе с транзакцией вызывающего
+        """
+        state = self.get_current(db)
+        if state is None:
+            state = SystemState(system_parameters={})
+            db.add(state)
+        # JSON колонка не отслеживает изменения на месте - присваивается новый словарь
+        state.system_parameters = {**(state.system_parameters or {}), name: value}
+        if commit:
+            db.commit()
 
 class CRUDMemory:
     def get(self, db: Session, memory_id: int) -> Optional[Memory]:
@@ -46,8 +81,19 @@ class CRUDMemory:
     def get_by_session(self, db: Session, session_id: str, limit: int = 50) -> List[Memory]:
         """Получение памяти по сессии"""
         return db.query(Memory).filter(
-            Memory.session_id == session_id
-        ).order_by(desc(Memory.timestamp)).limit(limit).all()
+            Memory.session_id == session_id, _memory_type_filter(None)
+        ).order_by(desc(Memory.created_at)).limit(limit).all()
+    
+    def get_multi(self, db: Session, memory_type: Optional[str] = None, limit: int = 100,
+                  cursor: Optional[str] = None) -> List[Memory]:
+        """Список памяти (новые первыми, страница после cursor)"""
+        query = db.query(Memory).filter(_memory_type_filter(memory_type))
+        return apply_keyset(query, Memory, cursor, limit).all()
+    
+    def export_query(self, db: Session, memory_type: Optional[str] = None):
+        """Запрос для потоковой выгрузки памяти"""
+        query = db.query(Memory).filter(_memory_type_filter(memory_type))
+        return query.order_by(*keyset_order(Memory, descending=False))
     
     def create(self, db: Session, memory_data: Dict[str, Any]) -> Memory:
         """Создание новой записи памяти"""
@@ -57,16 +103,134 @@ class CRUDMemory:
         db.refresh(db_memory)
         return db_memory
     
-    def search(self, db: Session, query: str, memory_type: Optional[str] = None, limit: int = 10) -> List[Memory]:
-        """Поиск в памяти по содержимому"""
-        search_filter = Memory.content.ilike(f"%{query}%")
-        if memory_type:
-            search_filter = and_(search_filter, Memory.memory_type == memory_type)
+    def search(self, db: Session, query: str, memory_type: Optional[str] = None, limit: int = 10,
+               memory_ids: Optional[List[int]] = None) -> List[Memory]:
+        """Поиск в памяти по содержимому (опционально среди заданных memory_ids)"""
+        search_filter = and_(Memory.content.ilike(f"%{query}%"), _memory_type_filter(memory_type))
         
-        return db.query(Memory).filter(search_filter).order_by(
+        return self._limit_to_ids(db.query(Memory).filter(search_filter).order_by(
             desc(Memory.importance),
-            desc(Memory.timestamp)
-        ).limit(limit).all()
+            desc(Memory.created_at)
+        ), memory_ids, limit)
+    
+    def search_any(self, db: Session, terms: List[str], memory_type: Optional[str] = None,
+                   limit: int = 200, memory_ids: Optional[List[int]] = None) -> List[Memory]:
+        """Поиск памяти, содержащей хотя бы один из терминов"""
+        if not terms:
+            return []
+        search_filter = and_(
+            or_(*(Memory.content.ilike(f"%{term}%") for term in terms)), _memory_type_filter(memory_type)
+        )
+        
+        return self._limit_to_ids(db.query(Memory).filter(search_filter).order_by(
+            desc(Memory.importance),
+            desc(Memory.created_at)
+        ), memory_ids, limit)
+    
+    def get_recent(self, db: Session, memory_type: Optional[str] = None, limit: int = 50,
+                   memory_ids: Optional[List[int]] = None) -> List[Memory]:
+        """Последние созданные записи памяти"""
+        query = db.query(Memory).filter(_memory_type_filter(memory_type))
+        return self._limit_to_ids(query.order_by(desc(Memory.created_at)), memory_ids, limit)
+    
+    def _limit_to_ids(self, query, memory_ids: Optional[List[int]], limit: int) -> List[Memory]:
+        """
+        Первые limit строк упорядоченного запроса среди memory_ids
+        
+        Короткий список уходит в SQL как IN (...); длинный (например, все записи
+        частого тега) не передается параметрами, а пересекается с результатом
+        запроса в процессе по мере потокового чтения.
+        """
+        if memory_ids is None:
+            return query.limit(limit).all()
+        if len(memory_ids) <= MAX_IN_IDS:
+            return query.filter(Memory.id.in_(memory_ids)).limit(limit).all() if len(memory_ids) else []
+        allowed = set(memory_ids)
+        result = []
+        rows = iter(query.yield_per(1000))
+        try:
+            for memory in rows:
+                if memory.id in allowed:
+                    result.append(memory)
+                    if len(result) >= limit:
+                        break
+        finally:
+            # Курсор недочитанного результата закрывается сразу
+            rows.close()
+        return result
+    
+    def record_access_batch(self, db: Session, hits: Dict[int, Tuple[int, datetime]]) -> int:
+        """
+        Пакетное обновление access_frequency / last_accessed
+        
+        Одна инструкция UPDATE ... FROM (VALUES ...) на весь пакет вместо
+        SELECT + UPDATE на каждую запись.
+        
+        Args:
+            hits: memory_id -> (число обращений, время последнего обращения)
+            
+        Returns:
+            Количество обновленных записей
+        """
+        if not hits:
+            return 0
+        
+        params = {}
+        rows = []
+        postgres = db.get_bind().dialect.name == "postgresql"
+        for i, (memory_id, (count, accessed_at)) in enumerate(hits.items()):
+            params[f"id_{i}"] = memory_id
+            params[f"hits_{i}"] = count
+            params[f"ts_{i}"] = accessed_at
+            if postgres:
+                rows.append(f"(CAST(:id_{i} AS INTEGER), CAST(:hits_{i} AS INTEGER), CAST(:ts_{i} AS TIMESTAMP))")
+            else:
+                rows.append(f"(:id_{i}, :hits_{i}, :ts_{i})")
+        values = ", ".join(rows)
+        
+        if postgres:
+            statement = (
+                "UPDATE memories SET "
+                "access_frequency = COALESCE(memories.access_frequency, 0) + v.hits, "
+                "last_accessed = GREATEST(memories.last_accessed, v.accessed_at) "
+                f"FROM (VALUES {values}) AS v(id, hits, accessed_at) "
+                "WHERE memories.id = v.id"
+            )
+        else:
+            # В SQLite колонки VALUES называются column1, column2, ...
+            for i in range(len(rows)):
+                params[f"ts_{i}"] = params[f"ts_{i}"].strftime("%Y-%m-%d %H:%M:%S.%f")
+            statement = (
+                "UPDATE memories SET "
+                "access_frequency = COALESCE(access_frequency, 0) + v.column2, "
+                "last_accessed = MAX(COALESCE(last_accessed, ''), v.column3) "
+                f"FROM (VALUES {values}) AS v "
+                "WHERE memories.id = v.column1"
+            )
+        result = db.execute(text(statement), params)
+        db.commit()
+        return result.rowcount
+    
+    def delete_many(self, db: Session, memory_ids: List[int]) -> int:
+        """Удаление пакета записей памяти вместе со связями с тегами"""
+        if not memory_ids:
+            return 0
+        db.execute(memory_tags.delete().where(memory_tags.c.memory_id.in_(memory_ids)))
+        deleted = db.query(Memory).filter(Memory.id.in_(memory_ids)).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    
+    def set_type_many(self, db: Session, memory_ids: List[int], memory_type: str) -> int:
+        """Смена типа пакета записей памяти одним UPDATE"""
+        if not memory_ids:
+            return 0
+        updated = db.query(Memory).filter(Memory.id.in_(memory_ids)).update(
+            # last_accessed явно сохраняется, иначе сработает onupdate
+            {Memory.memory_type: memory_type, Memory.last_accessed: Memory.last_accessed},
+            synchronize_session=False
+        )
+        db.commit()
+        return updated
     
     def update_importance(self, db: Session, memory_id: int, importance: float) -> Memory:
         """Обновление важности памяти"""
@@ -78,6 +242,45 @@ class CRUDMemory:
             db.refresh(db_memory)
         return db_memory
 
+class CRUDTag:
+    def get_or_create_many(self, db: Session, names: List[str]) -> List[Tag]:
+        """Получение тегов по именам с созданием недостающих (один SELECT на пакет)"""
+        names = list(dict.fromkeys(name.strip().lower() for name in names if name and name.strip()))
+        if not names:
+            return []
+        existing = {tag.name: tag for tag in db.query(Tag).filter(Tag.name.in_(names)).all()}
+        missing = [Tag(name=name) for name in names if name not in existing]
+        if missing:
+            db.add_all(missing)
+            db.flush()
+            existing.update((tag.name, tag) for tag in missing)
+        return [existing[name] for name in names]
+    
+    def get_ids_by_names(self, db: Session, names: List[str]) -> Dict[str, int]:
+        """Идентификаторы существующих тегов по именам"""
+        names = [name.strip().lower() for name in names if name and name.strip()]
+        if not names:
+            return {}
+        return dict(db.query(Tag.name, Tag.id).filter(Tag.name.in_(names)).all())
+    
+    def attach(self, db: Session, memory_id: int, tag_ids: List[int]) -> None:
+        """Привязка тегов к памяти одним INSERT"""
+        if tag_ids:
+            db.execute(memory_tags.insert(), [
+                {"memory_id": memory_id, "tag_id": tag_id} for tag_id in tag_ids
+            ])
+        db.commit()
+    
+    def get_links_after(self, db: Session, after_memory_id: int, after_tag_id: int = 0,
+                        limit: int = 10000) -> List[Tuple[int, int]]:
+        """Связи (memory_id, tag_id) после пары (after_memory_id, after_tag_id) по возрастанию пары"""
+        return db.query(memory_tags.c.memory_id, memory_tags.c.tag_id).filter(
+            or_(
+                memory_tags.c.memory_id > after_memory_id,
+                and_(memory_tags.c.memory_id == after_memory_id, memory_tags.c.tag_id > after_tag_id)
+            )
+        ).order_by(memory_tags.c.memory_id, memory_tags.c.tag_id).limit(limit).all()
+
 class CRUDInteraction:
     def create(self, db: Session, interaction_data: Dict[str, Any]) -> Interaction:
         """Создание записи взаимодействия"""
@@ -87,22 +290,57 @@ class CRUDInteraction:
         db.refresh(db_interaction)
         return db_interaction
     
-    def get_user_interactions(self, db: Session, user_id: str, limit: int = 100) -> List[Interaction]:
-        """Получение взаимодействий пользователя"""
+    def get_user_interactions(self, db: Session, user_id: str, limit: int = 100,
+                              cursor: Optional[str] = None) -> List[Interaction]:
+        """Получение взаимодействий пользователя (новые первыми, страница после cursor)"""
+        query = db.query(Interaction).filter(Interaction.user_id == user_id)
+        return apply_keyset(query, Interaction, cursor, limit).all()
+    
+    def get_session_interactions(self, db: Session, session_id: str, limit: int = 100,
+                                 cursor: Optional[str] = None) -> List[Interaction]:
+        """Получение взаимодействий по сессии (в хронологическом порядке, страница после cursor)"""
+        query = db.query(Interaction).filter(Interaction.session_id == session_id)
+        return apply_keyset(query, Interaction, cursor, limit, descending=False).all()
+    
+    def export_query(self, db: Session, session_id: Optional[str] = None, user_id: Optional[str] = None):
+        """Запрос для потоковой выгрузки взаимодействий"""
+        query = db.query(Interaction)
+        if session_id:
+            query = query.filter(Interaction.session_id == session_id)
+        if user_id:
+            query = query.filter(Interaction.user_id == user_id)
+        return query.order_by(*keyset_order(Interaction, descending=False))
+    
+    def get_session_interactions_after(self, db: Session, session_id: str, after_id: int = 0,
+                                       limit: int = 500) -> List[Interaction]:
+        """Взаимодействия сессии с id больше after_id (по возрастанию id)"""
         return db.query(Interaction).filter(
-            Interaction.user_id == user_id
-        ).order_by(desc(Interaction.timestamp)).limit(limit).all()
+            Interaction.session_id == session_id,
+            Interaction.id > after_id
+        ).order_by(Interaction.id).limit(limit).all()
     
-    def get_session_interactions(self, db: Session, session_id: str) -> List[Interaction]:
-        """Получение взаимодействий по сессии"""
+    def get_recent_session_interactions(self, db: Session, session_id: str, limit: int = 5) -> List[Interaction]:
+        """Последние взаимодействия сессии (новые первыми)"""
         return db.query(Interaction).filter(
             Interaction.session_id == session_id
-        ).order_by(Interaction.timestamp).all()
+        ).order_by(desc(Interaction.created_at)).limit(limit).all()
+    
+    def get_chunk_after(self, db: Session, after_id: int = 0, limit: int = 5000) -> List[Tuple]:
+        """
+        Пакет взаимодействий с id больше after_id для потоковой обработки
+        
+        Returns:
+            Кортежи (id, session_id, user_input, context_data, created_at) по возрастанию id
+        """
+        return db.query(
+            Interaction.id, Interaction.session_id, Interaction.user_input,
+            Interaction.context_data, Interaction.created_at
+        ).filter(Interaction.id > after_id).order_by(Interaction.id).limit(limit).all()
 
 class CRUDMoodHistory:
     def get_current_mood(self, db: Session) -> Optional[MoodHistory]:
         """Получение текущего настроения"""
-        return db.query(MoodHistory).order_by(desc(MoodHistory.timestamp)).first()
+        return db.query(MoodHistory).order_by(desc(MoodHistory.created_at)).first()
     
     def create(self, db: Session, mood_data: Dict[str, Any]) -> MoodHistory:
         """Создание записи настроения"""
@@ -112,30 +350,198 @@ class CRUDMoodHistory:
         db.refresh(db_mood)
         return db_mood
     
-    def get_mood_history(self, db: Session, hours: int = 24) -> List[MoodHistory]:
-        """Получение истории настроения"""
+    def get_mood_history(self, db: Session, hours: int = 24, limit: int = 1000,
+                         cursor: Optional[str] = None) -> List[MoodHistory]:
+        """Получение истории настроения (в хронологическом порядке, страница после cursor)"""
         time_threshold = datetime.utcnow() - timedelta(hours=hours)
-        return db.query(MoodHistory).filter(
-            MoodHistory.timestamp >= time_threshold
-        ).order_by(MoodHistory.timestamp).all()
+        query = db.query(MoodHistory).filter(MoodHistory.created_at >= time_threshold)
+        return apply_keyset(query, MoodHistory, cursor, limit, descending=False).all()
 
 class CRUDPersonality:
     def get_traits(self, db: Session) -> Dict[str, float]:
-        """Получение всех черт личности"""
-        traits = db.query(PersonalityTrait).all()
-        return {trait.trait_name: trait.value for trait in traits}
+        """Получение текущих значений всех черт личности"""
+        return dict(db.query(PersonalityTrait.trait_name, PersonalityTrait.current_value).all())
+    
+    def get_baselines(self, db: Session) -> Dict[str, float]:
+        """Получение базовых значений всех черт личности"""
+        return dict(db.query(PersonalityTrait.trait_name, PersonalityTrait.baseline_value).all())
     
     def update_trait(self, db: Session, trait_name: str, value: float) -> PersonalityTrait:
         """Обновление черты личности"""
         db_trait = db.query(PersonalityTrait).filter(PersonalityTrait.trait_name == trait_name).first()
         if db_trait:
-            db_trait.value = value
+            db_trait.current_value = value
         else:
-            db_trait = PersonalityTrait(trait_name=trait_name, value=value)
+            db_trait = PersonalityTrait(trait_name=trait_name, current_value=value, baseline_value=value)
             db.add(db_trait)
         db.commit()
         db.refresh(db_trait)
         return db_trait
+    
+    def upsert_traits(self, db: Session, values: Dict[str, float],
+                      baselines: Optional[Dict[str, float]] = None) -> int:
+        """
+        Пакетное сохранение значений черт личности
+        
+        Один SELECT существующих черт, один executemany UPDATE и один INSERT
+        недостающих вместо SELECT + COMMIT на каждую черту.
+        
+        Args:
+            values: Имя черты -> текущее значение
+            baselines: Базовые значения для создаваемых черт (по умолчанию - текущее)
+            
+        Returns:
+            Количество сохраненных черт
+        """
+        if not values:
+            return 0
+        baselines = baselines or {}
+        now = datetime.utcnow()
+        existing = {
+            name for (name,) in
+            db.query(PersonalityTrait.trait_name).filter(PersonalityTrait.trait_name.in_(list(values))).distinct()
+        }
+        if existing:
+            table = PersonalityTrait.__table__
+            statement = (
+                update(table)
+                .where(table.c.trait_name == bindparam("_name"))
+                .values(current_value=bindparam("_value"), last_updated=bindparam("_updated"))
+            )
+            db.execute(statement, [
+                {"_name": name, "_value": float(values[name]), "_updated": now} for name in existing
+            ])
+        missing = [
+            PersonalityTrait(
+                trait_name=name, current_value=float(value),
+                baseline_value=float(baselines.get(name, value)), last_updated=now
+            )
+            for name, value in values.items() if name not in existing
+        ]
+        if missing:
+            db.add_all(missing)
+        db.commit()
+        return len(values)
+
+class CRUDCharacterHabit:
+    def get_multi(self, db: Session, limit: int = 100) -> List[CharacterHabit]:
+        """Самые сильные привычки"""
+        return db.query(CharacterHabit).order_by(
+            desc(CharacterHabit.strength), desc(CharacterHabit.frequency)
+        ).limit(limit).all()
+    
+    def get_frequencies(self, db: Session) -> Dict[str, int]:
+        """Частоты всех привычек по имени"""
+        return {name: frequency or 0 for name, frequency in db.query(CharacterHabit.habit_name, CharacterHabit.frequency)}
+    
+    def upsert_counts(self, db: Session, counts: Dict[str, int], last_expressed: Dict[str, datetime],
+                      strength: Callable[[int], float], descriptions: Optional[Dict[str, str]] = None,
+                      commit: bool = True) -> int:
+        """
+        Пакетное прибавление частот привычек
+        
+        Один SELECT существующих привычек, один executemany UPDATE и один INSERT
+        новых. Сила привычки пересчитывается по новой частоте.
+        
+        Args:
+            counts: Имя привычки -> прирост частоты
+            last_expressed: Имя привычки -> время последнего проявления
+            strength: Функция частота -> сила привычки
+            descriptions: Описания создаваемых привычек
+            commit: False - изменения фиксируются вместе с транзакцией вызывающего
+            
+        Returns:
+            Количество обновленных и созданных привычек
+        """
+        if not counts:
+            return 0
+        descriptions = descriptions or {}
+        existing: Dict[str, Tuple[int, int]] = {}
+        names = list(counts)
+        for start in range(0, len(names), 500):
+            rows = db.query(CharacterHabit.id, CharacterHabit.habit_name, CharacterHabit.frequency).filter(
+                CharacterHabit.habit_name.in_(names[start:start + 500])
+            ).order_by(CharacterHabit.id)
+            for habit_id, name, frequency in rows:
+                existing.setdefault(name, (habit_id, frequency or 0))
+        if existing:
+            table = CharacterHabit.__table__
+            statement = update(table).where(table.c.id == bindparam("_id")).values(
+                frequency=bindparam("_frequency"),
+                strength=bindparam("_strength"),
+                last_expressed=bindparam("_last")
+            )
+            params = []
+            for name, (habit_id, frequency) in existing.items():
+                frequency += counts[name]
+                params.append({
+                    "_id": habit_id, "_frequency": frequency,
+                    "_strength": strength(frequency), "_last": last_expressed.get(name)
+                })
+            db.execute(statement, params)
+        db.add_all([
+            CharacterHabit(
+                habit_name=name, description=descriptions.get(name), frequency=count,
+                strength=strength(count), last_expressed=last_expressed.get(name)
+            )
+            for name, count in counts.items() if name not in existing
+        ])
+        if commit:
+            db.commit()
+        return len(counts)
+
+class CRUDLearningExperience:
+    def get_by_type(self, db: Session, experience_type: str) -> List[LearningExperience]:
+        """Опыт заданного типа"""
+        return db.query(LearningExperience).filter(
+            LearningExperience.experience_type == experience_type
+        ).order_by(LearningExperience.id).all()
+    
+    def upsert_lessons(self, db: Session, experience_type: str, lessons: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Пакетное сохранение уроков одного типа (ключ урока - description)
+        
+        Один SELECT существующих уроков, один executemany UPDATE и один INSERT новых.
+        
+        Args:
+            lessons: description -> {"impact_score", "applied_count", "lesson_learned"}
+            
+        Returns:
+            Количество сохраненных уроков
+        """
+        if not lessons:
+            return 0
+        existing: Dict[str, int] = {}
+        descriptions = list(lessons)
+        for start in range(0, len(descriptions), 500):
+            rows = db.query(LearningExperience.id, LearningExperience.description).filter(
+                LearningExperience.experience_type == experience_type,
+                LearningExperience.description.in_(descriptions[start:start + 500])
+            ).order_by(LearningExperience.id)
+            for lesson_id, description in rows:
+                existing.setdefault(description, lesson_id)
+        if existing:
+            table = LearningExperience.__table__
+            statement = update(table).where(table.c.id == bindparam("_id")).values(
+                impact_score=bindparam("_impact"),
+                applied_count=bindparam("_applied"),
+                lesson_learned=bindparam("_lesson")
+            )
+            db.execute(statement, [
+                {
+                    "_id": lesson_id,
+                    "_impact": lessons[description]["impact_score"],
+                    "_applied": lessons[description]["applied_count"],
+                    "_lesson": lessons[description].get("lesson_learned"),
+                }
+                for description, lesson_id in existing.items()
+            ])
+        db.add_all([
+            LearningExperience(experience_type=experience_type, description=description, **lesson)
+            for description, lesson in lessons.items() if description not in existing
+        ])
+        db.commit()
+        return len(lessons)
 
 class CRUDSystemLog:
     def create(self, db: Session, log_data: Dict[str, Any]) -> SystemLog:
@@ -146,17 +552,28 @@ class CRUDSystemLog:
         db.refresh(db_log)
         return db_log
     
-    def get_recent_logs(self, db: Session, level: Optional[str] = None, limit: int = 100) -> List[SystemLog]:
-        """Получение последних логов"""
+    def get_recent_logs(self, db: Session, level: Optional[str] = None, limit: int = 100,
+                        cursor: Optional[str] = None) -> List[SystemLog]:
+        """Получение последних логов (новые первыми, страница после cursor)"""
+        query = db.query(SystemLog)
+        if level:
+            query = query.filter(SystemLog.level == level)
+        return apply_keyset(query, SystemLog, cursor, limit).all()
+    
+    def export_query(self, db: Session, level: Optional[str] = None):
+        """Запрос для потоковой выгрузки логов"""
         query = db.query(SystemLog)
         if level:
             query = query.filter(SystemLog.level == level)
-        return query.order_by(desc(SystemLog.timestamp)).limit(limit).all()
+        return query.order_by(*keyset_order(SystemLog, descending=False))
 
 # Создание экземпляров CRUD классов
 crud_system_state = CRUDSystemState()
 crud_memory = CRUDMemory()
+crud_tag = CRUDTag()
 crud_interaction = CRUDInteraction()
 crud_mood_history = CRUDMoodHistory()
 crud_personality = CRUDPersonality()
+crud_character_habit = CRUDCharacterHabit()
+crud_learning_experience = CRUDLearningExperience()
 crud_system_log = CRUDSystemLog()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""Исходная схема базы данных
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+Схема в том виде, в котором ее создавал Base.metadata.create_all до появления
+миграций. Для существующих баз: `alembic stamp 0001_initial_schema`.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001_initial_schema'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    
+    if 'system_state' not in existing:
+        op.create_table(
+            'system_state',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('current_mood', sa.String()),
+            sa.Column('mood_intensity', sa.Float()),
+            sa.Column('personality_traits', sa.JSON()),
+            sa.Column('system_parameters', sa.JSON()),
+            sa.Column('last_updated', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_system_state_id', 'system_state', ['id'])
+    
+    if 'memories' not in existing:
+        op.create_table(
+            'memories',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('memory_type', sa.String()),
+            sa.Column('importance', sa.Float()),
+            sa.Column('emotion_context', sa.String()),
+            sa.Column('access_frequency', sa.Integer()),
+            sa.Column('last_accessed', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_memories_id', 'memories', ['id'])
+    
+    if 'tags' not in existing:
+        op.create_table(
+            'tags',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String()),
+            sa.Column('category', sa.String()),
+        )
+        op.create_index('ix_tags_id', 'tags', ['id'])
+        op.create_index('ix_tags_name', 'tags', ['name'], unique=True)
+    
+    if 'memory_tags' not in existing:
+        op.create_table(
+            'memory_tags',
+            sa.Column('memory_id', sa.Integer(), sa.ForeignKey('memories.id'), primary_key=True),
+            sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id'), primary_key=True),
+        )
+    
+    if 'interactions' not in existing:
+        op.create_table(
+            'interactions',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('session_id', sa.String()),
+            sa.Column('user_input', sa.Text(), nullable=False),
+            sa.Column('ai_response', sa.Text(), nullable=False),
+            sa.Column('user_emotion', sa.String()),
+            sa.Column('ai_emotion', sa.String()),
+            sa.Column('response_quality', sa.Float()),
+            sa.Column('context_data', sa.JSON()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_interactions_id', 'interactions', ['id'])
+        op.create_index('ix_interactions_session_id', 'interactions', ['session_id'])
+    
+    if 'mood_history' not in existing:
+        op.create_table(
+            'mood_history',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('emotion', sa.String(), nullable=False),
+            sa.Column('intensity', sa.Float(), nullable=False),
+            sa.Column('trigger', sa.Text()),
+            sa.Column('duration', sa.Float()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_mood_history_id', 'mood_history', ['id'])
+    
+    if 'personality_traits' not in existing:
+        op.create_table(
+            'personality_traits',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('trait_name', sa.String(), nullable=False),
+            sa.Column('current_value', sa.Float(), nullable=False),
+            sa.Column('baseline_value', sa.Float(), nullable=False),
+            sa.Column('variability', sa.Float()),
+            sa.Column('last_updated', sa.DateTime()),
+        )
+        op.create_index('ix_personality_traits_id', 'personality_traits', ['id'])
+        op.create_index('ix_personality_traits_trait_name', 'personality_traits', ['trait_name'])
+    
+    if 'character_habits' not in existing:
+        op.create_table(
+            'character_habits',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('habit_name', sa.String(), nullable=False),
+            sa.Column('description', sa.Text()),
+            sa.Column('strength', sa.Float()),
+            sa.Column('frequency', sa.Integer()),
+            sa.Column('last_expressed', sa.DateTime()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_character_habits_id', 'character_habits', ['id'])
+    
+    if 'learning_experiences' not in existing:
+        op.create_table(
+            'learning_experiences',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('experience_type', sa.String()),
+            sa.Column('description', sa.Text()),
+            sa.Column('lesson_learned', sa.Text()),
+            sa.Column('impact_score', sa.Float()),
+            sa.Column('applied_count', sa.Integer()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_learning_experiences_id', 'learning_experiences', ['id'])
+    
+    if 'system_logs' not in existing:
+        op.create_table(
+            'system_logs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('level', sa.String()),
+            sa.Column('module', sa.String()),
+            sa.Column('message', sa.Text()),
+            sa.Column('context_data', sa.JSON()),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index('ix_system_logs_id', 'system_logs', ['id'])
+
+def downgrade() -> None:
+    for table in (
+        'system_logs', 'learning_experiences', 'character_habits', 'personality_traits',
+        'mood_history', 'interactions', 'memory_tags', 'tags', 'memories', 'system_state'
+    ):
+        op.drop_table(table)
@@ -0,0 +1,53 @@
+"""Индексы под запросы CRUD: поиск памяти, истории и логи
+
+Revision ID: 0002_query_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002_query_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+# (имя индекса, таблица, колонки, условие частичного индекса)
+INDEXES = [
+    ('ix_memories_type_importance_created', 'memories', ['memory_type', 'importance', 'created_at'], None),
+    ('ix_memories_importance_created', 'memories', ['importance', 'created_at'], None),
+    ('ix_memories_created_at', 'memories', ['created_at'], None),
+    ('ix_memories_last_accessed_active', 'memories', ['last_accessed'], 'access_frequency > 0'),
+    ('ix_memory_tags_tag_memory', 'memory_tags', ['tag_id', 'memory_id'], None),
+    ('ix_interactions_session_created', 'interactions', ['session_id', 'created_at'], None),
+    ('ix_interactions_user_created', 'interactions', ['user_id', 'created_at'], None),
+    ('ix_interactions_created_at', 'interactions', ['created_at'], None),
+    ('ix_mood_history_created_at', 'mood_history', ['created_at'], None),
+    ('ix_system_logs_level_created', 'system_logs', ['level', 'created_at'], None),
+    ('ix_system_logs_created_at', 'system_logs', ['created_at'], None),
+    ('ix_system_state_created_at', 'system_state', ['created_at'], None),
+]
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    
+    interaction_columns = {column['name'] for column in inspector.get_columns('interactions')}
+    if 'user_id' not in interaction_columns:
+        op.add_column('interactions', sa.Column('user_id', sa.String(), nullable=True))
+    
+    for name, table, columns, where in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name in existing:
+            continue
+        kwargs = {}
+        if where:
+            kwargs['postgresql_where'] = sa.text(where)
+            kwargs['sqlite_where'] = sa.text(where)
+        op.create_index(name, table, columns, **kwargs)
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    with op.batch_alter_table('interactions') as batch_op:
+        batch_op.drop_column('user_id')
@@ -0,0 +1,102 @@
+"""Месячное секционирование таблиц истории (только PostgreSQL)
+
+Revision ID: 0003_partition_history_tables
+Revises: 0002_query_indexes
+Create Date: 2026-10-19 00:00:00
+
+interactions, mood_history и system_logs превращаются в секционированные по
+RANGE (created_at) таблицы. Первичный ключ становится (id, created_at), как
+того требует PostgreSQL для секционированных таблиц. На SQLite миграция ничего
+не делает: там используются таблицы-шарды (см. database/retention.py).
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_partition_history_tables'
+down_revision = '0002_query_indexes'
+branch_labels = None
+depends_on = None
+
+# Индексы каждой таблицы: (имя, колонки)
+TABLE_INDEXES = {
+    'interactions': [
+        ('ix_interactions_id', ['id']),
+        ('ix_interactions_session_id', ['session_id']),
+        ('ix_interactions_session_created', ['session_id', 'created_at']),
+        ('ix_interactions_user_created', ['user_id', 'created_at']),
+        ('ix_interactions_created_at', ['created_at']),
+    ],
+    'mood_history': [
+        ('ix_mood_history_id', ['id']),
+        ('ix_mood_history_created_at', ['created_at']),
+    ],
+    'system_logs': [
+        ('ix_system_logs_id', ['id']),
+        ('ix_system_logs_level_created', ['level', 'created_at']),
+        ('ix_system_logs_created_at', ['created_at']),
+    ],
+}
+
+def _month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _add_months(moment, months):
+    index = moment.year * 12 + (moment.month - 1) + months
+    return moment.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+def _convert(table, partitioned):
+    bind = op.get_bind()
+    legacy = f'{table}_legacy'
+    
+    op.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    for name, _ in TABLE_INDEXES[table]:
+        op.execute(f'DROP INDEX IF EXISTS "{name}"')
+    op.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT IF EXISTS "{table}_pkey"')
+    
+    if partitioned:
+        op.execute(f'UPDATE "{legacy}" SET created_at = now() WHERE created_at IS NULL')
+        op.execute(f'ALTER TABLE "{legacy}" ALTER COLUMN created_at SET NOT NULL')
+        op.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        op.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, created_at)')
+        op.execute(f'CREATE TABLE "{table}_pdefault" PARTITION OF "{table}" DEFAULT')
+        
+        oldest = bind.execute(sa.text(f'SELECT MIN(created_at) FROM "{legacy}"')).scalar()
+        start = _month_start(oldest or datetime.utcnow())
+        end = _add_months(_month_start(datetime.utcnow()), 3)
+        while start < end:
+            upper = _add_months(start, 1)
+            op.execute(
+                f'CREATE TABLE "{table}_p{start.year:04d}{start.month:02d}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            start = upper
+    else:
+        op.execute(f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id)')
+        op.execute(f'ALTER TABLE "{table}" ALTER COLUMN created_at DROP NOT NULL')
+    
+    op.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+    # Последовательность id должна пережить удаление старой таблицы
+    op.execute(f'ALTER SEQUENCE IF EXISTS "{table}_id_seq" OWNED BY "{table}".id')
+    op.execute(f'DROP TABLE "{legacy}"' + (' CASCADE' if not partitioned else ''))
+    
+    for name, columns in TABLE_INDEXES[table]:
+        op.create_index(name, table, columns)
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in TABLE_INDEXES:
+        _convert(table, partitioned=True)
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in TABLE_INDEXES:
+        _convert(table, partitioned=False)
@@ -0,0 +1,32 @@
+"""Удаление неиспользуемого частичного индекса ix_memories_last_accessed_active
+
+Revision ID: 0004_drop_unused_memory_index
+Revises: 0003_partition_history_tables
+Create Date: 2026-10-19 00:00:00
+
+Ни один запрос CRUD не сортирует память по last_accessed с условием
+access_frequency > 0, поэтому индекс только замедлял запись.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_drop_unused_memory_index'
+down_revision = '0003_partition_history_tables'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_memories_last_accessed_active'
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = {index['name'] for index in inspector.get_indexes('memories')}
+    if INDEX_NAME in existing:
+        op.drop_index(INDEX_NAME, table_name='memories')
+
+def downgrade() -> None:
+    op.create_index(
+        INDEX_NAME, 'memories', ['last_accessed'],
+        postgresql_where=sa.text('access_frequency > 0'),
+        sqlite_where=sa.text('access_frequency > 0')
+    )
@@ -4,7 +4,7 @@ SQLAlchemy models for Anthropomorphic AI database schema
 
 from sqlalchemy import (
     Column, Integer, String, Float, Text, 
-    DateTime, Boolean, JSON, ForeignKey, Table, MetaData
+    DateTime, Boolean, JSON, ForeignKey, Table, MetaData, Index
 )
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
@@ -19,7 +19,9 @@ memory_tags = Table(
     'memory_tags',
     Base.metadata,
     Column('memory_id', Integer, ForeignKey('memories.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    # Первичный ключ (memory_id, tag_id) не покрывает выборку памяти по тегу
+    Index('ix_memory_tags_tag_memory', 'tag_id', 'memory_id')
 )
 
 class SystemState(Base):
@@ -34,6 +36,11 @@ class SystemState(Base):
     last_updated = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
+    __table_args__ = (
+        # CRUDSystemState.get_current
+        Index('ix_system_state_created_at', 'created_at'),
+    )
+    
     def __init__(self, **kwargs):
         if 'current_mood' not in kwargs:
             kwargs['current_mood'] = "neutral"
@@ -57,6 +64,14 @@ class Memory(Base):
     # Relationships
     tags = relationship("Tag", secondary=memory_tags, back_populates="memories")
     
+    __table_args__ = (
+        # CRUDMemory.search: фильтр по типу, сортировка по важности и времени
+        Index('ix_memories_type_importance_created', 'memory_type', 'importance', 'created_at'),
+        # CRUDMemory.search без фильтра по типу
+        Index('ix_memories_importance_created', 'importance', 'created_at'),
+        Index('ix_memories_created_at', 'created_at'),
+    )
+    
     def __init__(self, **kwargs):
         if 'memory_type' not in kwargs:
             kwargs['memory_type'] = "short_term"
@@ -83,6 +98,7 @@ class Interaction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, index=True)
+    user_id = Column(String)
     user_input = Column(Text, nullable=False)
     ai_response = Column(Text, nullable=False)
     user_emotion = Column(String)
@@ -90,6 +106,14 @@ class Interaction(Base):
     response_quality = Column(Float)
     context_data = Column(JSON)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        # CRUDInteraction.get_session_interactions
+        Index('ix_interactions_session_created', 'session_id', 'created_at'),
+        # CRUDInteraction.get_user_interactions
+        Index('ix_interactions_user_created', 'user_id', 'created_at'),
+        Index('ix_interactions_created_at', 'created_at'),
+    )
 
 class MoodHistory(Base):
     """Historical record of mood changes"""
@@ -101,6 +125,11 @@ class MoodHistory(Base):
     trigger = Column(Text)
     duration = Column(Float)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        # CRUDMoodHistory.get_current_mood / get_mood_history
+        Index('ix_mood_history_created_at', 'created_at'),
+    )
 
 class PersonalityTrait(Base):
     """Personality traits and their evolution over time"""
@@ -159,6 +188,12 @@ class SystemLog(Base):
     message = Column(Text)
     context_data = Column(JSON)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        # CRUDSystemLog.get_recent_logs с фильтром по уровню и без него
+        Index('ix_system_logs_level_created', 'level', 'created_at'),
+        Index('ix_system_logs_created_at', 'created_at'),
+    )
 
 # Helper function to get all table names
 def get_table_names():
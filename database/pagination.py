@@ -0,0 +1,95 @@
+"""
+Keyset-пагинация по (created_at, id) и потоковая выгрузка в NDJSON
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+# Размер порции строк, читаемых с серверного курсора при выгрузке
+EXPORT_CHUNK_SIZE = 1000
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Курсор на позицию после записи (created_at, id)"""
+    payload = [created_at.isoformat() if created_at else None, row_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """
+    Разбор курсора
+
+    Raises:
+        ValueError: Некорректный курсор
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
+
+def keyset_order(model, descending: bool = True) -> List[Any]:
+    """Порядок сортировки, согласованный с курсором"""
+    if descending:
+        return [model.created_at.desc(), model.id.desc()]
+    return [model.created_at.asc(), model.id.asc()]
+
+def apply_keyset(query, model, cursor: Optional[str], limit: int, descending: bool = True):
+    """
+    Ограничение запроса страницей после курсора
+
+    Условие записано как created_at <= c AND (created_at < c OR id < i), чтобы
+    граница по created_at использовала индексы (..., created_at).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if created_at is None:
+            condition = model.id < row_id if descending else model.id > row_id
+        elif descending:
+            condition = and_(
+                model.created_at <= created_at,
+                or_(model.created_at < created_at, model.id < row_id)
+            )
+        else:
+            condition = and_(
+                model.created_at >= created_at,
+                or_(model.created_at > created_at, model.id > row_id)
+            )
+        query = query.filter(condition)
+    return query.order_by(*keyset_order(model, descending)).limit(limit)
+
+def next_cursor(items: List[Any], limit: int) -> Optional[str]:
+    """Курсор следующей страницы (None, если страница неполная)"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+def row_to_dict(row) -> Dict[str, Any]:
+    """Сериализуемое представление строки модели"""
+    result = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        result[column.name] = value
+    return result
+
+def stream_ndjson(query, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Потоковая выгрузка результатов запроса в NDJSON
+
+    yield_per включает stream_results: PostgreSQL читает строки серверным
+    курсором, поэтому память не зависит от размера выгрузки.
+    """
+    lines = []
+    for row in query.yield_per(chunk_size):
+        lines.append(json.dumps(row_to_dict(row), ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
@@ -0,0 +1,256 @@
+"""
+Хранение по времени и очистка устаревших данных
+
+Таблицы interactions, mood_history и system_logs разбиваются по месяцам:
+- PostgreSQL: декларативное секционирование RANGE (created_at), секция на месяц
+  (см. миграцию 0003_partition_history_tables);
+- SQLite: закрытые месяцы переносятся из основной таблицы в отдельные
+  таблицы-шарды <table>_pYYYYMM. Шарды - только архив: CRUD, постраничные
+  списки, выгрузки и поиск привычек читают основную таблицу, поэтому на
+  SQLite доступна история последних sqlite_hot_months месяцев, а более
+  старая остается в шардах до удаления по сроку хранения.
+
+Устаревшие секции/шарды удаляются целиком (DETACH + DROP / DROP TABLE) вместо
+построчного DELETE, предварительно выгружаясь в архив JSONL (gzip).
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import MetaData, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from core.config import config_manager, RetentionConfig
+from core.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Таблицы истории, хранящиеся по месяцам
+PARTITIONED_TABLES = ("interactions", "mood_history", "system_logs")
+
+_PARTITION_RE = re.compile(r"^(?P<table>[a-z_]+)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+def month_start(moment: datetime) -> datetime:
+    """Начало месяца, в который попадает moment"""
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """Сдвиг начала месяца на months месяцев"""
+    index = moment.year * 12 + (moment.month - 1) + months
+    return moment.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+def partition_name(table: str, start: datetime) -> str:
+    """Имя месячной секции (PostgreSQL) или шарда (SQLite)"""
+    return f"{table}_p{start.year:04d}{start.month:02d}"
+
+def parse_partition_name(name: str) -> Optional[Tuple[str, datetime]]:
+    """Разбор имени секции на (таблица, начало месяца)"""
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return match.group("table"), datetime(int(match.group("year")), int(match.group("month")), 1)
+
+@dataclass
+class RetentionResult:
+    """Результат обслуживания одной таблицы"""
+    table: str
+    created: List[str] = field(default_factory=list)
+    rolled_over: List[str] = field(default_factory=list)
+    archived: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+class RetentionManager:
+    """
+    Управление месячными секциями и удаление данных старше срока хранения
+    """
+    
+    def __init__(self, engine: Engine, config_provider: Callable[[], RetentionConfig] = None):
+        self._engine = engine
+        self._config_provider = config_provider or (lambda: config_manager.retention)
+        self._lock = threading.Lock()
+    
+    @property
+    def dialect(self) -> str:
+        return self._engine.dialect.name
+    
+    def retention_seconds(self, table: str) -> Optional[int]:
+        """Срок хранения таблицы в секундах (None - хранить бессрочно)"""
+        table_config = self._config_provider().tables.get(table)
+        if table_config is None:
+            return None
+        if table_config.retention_seconds is not None:
+            return table_config.retention_seconds
+        return config_manager.memory.long_term.retention_period
+    
+    def list_partitions(self, table: str) -> List[Tuple[str, datetime]]:
+        """Месячные секции/шарды таблицы, отсортированные по времени"""
+        with self._engine.connect() as conn:
+            if self.dialect == "postgresql":
+                names = conn.execute(text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :table"
+                ), {"table": table}).scalars().all()
+            else:
+                names = inspect(conn).get_table_names()
+        partitions = []
+        for name in names:
+            parsed = parse_partition_name(name)
+            if parsed and parsed[0] == table:
+                partitions.append((name, parsed[1]))
+        return sorted(partitions, key=lambda item: item[1])
+    
+    def ensure_partitions(self, table: str, now: Optional[datetime] = None) -> RetentionResult:
+        """
+        Подготовка секций
+        
+        PostgreSQL: создание секций на текущий и partition_months_ahead следующих месяцев.
+        SQLite: перенос месяцев старше sqlite_hot_months из основной таблицы в шарды.
+        """
+        now = now or datetime.utcnow()
+        result = RetentionResult(table=table)
+        config = self._config_provider()
+        current = month_start(now)
+        
+        if self.dialect == "postgresql":
+            with self._engine.begin() as conn:
+                relkind = conn.execute(text(
+                    "SELECT relkind FROM pg_class WHERE relname = :table"
+                ), {"table": table}).scalar()
+                if relkind != "p":
+                    logger.warning(f"Таблица {table} не секционирована, примените миграции alembic")
+                    return result
+                for offset in range(config.partition_months_ahead + 1):
+                    start = add_months(current, offset)
+                    name = partition_name(table, start)
+                    conn.execute(text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+                    ))
+                    result.created.append(name)
+            return result
+        
+        hot_start = add_months(current, -(config.sqlite_hot_months - 1))
+        with self._engine.begin() as conn:
+            oldest = conn.execute(text(f'SELECT MIN(created_at) FROM "{table}"')).scalar()
+            if oldest is None:
+                return result
+            if isinstance(oldest, str):
+                oldest = datetime.fromisoformat(oldest)
+            start = month_start(oldest)
+            while start < hot_start:
+                end = add_months(start, 1)
+                name = partition_name(table, start)
+                bounds = {"start": start.isoformat(sep=" "), "end": end.isoformat(sep=" ")}
+                conn.execute(text(self._sqlite_shard_ddl(conn, table, name)))
+                # Диапазонные запросы используют индекс ix_<table>_created_at
+                moved = conn.execute(text(
+                    f'INSERT INTO "{name}" SELECT * FROM "{table}" '
+                    f"WHERE created_at >= :start AND created_at < :end"
+                ), bounds).rowcount
+                conn.execute(text(
+                    f'DELETE FROM "{table}" WHERE created_at >= :start AND created_at < :end'
+                ), bounds)
+                if moved:
+                    result.rolled_over.append(name)
+                    logger.info(f"Записи {table} за {start:%Y-%m} ({moved}) перенесены в архивный шард {name}")
+                start = end
+        return result
+    
+    @staticmethod
+    def _sqlite_shard_ddl(conn, table: str, name: str) -> str:
+        """DDL шарда с теми же типами колонок, что и у основной таблицы"""
+        ddl = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table"
+        ), {"table": table}).scalar()
+        header = re.compile(rf'^CREATE TABLE\s+"?{table}"?', re.IGNORECASE)
+        return header.sub(f'CREATE TABLE IF NOT EXISTS "{name}"', ddl.strip(), count=1)
+    
+    def expire(self, table: str, now: Optional[datetime] = None) -> RetentionResult:
+        """Архивация и удаление секций, целиком вышедших за срок хранения"""
+        now = now or datetime.utcnow()
+        result = RetentionResult(table=table)
+        retention = self.retention_seconds(table)
+        if retention is None:
+            return result
+        
+        cutoff = now - timedelta(seconds=retention)
+        table_config = self._config_provider().tables.get(table)
+        for name, start in self.list_partitions(table):
+            if add_months(start, 1) > cutoff:
+                break
+            if table_config is not None and table_config.archive:
+                result.archived.append(str(self.export_partition(table, name)))
+            with self._engine.begin() as conn:
+                if self.dialect == "postgresql":
+                    conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            result.dropped.append(name)
+            logger.info(f"Секция {name} удалена по сроку хранения")
+        return result
+    
+    def export_partition(self, table: str, name: str, chunk_size: int = 1000) -> Path:
+        """
+        Потоковая выгрузка секции в сжатый JSONL
+        
+        Файл пишется во временный и атомарно переименовывается, так что
+        незавершенная выгрузка не оставляет поврежденного архива.
+        """
+        archive_dir = Path(self._config_provider().archive_directory) / table
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        target = archive_dir / f"{name}.jsonl.gz"
+        tmp_target = target.with_suffix(".gz.tmp")
+        
+        try:
+            with self._engine.connect() as conn:
+                partition = Table(name, MetaData(), autoload_with=conn)
+                rows = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+                    select(partition)
+                )
+                with gzip.open(tmp_target, "wt", encoding="utf-8") as f:
+                    for row in rows.mappings():
+                        f.write(json.dumps(dict(row), ensure_ascii=False, default=str))
+                        f.write("\n")
+            os.replace(tmp_target, target)
+        except Exception as e:
+            tmp_target.unlink(missing_ok=True)
+            raise DatabaseError("export_partition", str(e), {"partition": name})
+        return target
+    
+    def run(self, now: Optional[datetime] = None) -> Dict[str, RetentionResult]:
+        """Полный цикл обслуживания всех таблиц истории"""
+        results = {}
+        with self._lock:
+            for table in PARTITIONED_TABLES:
+                try:
+                    result = self.ensure_partitions(table, now)
+                    expired = self.expire(table, now)
+                    result.archived = expired.archived
+                    result.dropped = expired.dropped
+                    results[table] = result
+                except Exception as e:
+                    logger.error(f"Ошибка обслуживания хранения таблицы {table}: {e}")
+        return results
+
+def register_jobs(scheduler, manager: RetentionManager) -> None:
+    """Регистрация периодического обслуживания сроков хранения в планировщике"""
+    from core.scheduler import IntervalTrigger
+    
+    def retention_job(context):
+        if config_manager.retention.enabled:
+            manager.run()
+    
+    scheduler.add_job(
+        "retention", retention_job,
+        IntervalTrigger(lambda: config_manager.retention.check_interval_seconds),
+        module="core", priority="low", start_now=True
+    )
@@ -1,7 +1,8 @@
 # database/session.py
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.config import settings
+from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,18 +40,58 @@ def get_db():
     finally:
         db.close()
 
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Последняя ревизия, схему которой полностью воспроизводит create_all;
+# последующие миграции (например, секционирование PostgreSQL) применяются поверх
+CREATE_ALL_REVISION = "0002_query_indexes"
+
 def init_db():
     """
     Инициализация базы данных - создание таблиц
     """
     try:
+        existing_tables = set(inspect(engine).get_table_names())
         # Создание всех таблиц
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
+        sync_migrations(existing_tables)
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
         raise
 
+def sync_migrations(existing_tables=None, bind=None):
+    """
+    Приведение версии схемы Alembic в соответствие с БД
+    
+    Новая БД, созданная через create_all, помечается ревизией CREATE_ALL_REVISION;
+    БД, созданная до появления миграций, помечается исходной ревизией. Затем
+    применяются все оставшиеся миграции.
+    """
+    try:
+        from alembic import command
+        from alembic.config import Config
+    except ImportError:
+        logger.warning("Alembic не установлен, миграции пропущены")
+        return
+    
+    bind = bind or engine
+    if existing_tables is None:
+        existing_tables = set(inspect(bind).get_table_names())
+    
+    alembic_cfg = Config(str(MIGRATIONS_DIR / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    alembic_cfg.attributes["configure_logger"] = False
+    
+    with bind.begin() as connection:
+        alembic_cfg.attributes["connection"] = connection
+        if "alembic_version" not in existing_tables:
+            if "memories" in existing_tables:
+                command.stamp(alembic_cfg, "0001_initial_schema")
+            else:
+                command.stamp(alembic_cfg, CREATE_ALL_REVISION)
+        command.upgrade(alembic_cfg, "head")
+    logger.info("Database schema is up to date")
+
 def close_db_connection():
     """
     Закрытие соединения с БД
@@ -0,0 +1,176 @@
+"""
+Поведенческие паттерны: извлечение из взаимодействий и потоковый подсчет частот
+"""
+
+import heapq
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.senses.input_parser import normalize, stem, tokenize
+
+NGRAM_PREFIX = "ngram:"
+INTENTS_PREFIX = "intents:"
+INTENT_SEPARATOR = ">"
+
+def ngram_patterns(text: str, sizes: Sequence[int]) -> List[str]:
+    """
+    N-граммы по основам слов сообщения
+
+    Разбор идет без общего разборщика ввода, чтобы поток истории
+    не вытеснял его кеш и словарь.
+    """
+    stems = [stem(token) for token in tokenize(normalize(text or ""))]
+    patterns = []
+    for size in sizes:
+        for start in range(len(stems) - size + 1):
+            patterns.append(NGRAM_PREFIX + " ".join(stems[start:start + size]))
+    return patterns
+
+def describe_pattern(pattern: str) -> str:
+    """Человекочитаемое описание паттерна"""
+    if pattern.startswith(NGRAM_PREFIX):
+        return f"Повторяющаяся фраза «{pattern[len(NGRAM_PREFIX):]}»"
+    if pattern.startswith(INTENTS_PREFIX):
+        intents = pattern[len(INTENTS_PREFIX):].split(INTENT_SEPARATOR)
+        return "Последовательность намерений " + " → ".join(intents)
+    return pattern
+
+class IntentSequences:
+    """
+    Последовательности намерений внутри сессий
+
+    Для каждой сессии помнятся последние length - 1 намерений, поэтому
+    последовательности продолжаются через границы пакетов; число сессий
+    ограничено, давно неактивные вытесняются.
+    """
+
+    def __init__(self, length: int = 2, max_sessions: int = 10000):
+        self.length = length
+        self.max_sessions = max_sessions
+        self._recent: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def windows(self) -> Dict[str, List[str]]:
+        """Окна намерений сессий от давно неактивных к последним (для сохранения)"""
+        return {session_id: list(window) for session_id, window in self._recent.items()}
+
+    def restore(self, windows: Mapping[str, Sequence[str]]) -> None:
+        """Восстановление окон, сохраненных windows()"""
+        keep = max(self.length - 1, 0)
+        for session_id, window in windows.items():
+            if keep and window:
+                self._recent[session_id] = tuple(window)[-keep:]
+        while len(self._recent) > self.max_sessions:
+            self._recent.popitem(last=False)
+
+    def push(self, session_id: Optional[str], intent: str) -> Optional[str]:
+        """
+        Учет намерения сессии
+
+        Returns:
+            Паттерн последовательности, если набрано length намерений
+        """
+        if self.length < 2 or not session_id:
+            return None
+        window = self._recent.pop(session_id, ()) + (intent,)
+        pattern = None
+        if len(window) >= self.length:
+            window = window[-self.length:]
+            pattern = INTENTS_PREFIX + INTENT_SEPARATOR.join(window)
+        self._recent[session_id] = window[-(self.length - 1):]
+        if len(self._recent) > self.max_sessions:
+            self._recent.popitem(last=False)
+        return pattern
+
+class CountMinSketch:
+    """
+    Count-min sketch: приближенные частоты с ошибкой только в большую сторону
+
+    Индексы строк считаются мультипликативным хешированием встроенного hash(),
+    поэтому таблица имеет смысл только внутри процесса. Пакет ключей
+    обрабатывается векторно.
+    """
+
+    def __init__(self, width: int = 65536, depth: int = 4, seed: int = 0):
+        if width & (width - 1):
+            raise ValueError(f"Ширина count-min sketch должна быть степенью двойки: {width}")
+        self.width = width
+        self.depth = depth
+        self._shift = np.uint64(64 - max(width.bit_length() - 1, 1))
+        rng = np.random.default_rng(seed)
+        self._multipliers = (rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _indexes(self, keys: Sequence[str]) -> np.ndarray:
+        hashes = np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys)).view(np.uint64)
+        with np.errstate(over="ignore"):
+            return ((hashes[None, :] * self._multipliers[:, None]) >> self._shift).astype(np.intp) & (self.width - 1)
+
+    def add_many(self, keys: Sequence[str], counts: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Учет пакета ключей (повторы учитываются)
+
+        Args:
+            counts: Вес каждого ключа (по умолчанию 1)
+
+        Returns:
+            Оценки частот ключей после учета пакета
+        """
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        indexes = self._indexes(keys)
+        rows = np.arange(self.depth)[:, None]
+        weights = 1 if counts is None else np.broadcast_to(np.asarray(counts, dtype=np.int64), indexes.shape)
+        np.add.at(self.table, (np.broadcast_to(rows, indexes.shape), indexes), weights)
+        self.total += len(keys) if counts is None else int(np.sum(counts))
+        return self.table[rows, indexes].min(axis=0)
+
+    def estimate(self, keys: Sequence[str]) -> np.ndarray:
+        """Оценки частот ключей"""
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        return self.table[np.arange(self.depth)[:, None], self._indexes(keys)].min(axis=0)
+
+class HeavyHitters:
+    """
+    Ограниченный набор самых частых ключей по оценкам count-min sketch
+
+    Хранится не более 2 * k кандидатов; при переполнении остаются k лучших.
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self._counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._counts
+
+    def threshold(self) -> int:
+        """Оценка, ниже которой новый ключ не попадает в кандидаты"""
+        if len(self._counts) < self.k:
+            return 0
+        return heapq.nsmallest(1, heapq.nlargest(self.k, self._counts.values()))[0]
+
+    def offer_many(self, keys: Iterable[str], estimates: Iterable[int]) -> None:
+        counts = self._counts
+        floor = self.threshold()
+        for key, estimate in zip(keys, estimates):
+            if estimate > floor or key in counts:
+                counts[key] = int(estimate)
+        if len(counts) > 2 * self.k:
+            self._counts = dict(heapq.nlargest(self.k, counts.items(), key=lambda item: item[1]))
+
+    def pop(self, key: str) -> None:
+        self._counts.pop(key, None)
+
+    def items(self) -> List[Tuple[str, int]]:
+        """Кандидаты по убыванию оценки"""
+        return sorted(self._counts.items(), key=lambda item: -item[1])
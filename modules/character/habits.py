@@ -0,0 +1,228 @@
+"""
+Привычки характера: инкрементальный поиск повторяющихся паттернов в истории взаимодействий
+"""
+
+import copy
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from core.config import config_manager
+from database import crud
+from modules.character.behavioral_patterns import (
+    CountMinSketch, HeavyHitters, IntentSequences, describe_pattern, ngram_patterns
+)
+
+logger = logging.getLogger(__name__)
+
+# Ключ system_parameters с id последнего обработанного взаимодействия
+WATERMARK_PARAMETER = "habit_mining_watermark"
+# Ключ system_parameters с оценками частот кандидатов, еще не ставших привычками
+CANDIDATES_PARAMETER = "habit_mining_candidates"
+# Ключ system_parameters с последними намерениями сессий (окна последовательностей)
+SESSIONS_PARAMETER = "habit_mining_sessions"
+
+@dataclass
+class HabitMiningReport:
+    """Отчет о проходе поиска привычек"""
+    processed: int = 0
+    watermark: int = 0
+    patterns: int = 0
+    habits_updated: int = 0
+    habits_created: int = 0
+    candidates: int = 0
+    complete: bool = True
+    duration_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class HabitMiner:
+    """
+    Поиск привычек в таблице interactions
+
+    Взаимодействия читаются пакетами по id начиная с сохраненного watermark,
+    поэтому каждый проход обрабатывает только новые записи. Паттерны -
+    n-граммы по основам слов сообщений и последовательности намерений
+    внутри сессии. Частоты уже известных привычек считаются точно, частоты
+    остальных паттернов - count-min sketch с ограниченным набором самых
+    частых кандидатов; кандидат, набравший min_support, становится
+    привычкой. Оценки top_k кандидатов и окна намерений сессий сохраняются
+    вместе с приростом частот и новым watermark одной транзакцией и после
+    перезапуска возвращаются в sketch и IntentSequences: кандидаты не теряют
+    накопленный счет, а последовательности намерений продолжаются через
+    watermark. Счет паттернов вне набора кандидатов (остальная часть sketch)
+    не сохраняется и после перезапуска начинается заново. Если транзакция не удалась, sketch и кандидаты возвращаются к состоянию
+    до прохода, и повторный проход не учитывает те же взаимодействия дважды.
+    """
+
+    def __init__(self, config_provider: Optional[Callable] = None):
+        self._config_provider = config_provider or (lambda: config_manager.character.habits)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset(self.config)
+        if config_provider is None:
+            config_manager.subscribe("character", self._on_config_change)
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    def _reset(self, config):
+        self.sketch = CountMinSketch(config.sketch_width, config.sketch_depth)
+        self.candidates = HeavyHitters(config.top_k)
+        self.sequences = IntentSequences(config.intent_sequence_length, config.max_tracked_sessions)
+
+    def _on_config_change(self, new_config, old_config):
+        """Новые параметры sketch применяются со сбросом накопленных кандидатов"""
+        if old_config is None or new_config.habits != old_config.habits:
+            with self._lock:
+                self._reset(new_config.habits)
+
+    def strength(self, frequency: int) -> float:
+        """Сила привычки по частоте: 1 - exp(-frequency / strength_scale)"""
+        return round(1.0 - math.exp(-frequency / max(self.config.strength_scale, 1e-6)), 4)
+
+    def extract(self, row) -> List[str]:
+        """Паттерны одного взаимодействия (id, session_id, user_input, context_data, created_at)"""
+        _, session_id, user_input, context_data, _ = row
+        patterns = ngram_patterns(user_input, self.config.ngram_sizes)
+        # Намерение сохраняется оркестратором; у старых записей его нет
+        intent = context_data.get("intent") if isinstance(context_data, dict) else None
+        if intent:
+            sequence = self.sequences.push(session_id, intent)
+            if sequence:
+                patterns.append(sequence)
+        return patterns
+
+    def run(self, db: Session, context=None, max_rows: Optional[int] = None) -> HabitMiningReport:
+        """
+        Проход поиска привычек по новым взаимодействиям
+
+        Args:
+            db: Сессия БД
+            context: JobContext задачи планировщика; при исчерпании бюджета или
+                отмене проход останавливается после текущего пакета
+            max_rows: Ограничение числа взаимодействий за проход
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_candidates(db)
+            state = copy.deepcopy((self.sketch, self.candidates, self.sequences))
+            try:
+                return self._run(db, context, max_rows)
+            except Exception:
+                self.sketch, self.candidates, self.sequences = state
+                raise
+
+    def _load_candidates(self, db: Session) -> None:
+        """Возврат сохраненных оценок кандидатов в sketch и окон намерений сессий после перезапуска"""
+        saved = crud.crud_system_state.get_parameter(db, CANDIDATES_PARAMETER, {}) or {}
+        if saved:
+            patterns = list(saved)
+            self.candidates.offer_many(patterns, self.sketch.add_many(patterns, [int(saved[p]) for p in patterns]))
+            logger.info(f"Кандидаты в привычки восстановлены: {len(patterns)}")
+        self.sequences.restore(crud.crud_system_state.get_parameter(db, SESSIONS_PARAMETER, {}) or {})
+        self._loaded = True
+
+    def _run(self, db: Session, context, max_rows: Optional[int]) -> HabitMiningReport:
+        started = time.perf_counter()
+        config = self.config
+        watermark = int(crud.crud_system_state.get_parameter(db, WATERMARK_PARAMETER, 0) or 0)
+        report = HabitMiningReport(watermark=watermark)
+        known = crud.crud_character_habit.get_frequencies(db)
+        exact: Counter = Counter()
+        last_expressed: Dict[str, datetime] = {}
+
+        while max_rows is None or report.processed < max_rows:
+            limit = config.chunk_size if max_rows is None else min(config.chunk_size, max_rows - report.processed)
+            rows = crud.crud_interaction.get_chunk_after(db, report.watermark, limit)
+            if not rows:
+                break
+            fresh: List[str] = []
+            fresh_times: List[Optional[datetime]] = []
+            for row in rows:
+                created_at = row[4]
+                for pattern in self.extract(row):
+                    if pattern in known:
+                        exact[pattern] += 1
+                        if created_at is not None:
+                            last_expressed[pattern] = created_at
+                    else:
+                        fresh.append(pattern)
+                        fresh_times.append(created_at)
+            self.candidates.offer_many(fresh, self.sketch.add_many(fresh))
+            # Время проявления помнится только для кандидатов, а не для всех паттернов
+            for pattern, created_at in zip(fresh, fresh_times):
+                if created_at is not None and pattern in self.candidates:
+                    last_expressed[pattern] = created_at
+            report.patterns += len(fresh)
+            report.processed += len(rows)
+            report.watermark = rows[-1][0]
+            if len(rows) < limit:
+                break
+            if context is not None and context.should_stop():
+                report.complete = False
+                break
+        report.patterns += sum(exact.values())
+
+        promoted = {
+            pattern: estimate for pattern, estimate in self.candidates.items()
+            if estimate >= config.min_support
+        }
+        counts = dict(exact)
+        counts.update(promoted)
+        report.habits_updated = len(exact)
+        report.habits_created = len(promoted)
+        if report.processed:
+            crud.crud_character_habit.upsert_counts(
+                db, counts,
+                {pattern: last_expressed[pattern] for pattern in counts if pattern in last_expressed},
+                self.strength,
+                {pattern: describe_pattern(pattern) for pattern in promoted},
+                commit=False,
+            )
+            # Новые привычки дальше считаются точно
+            for pattern in promoted:
+                self.candidates.pop(pattern)
+            crud.crud_system_state.set_parameter(db, WATERMARK_PARAMETER, report.watermark, commit=False)
+            crud.crud_system_state.set_parameter(db, CANDIDATES_PARAMETER, dict(self.candidates.items()), commit=False)
+            crud.crud_system_state.set_parameter(db, SESSIONS_PARAMETER, self.sequences.windows(), commit=False)
+            db.commit()
+        report.candidates = len(self.candidates)
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        if report.processed:
+            logger.info(
+                f"Поиск привычек: обработано {report.processed} взаимодействий, "
+                f"обновлено {report.habits_updated}, новых {report.habits_created}"
+            )
+        return report
+
+# Глобальный поиск привычек
+habit_miner = HabitMiner()
+
+def habit_mining_job(context) -> HabitMiningReport:
+    """Плановый проход поиска привычек (задача планировщика)"""
+    from database.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return habit_miner.run(db, context)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def register_jobs(scheduler) -> None:
+    """Регистрация задач характера в планировщике"""
+    from core.scheduler import IntervalTrigger
+
+    scheduler.add_job("habit_mining", habit_mining_job, IntervalTrigger(3600), module="character", priority="low")
@@ -0,0 +1,296 @@
+"""
+Моральный компас: проверка сообщений и вариантов ответа по правилам ценностей
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from core.config import MoralCompassConfig, MoralRuleConfig, config_manager
+from core.exceptions import ModuleExecutionError
+from core.metrics import Histogram
+from modules.senses.input_parser import normalize, stem, tokenize
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("input", "response")
+ACTIONS = ("block", "flag")
+# Границы гистограмм времени проверки, мс
+CHECK_BUCKETS_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10)
+
+@dataclass(frozen=True)
+class Violation:
+    """Сработавшее правило"""
+    rule: str
+    value: str
+    action: str
+
+@dataclass(frozen=True)
+class MoralVerdict:
+    """Вердикт по тексту: allowed - нет блокирующих нарушений, value - самая важная нарушенная ценность"""
+    allowed: bool = True
+    violations: Tuple[Violation, ...] = ()
+    value: Optional[str] = None
+
+    @property
+    def rules(self) -> List[str]:
+        return [violation.rule for violation in self.violations]
+
+ALLOWED = MoralVerdict()
+
+def _stems(text: str) -> List[str]:
+    """Основы слов текста, как в ParsedInput.stems"""
+    return [stem(token) for token in tokenize(normalize(text or ""))]
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Правила одной области проверки, скомпилированные для проверки за один проход
+
+    Фразы хранятся в словаре по кортежу основ: проход по основам текста
+    проверяет n-граммы до длины самой длинной фразы. Регулярные выражения
+    объединены в одно с именованной группой на правило; совпадения ищутся
+    одним finditer без перекрытия, поэтому правило, совпавшее только на
+    участке текста, уже занятом другим выражением, не отмечается.
+    """
+    violations: Tuple[Violation, ...]
+    terms: Mapping[Tuple[str, ...], Tuple[int, ...]]
+    max_term_length: int
+    pattern: Optional["re.Pattern"]
+    groups: Mapping[str, int]
+
+    def match(self, text: str, timings: Mapping[str, Histogram]) -> List[int]:
+        """Номера сработавших правил"""
+        matched = set()
+        started = time.perf_counter()
+        if self.terms:
+            terms = self.terms
+            stems = _stems(text)
+            for start in range(len(stems)):
+                for end in range(start + 1, min(start + self.max_term_length, len(stems)) + 1):
+                    rules = terms.get(tuple(stems[start:end]))
+                    if rules:
+                        matched.update(rules)
+        checked = time.perf_counter()
+        if self.terms:
+            timings["terms"].observe((checked - started) * 1000)
+        if self.pattern is not None:
+            groups = self.groups
+            for found in self.pattern.finditer(text or ""):
+                matched.add(groups[found.lastgroup])
+            timings["patterns"].observe((time.perf_counter() - checked) * 1000)
+        return sorted(matched)
+
+def compile_rules(rules: Sequence[MoralRuleConfig], scope: str) -> RuleSet:
+    """
+    Компиляция правил области scope (правила с scope "any" входят во все области)
+
+    Raises:
+        ValueError: Неизвестное действие или область, некорректное выражение
+    """
+    violations = []
+    terms: Dict[Tuple[str, ...], List[int]] = {}
+    patterns = []
+    groups = {}
+    for rule in rules:
+        if rule.action not in ACTIONS:
+            raise ValueError(f"Правило {rule.name}: неизвестное действие {rule.action}")
+        if rule.scope not in SCOPES + ("any",):
+            raise ValueError(f"Правило {rule.name}: неизвестная область {rule.scope}")
+        if rule.scope not in (scope, "any"):
+            continue
+        index = len(violations)
+        violations.append(Violation(rule.name, rule.value, rule.action))
+        for term in rule.terms:
+            key = tuple(_stems(term))
+            if key:
+                terms.setdefault(key, []).append(index)
+        for pattern in rule.patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Правило {rule.name}: некорректное выражение {pattern!r}: {e}")
+            group = f"r{len(groups)}"
+            groups[group] = index
+            patterns.append(f"(?P<{group}>{pattern})")
+    try:
+        pattern = re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+    except re.error as e:
+        raise ValueError(f"Выражения правил несовместимы: {e}")
+    return RuleSet(
+        violations=tuple(violations),
+        terms={key: tuple(indexes) for key, indexes in terms.items()},
+        max_term_length=max((len(key) for key in terms), default=0),
+        pattern=pattern,
+        groups=groups,
+    )
+
+class MoralCompass:
+    """
+    Фильтр ограничений ценностей
+
+    Сообщение пользователя и варианты ответа проверяются правилами
+    character.moral_compass своей области, скомпилированными в RuleSet.
+    Вердикты запоминаются в LRU по хешу текста (cache_size записей) и
+    сбрасываются при перекомпиляции правил. check_async проверяет текст в
+    пуле потоков, поэтому проверка сообщения идет параллельно с генерацией
+    ответа. Для каждого правила считаются срабатывания, для областей и
+    этапов (фразы, выражения) - гистограммы времени проверки.
+    """
+
+    def __init__(self, config_provider: Optional[Callable] = None):
+        self._config_provider = config_provider or (lambda: config_manager.character.moral_compass)
+        self._lock = threading.Lock()
+        self._rule_sets: Dict[str, RuleSet] = {}
+        self._cache: "OrderedDict[Tuple[str, bytes], MoralVerdict]" = OrderedDict()
+        self.version = 0
+        self.rule_hits: Counter = Counter()
+        self.checks = 0
+        self.cache_hits = 0
+        self.blocked = 0
+        self.check_ms = {scope: Histogram(CHECK_BUCKETS_MS) for scope in SCOPES}
+        self.stage_ms = {stage: Histogram(CHECK_BUCKETS_MS) for stage in ("terms", "patterns")}
+        self.reload()
+        if config_provider is None:
+            config_manager.subscribe("character", self._on_config_change)
+
+    @property
+    def config(self) -> MoralCompassConfig:
+        return self._config_provider()
+
+    def _on_config_change(self, new_config, old_config):
+        if old_config is None or new_config.moral_compass != old_config.moral_compass:
+            self.reload()
+
+    def reload(self) -> bool:
+        """
+        Перекомпиляция правил
+
+        Returns:
+            True, если правила перекомпилированы
+        """
+        rules = self.config.rules
+        try:
+            rule_sets = {scope: compile_rules(rules, scope) for scope in SCOPES}
+        except ValueError as e:
+            if not self._rule_sets:
+                raise ModuleExecutionError("character", "compile_moral_rules", str(e))
+            logger.error(f"Ошибка компиляции правил морального компаса, используется прежняя версия: {e}")
+            return False
+        with self._lock:
+            self._rule_sets = rule_sets
+            self._cache.clear()
+            self.version += 1
+        logger.info(f"Правила морального компаса скомпилированы: {len(rules)}, версия {self.version}")
+        return True
+
+    def _key(self, text: str, scope: str) -> Tuple[str, bytes]:
+        return scope, hashlib.blake2b((text or "").encode(), digest_size=16).digest()
+
+    def _cached(self, key: Tuple[str, bytes]) -> Optional[MoralVerdict]:
+        with self._lock:
+            verdict = self._cache.get(key)
+            if verdict is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                self.checks += 1
+                self.rule_hits.update(verdict.rules)
+                if not verdict.allowed:
+                    self.blocked += 1
+            return verdict
+
+    def check(self, text: str, scope: str = "response") -> MoralVerdict:
+        """Вердикт по тексту в области scope (input или response)"""
+        config = self.config
+        if not config.enabled:
+            return ALLOWED
+        if scope not in SCOPES:
+            raise ModuleExecutionError("character", "moral_check", f"неизвестная область {scope}")
+        key = self._key(text, scope)
+        verdict = self._cached(key)
+        if verdict is not None:
+            return verdict
+
+        started = time.perf_counter()
+        with self._lock:
+            rule_sets, version = self._rule_sets, self.version
+        rule_set = rule_sets[scope]
+        violations = tuple(rule_set.violations[index] for index in rule_set.match(text, self.stage_ms))
+        verdict = self._verdict(violations, config.values)
+        self.check_ms[scope].observe((time.perf_counter() - started) * 1000)
+
+        with self._lock:
+            self.checks += 1
+            self.rule_hits.update(verdict.rules)
+            if not verdict.allowed:
+                self.blocked += 1
+            # Вердикт по правилам, замененным во время проверки, не запоминается
+            if version == self.version and config.cache_size > 0:
+                self._cache[key] = verdict
+                while len(self._cache) > config.cache_size:
+                    self._cache.popitem(last=False)
+        return verdict
+
+    @staticmethod
+    def _verdict(violations: Tuple[Violation, ...], values: Mapping[str, int]) -> MoralVerdict:
+        if not violations:
+            return ALLOWED
+        violations = tuple(sorted(violations, key=lambda violation: -values.get(violation.value, 0)))
+        return MoralVerdict(
+            allowed=all(violation.action != "block" for violation in violations),
+            violations=violations,
+            value=violations[0].value,
+        )
+
+    async def check_async(self, text: str, scope: str = "response") -> MoralVerdict:
+        """Вердикт без блокировки цикла событий: запомненный сразу, иначе проверка в пуле потоков"""
+        if not self.config.enabled:
+            return ALLOWED
+        verdict = self._cached(self._key(text, scope)) if scope in SCOPES else None
+        if verdict is not None:
+            return verdict
+        return await asyncio.get_running_loop().run_in_executor(None, self.check, text, scope)
+
+    def filter(self, candidates: Sequence[str], scope: str = "response") -> Tuple[Optional[str], List[MoralVerdict]]:
+        """
+        Первый допустимый вариант ответа
+
+        Returns:
+            (вариант или None, если все отклонены; вердикты проверенных вариантов)
+        """
+        verdicts = []
+        for candidate in candidates:
+            verdict = self.check(candidate, scope)
+            verdicts.append(verdict)
+            if verdict.allowed:
+                return candidate, verdicts
+        return None, verdicts
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rule_sets = self._rule_sets
+            rules = {
+                violation.rule: {"value": violation.value, "action": violation.action}
+                for rule_set in rule_sets.values() for violation in rule_set.violations
+            }
+            for name, rule in rules.items():
+                rule["hits"] = self.rule_hits.get(name, 0)
+            return {
+                "version": self.version,
+                "checks": self.checks,
+                "cache_hits": self.cache_hits,
+                "cache_size": len(self._cache),
+                "blocked": self.blocked,
+                "rules": rules,
+                "check_ms": {scope: histogram.snapshot() for scope, histogram in self.check_ms.items()},
+                "stage_ms": {stage: histogram.snapshot() for stage, histogram in self.stage_ms.items()},
+            }
+
+# Глобальный моральный компас
+moral_compass = MoralCompass()
@@ -0,0 +1,236 @@
+"""
+Стиль общения: предкомпилированные шаблоны ответов с вариантами по настроению и личности
+"""
+
+import bisect
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from core.config import config_manager
+from core.exceptions import ModuleExecutionError
+
+logger = logging.getLogger(__name__)
+
+# Корзины значения черты личности
+BUCKETS = ("low", "mid", "high")
+# Вариант шаблона, подходящий для любого настроения или корзины
+ANY = "*"
+# Намерение для сообщений без детерминированного ответа
+FALLBACK_INTENT = "fallback"
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Шаблон, разобранный в функцию подстановки"""
+    source: str
+    fields: Tuple[str, ...]
+    render: Callable[[Mapping[str, Any]], str]
+
+def compile_template(text: str) -> CompiledTemplate:
+    """
+    Компиляция шаблона вида 'Вы сказали: {message}' в функцию подстановки
+
+    Поддерживаются только именованные поля без спецификаторов формата.
+
+    Raises:
+        ValueError: Шаблон содержит позиционные поля или спецификаторы формата
+    """
+    literals: List[str] = []
+    names: List[str] = []
+    for literal, name, spec, conversion in Formatter().parse(text):
+        if name is None:
+            literals.append(literal)
+            continue
+        if not name or name.isdigit() or spec or conversion:
+            raise ValueError(f"Недопустимое поле шаблона {{{name}}} в '{text}'")
+        literals.append(literal)
+        names.append(name)
+    if len(literals) == len(names):
+        literals.append("")
+
+    if not names:
+        constant = literals[0]
+        render = lambda values: constant
+    elif len(names) == 1:
+        head, name, tail = literals[0], names[0], literals[1]
+        render = lambda values: f"{head}{values[name]}{tail}"
+    else:
+        pairs = tuple(zip(names, literals[1:]))
+        first = literals[0]
+
+        def render(values):
+            parts = [first]
+            for name, literal in pairs:
+                parts.append(str(values[name]))
+                parts.append(literal)
+            return "".join(parts)
+
+    return CompiledTemplate(text, tuple(names), render)
+
+@dataclass(frozen=True)
+class TemplateTable:
+    """Скомпилированная таблица шаблонов одной версии"""
+    version: int
+    source_version: Any
+    stamp: Tuple[int, int]
+    table: Mapping[Tuple[str, str, str], CompiledTemplate]
+    intents: Tuple[str, ...]
+
+def build_table(variants: List[Dict[str, str]], moods: Tuple[str, ...]) -> Dict[Tuple[str, str, str], CompiledTemplate]:
+    """
+    Таблица (намерение, настроение, корзина) -> шаблон
+
+    Запасные варианты разрешаются при построении: для каждого ключа берется
+    самый специфичный шаблон (настроение и корзина, затем настроение, затем
+    корзина, затем общий), поэтому выбор при ответе - один поиск в словаре.
+    """
+    specific: Dict[Tuple[str, str, str], CompiledTemplate] = {}
+    for variant in variants:
+        key = (variant["intent"], variant.get("mood", ANY), variant.get("bucket", ANY))
+        if key[2] not in BUCKETS + (ANY,):
+            raise ValueError(f"Неизвестная корзина {key[2]} у шаблона {key[0]}")
+        specific[key] = compile_template(variant["text"])
+
+    intents = {intent for intent, _, _ in specific}
+    all_moods = set(moods) | {mood for _, mood, _ in specific} | {ANY}
+    table = {}
+    for intent in intents:
+        for mood in all_moods:
+            for bucket in BUCKETS:
+                for candidate in ((intent, mood, bucket), (intent, mood, ANY), (intent, ANY, bucket), (intent, ANY, ANY)):
+                    template = specific.get(candidate)
+                    if template is not None:
+                        table[(intent, mood, bucket)] = template
+                        break
+    return table
+
+class StyleEngine:
+    """
+    Движок стиля общения
+
+    Шаблоны из communication.style.templates_path компилируются один раз;
+    таблица перекомпилируется только при изменении файла или конфигурации
+    (version растет с каждой компиляцией и входит в ключи кеша ответов).
+    Таблица подменяется атомарно, поэтому выбор и отрисовка идут без блокировок.
+    Изменение файла проверяется при выборе шаблона и чтении version не чаще
+    раза в reload_check_seconds.
+    """
+
+    def __init__(self, config_provider: Callable = None):
+        self._config_provider = config_provider or (lambda: config_manager.communication.style)
+        self._lock = threading.Lock()
+        self._templates: Optional[TemplateTable] = None
+        self._compilations = 0
+        self._checked_at = time.monotonic()
+        self.reload()
+        config_manager.subscribe("communication", self._on_config_change)
+        config_manager.subscribe("mood", self._on_config_change)
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    @property
+    def version(self) -> int:
+        self._check_file()
+        return self._templates.version
+
+    @property
+    def intents(self) -> Tuple[str, ...]:
+        return self._templates.intents
+
+    def _on_config_change(self, new_config, old_config):
+        self.reload(force=True)
+
+    def _check_file(self) -> None:
+        """Перекомпиляция, если файл шаблонов изменился с последней проверки"""
+        now = time.monotonic()
+        if now - self._checked_at < self.config.reload_check_seconds:
+            return
+        self._checked_at = now
+        self.reload()
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Перекомпиляция шаблонов при изменении файла
+
+        Returns:
+            True, если таблица перекомпилирована
+        """
+        path = Path(self.config.templates_path)
+        with self._lock:
+            try:
+                stat = path.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                if self._templates is None:
+                    raise ModuleExecutionError("communication", "load_templates", f"{path}: {e}")
+                logger.error(f"Файл шаблонов недоступен, используется прежняя версия: {e}")
+                return False
+            if not force and self._templates is not None and self._templates.stamp == stamp:
+                return False
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                table = build_table(data.get("templates", []), tuple(config_manager.mood.base_states))
+            except (ValueError, KeyError) as e:
+                if self._templates is None:
+                    raise ModuleExecutionError("communication", "compile_templates", str(e))
+                logger.error(f"Ошибка компиляции шаблонов, используется прежняя версия: {e}")
+                return False
+            self._compilations += 1
+            self._templates = TemplateTable(
+                version=self._compilations,
+                source_version=data.get("version"),
+                stamp=stamp,
+                table=table,
+                intents=tuple(sorted({intent for intent, _, _ in table})),
+            )
+            logger.info(f"Шаблоны ответов скомпилированы: {len(table)} вариантов, версия {self._compilations}")
+            return True
+
+    def trait_value(self, traits) -> float:
+        """Значение черты style.trait из снимка черт личности"""
+        return traits.get(self.config.trait)
+
+    def bucket(self, trait_value: float) -> str:
+        """Корзина значения черты личности"""
+        index = bisect.bisect_right(self.config.bucket_edges, trait_value)
+        return BUCKETS[min(index, len(BUCKETS) - 1)]
+
+    def select(self, intent: str, mood: str = "neutral", trait_value: float = 0.5,
+               bucket: Optional[str] = None) -> CompiledTemplate:
+        """Вариант шаблона для намерения, настроения и значения черты (или явно заданной корзины)"""
+        self._check_file()
+        table = self._templates.table
+        bucket = bucket or self.bucket(trait_value)
+        template = table.get((intent, mood, bucket)) or table.get((intent, ANY, bucket))
+        if template is None:
+            raise ModuleExecutionError("communication", "select_template", f"нет шаблона для намерения {intent}")
+        return template
+
+    def render(self, intent: str, mood: str = "neutral", trait_value: float = 0.5,
+               bucket: Optional[str] = None, **values) -> str:
+        """Текст ответа по шаблону"""
+        template = self.select(intent, mood, trait_value, bucket)
+        try:
+            return template.render(values)
+        except KeyError as e:
+            raise ModuleExecutionError("communication", "render_template", f"не задано поле {e} шаблона {intent}")
+
+    def stats(self) -> Dict[str, Any]:
+        templates = self._templates
+        return {
+            "version": templates.version,
+            "source_version": templates.source_version,
+            "variants": len(templates.table),
+            "intents": list(templates.intents),
+        }
+
+# Глобальный движок стиля общения
+style_engine = StyleEngine()
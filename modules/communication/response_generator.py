@@ -0,0 +1,630 @@
+"""
+Генератор ответов: микропакетная обработка запросов к модели
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from core.config import config_manager
+from core.exceptions import ModuleExecutionError
+from core.load import load_tracker
+from core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    """Запрос на генерацию ответа"""
+    message: str
+    context: str = ""
+    max_new_tokens: int = 64
+    session_id: Optional[str] = None
+
+class GenerationBackend:
+    """Базовый класс бэкенда генерации: один пакетный проход на список запросов"""
+
+    name = "base"
+    # Учитывает ли бэкенд session_id (KV-кеш диалога)
+    supports_sessions = False
+
+    def on_worker_start(self) -> None:
+        """Настройка рабочего потока перед первым пакетом (потоки, привязка к ядрам)"""
+
+    def generate_batch(self, requests: List[GenerationRequest]) -> List[str]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Освобождение ресурсов модели"""
+
+class StubBackend(GenerationBackend):
+    """Заглушка без модели: детерминированный ответ-эхо"""
+
+    name = "stub"
+
+    def generate_batch(self, requests: List[GenerationRequest]) -> List[str]:
+        from modules.communication.communication_style import FALLBACK_INTENT, style_engine
+
+        template = style_engine.select(FALLBACK_INTENT)
+        return [template.render({"message": request.message}) for request in requests]
+
+# Модели, загруженные в этом процессе: (имя, квантизация) -> (токенизатор, модель)
+_MODEL_CACHE: Dict[Tuple[str, bool], Tuple[Any, Any]] = {}
+_MODEL_LOCK = threading.Lock()
+
+def configure_torch_threads(intra_op: int, inter_op: int) -> None:
+    """Число потоков torch; 0 оставляет значение по умолчанию"""
+    import torch
+
+    if intra_op > 0:
+        torch.set_num_threads(intra_op)
+    if inter_op > 0:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # Можно задать только до первого параллельного вычисления
+            logger.warning("Число inter-op потоков torch уже зафиксировано")
+
+def _weights_path(cache_dir: str, model_name: str) -> Path:
+    digest = hashlib.sha1(model_name.encode()).hexdigest()[:12]
+    return Path(cache_dir) / f"{Path(model_name).name}-{digest}.pt"
+
+@contextmanager
+def _parameters_on_meta():
+    """
+    Создание параметров модулей на meta-устройстве
+
+    Буферы остаются на CPU: непостоянные буферы (inv_freq rotary, маски
+    внимания) не входят в state_dict и вычисляются только при создании модели.
+    """
+    import torch
+
+    register_parameter = torch.nn.Module.register_parameter
+
+    def register_on_meta(module, name, param):
+        register_parameter(module, name, param)
+        if param is not None:
+            param = module._parameters[name]
+            module._parameters[name] = type(param)(param.to("meta"), requires_grad=param.requires_grad)
+
+    torch.nn.Module.register_parameter = register_on_meta
+    try:
+        yield
+    finally:
+        torch.nn.Module.register_parameter = register_parameter
+
+def _load_mmap_model(model_name: str, cache_dir: str):
+    """
+    Загрузка весов через mmap
+
+    При первом запуске веса сохраняются в cache_dir отдельным файлом; далее
+    модель создается с параметрами на meta-устройстве и получает тензоры,
+    отображенные из файла (torch.load(mmap=True) + load_state_dict(assign=True)).
+    Страницы весов живут в page cache и разделяются всеми воркерами uvicorn.
+
+    Raises:
+        ModuleExecutionError: В файле весов нет части параметров модели
+    """
+    import torch
+    from transformers import AutoConfig, AutoModelForCausalLM
+
+    path = _weights_path(cache_dir, model_name)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        torch.save(model.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+        del model
+
+    with _parameters_on_meta():
+        model = AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(model_name))
+    state = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    try:
+        model.load_state_dict(state, assign=True, strict=True)
+    except RuntimeError as e:
+        raise ModuleExecutionError("communication", "load_model", f"веса {path} не подходят к модели: {e}")
+    model.tie_weights()
+    on_meta = [name for name, tensor in (*model.named_parameters(), *model.named_buffers()) if tensor.is_meta]
+    if on_meta:
+        raise ModuleExecutionError("communication", "load_model", f"не загружены тензоры модели: {on_meta[:5]}")
+    return model
+
+def load_model(config) -> Tuple[Any, Any]:
+    """
+    Токенизатор и модель для CPU (один раз на процесс)
+
+    С quantize=True линейные слои переводятся в динамический int8: упакованные
+    int8 веса не отображаются из файла, поэтому каждый воркер держит свою копию,
+    но вчетверо меньшую. Без квантизации веса разделяются через mmap.
+    """
+    key = (config.model_name, config.quantize)
+    with _MODEL_LOCK:
+        if key in _MODEL_CACHE:
+            return _MODEL_CACHE[key]
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError as e:
+            raise ModuleExecutionError("communication", "load_model", f"нужны torch и transformers: {e}")
+
+        tokenizer = AutoTokenizer.from_pretrained(config.model_name)
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        if config.quantize:
+            model = AutoModelForCausalLM.from_pretrained(config.model_name, torch_dtype=torch.float32)
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            model = _load_mmap_model(config.model_name, config.weights_cache_dir)
+        model.eval()
+        _MODEL_CACHE[key] = (tokenizer, model)
+        logger.info(f"Модель {config.model_name} загружена (int8: {config.quantize})")
+        return tokenizer, model
+
+class SessionKVCache:
+    """
+    KV-кеш диалогов последних сессий (LRU): токены, past_key_values и строки
+    контекста, уже переданные модели в этих токенах
+    """
+
+    def __init__(self, max_sessions: int = 64):
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, Tuple[Any, Any, FrozenSet[str]]]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[Tuple[Any, Any, FrozenSet[str]]]:
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._entries.move_to_end(session_id)
+        return entry
+
+    def put(self, session_id: str, token_ids, past_key_values, context_lines: FrozenSet[str] = frozenset()) -> None:
+        self._entries[session_id] = (token_ids, past_key_values, context_lines)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+    def drop(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def _context_lines(context: str) -> FrozenSet[str]:
+    return frozenset(line for line in context.splitlines() if line.strip())
+
+class TransformersBackend(GenerationBackend):
+    """
+    Локальная causal LM на CPU
+
+    Прогон под torch.inference_mode, настроенное число потоков и привязка
+    рабочего потока к ядрам cpu_affinity. Реплики сессий с KV-кешем
+    продолжают диалог без повторного прогона истории: в реплику добавляются
+    только строки контекста, которых модель еще не видела. Остальные запросы
+    пакета генерируются одним вызовом generate.
+    """
+
+    name = "transformers"
+    supports_sessions = True
+
+    def __init__(self, config):
+        self.config = config
+        self.tokenizer, self.model = load_model(config)
+        self.kv_cache = SessionKVCache(config.kv_cache_sessions) if config.kv_cache else None
+        self.supports_sessions = config.kv_cache
+        import torch
+        self._torch = torch
+
+    def on_worker_start(self) -> None:
+        configure_torch_threads(self.config.intra_op_threads, self.config.inter_op_threads)
+        if self.config.cpu_affinity and hasattr(os, "sched_setaffinity"):
+            # На Linux pid 0 - текущий поток
+            os.sched_setaffinity(0, set(self.config.cpu_affinity))
+
+    def _prompt(self, request: GenerationRequest) -> str:
+        return f"{request.context}\nПользователь: {request.message}\nAI:" if request.context else request.message
+
+    def generate_batch(self, requests: List[GenerationRequest]) -> List[str]:
+        outputs: List[Optional[str]] = [None] * len(requests)
+        stateless = []
+        for index, request in enumerate(requests):
+            if self.kv_cache is not None and request.session_id and self.kv_cache.get(request.session_id):
+                outputs[index] = self._continue_session(request)
+            else:
+                stateless.append(index)
+        if stateless:
+            for index, text in zip(stateless, self._generate_stateless([requests[i] for i in stateless])):
+                outputs[index] = text
+        return outputs
+
+    def _generate_stateless(self, requests: List[GenerationRequest]) -> List[str]:
+        torch = self._torch
+        encoded = self.tokenizer([self._prompt(r) for r in requests], return_tensors="pt", padding=True)
+        with torch.inference_mode():
+            output = self.model.generate(
+                **encoded,
+                max_new_tokens=max(r.max_new_tokens for r in requests),
+                pad_token_id=self.tokenizer.pad_token_id,
+                do_sample=False,
+                use_cache=True,
+                return_dict_in_generate=True
+            )
+        prompt_length = encoded["input_ids"].shape[1]
+        if self.kv_cache is not None and len(requests) == 1 and requests[0].session_id:
+            # Кеш пакета с выравниванием нельзя разделить по сессиям - сохраняется только одиночный
+            self._remember(requests[0], output.sequences, output.past_key_values)
+        return [
+            text.strip() for text in
+            self.tokenizer.batch_decode(output.sequences[:, prompt_length:], skip_special_tokens=True)
+        ]
+
+    def _continue_session(self, request: GenerationRequest) -> str:
+        torch = self._torch
+        token_ids, past_key_values, seen = self.kv_cache.get(request.session_id)
+        # Новая припомненная память и реплики, которых нет в истории сессии
+        delta = "".join(f"\n{line}" for line in _context_lines(request.context) if line not in seen)
+        turn = self.tokenizer(f"{delta}\nПользователь: {request.message}\nAI:", return_tensors="pt")["input_ids"]
+        input_ids = torch.cat([token_ids, turn], dim=1)
+        with torch.inference_mode():
+            output = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=past_key_values,
+                max_new_tokens=request.max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                do_sample=False,
+                use_cache=True,
+                return_dict_in_generate=True
+            )
+        self._remember(request, output.sequences, output.past_key_values, seen)
+        return self.tokenizer.decode(output.sequences[0, input_ids.shape[1]:], skip_special_tokens=True).strip()
+
+    def _remember(self, request: GenerationRequest, sequences, past_key_values,
+                  seen: FrozenSet[str] = frozenset()) -> None:
+        if sequences.shape[1] > self.config.max_context_tokens:
+            # Слишком длинная история: следующая реплика начнется со сводки контекста
+            self.kv_cache.drop(request.session_id)
+        else:
+            self.kv_cache.put(request.session_id, sequences, past_key_values, seen | _context_lines(request.context))
+
+    def export_onnx(self, path: str) -> Path:
+        """Экспорт модели (logits без KV-кеша) в ONNX для OnnxBackend"""
+        return export_onnx(self.model, self.tokenizer, path)
+
+def export_onnx(model, tokenizer, path: str, opset: int = 17) -> Path:
+    """Экспорт forward модели в ONNX с динамическими размерами пакета и длины"""
+    import torch
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sample = tokenizer(["пример"], return_tensors="pt")
+    model.config.use_cache = False
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset
+        )
+    return path
+
+class OnnxBackend(GenerationBackend):
+    """Модель, экспортированная в ONNX, в onnxruntime на CPU (жадное декодирование)"""
+
+    name = "onnx"
+
+    def __init__(self, config):
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ModuleExecutionError("communication", "load_model", f"нужны onnxruntime и transformers: {e}")
+        if not config.onnx_path or not Path(config.onnx_path).exists():
+            raise ModuleExecutionError("communication", "load_model", f"нет ONNX модели: {config.onnx_path}")
+        self._np = np
+        options = ort.SessionOptions()
+        if config.intra_op_threads > 0:
+            options.intra_op_num_threads = config.intra_op_threads
+        if config.inter_op_threads > 0:
+            options.inter_op_num_threads = config.inter_op_threads
+        self.session = ort.InferenceSession(config.onnx_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(config.model_name)
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+    def generate_batch(self, requests: List[GenerationRequest]) -> List[str]:
+        np = self._np
+        encoded = self.tokenizer([r.message for r in requests], return_tensors="np", padding=True)
+        input_ids = encoded["input_ids"].astype(np.int64)
+        attention_mask = encoded["attention_mask"].astype(np.int64)
+        prompt_length = input_ids.shape[1]
+        finished = np.zeros(len(requests), dtype=bool)
+        for _ in range(max(r.max_new_tokens for r in requests)):
+            logits = self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+            next_tokens = logits[:, -1, :].argmax(axis=-1)
+            next_tokens = np.where(finished, self.tokenizer.pad_token_id, next_tokens)
+            finished |= next_tokens == self.tokenizer.eos_token_id
+            input_ids = np.concatenate([input_ids, next_tokens[:, None]], axis=1)
+            attention_mask = np.concatenate([attention_mask, (~finished[:, None]).astype(np.int64)], axis=1)
+            if finished.all():
+                break
+        return [
+            text.strip() for text in
+            self.tokenizer.batch_decode(input_ids[:, prompt_length:], skip_special_tokens=True)
+        ]
+
+def create_backend(config) -> GenerationBackend:
+    """Бэкенд генерации по конфигурации"""
+    if config.backend == "stub":
+        return StubBackend()
+    if config.backend == "transformers":
+        return TransformersBackend(config)
+    if config.backend == "onnx":
+        return OnnxBackend(config)
+    raise ModuleExecutionError("communication", "create_backend", f"неизвестный бэкенд: {config.backend}")
+
+@dataclass
+class _Pending:
+    request: GenerationRequest
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    enqueued_at: float
+
+class MicroBatcher:
+    """
+    Объединение одновременных запросов к модели в пакеты
+
+    Запросы копятся в очереди; рабочий поток забирает первый и добирает
+    остальные, пока не наберется max_batch_size или не истечет max_wait_ms с
+    момента появления первого. Одинаковые запросы внутри пакета вычисляются
+    один раз. Результаты возвращаются ожидающим корутинам через их event loop.
+    Остановленный планировщик закрыт: его бэкенд освобожден, поэтому новые
+    запросы отклоняются, а не запускают рабочий поток заново.
+    """
+
+    def __init__(self,
+                 backend: GenerationBackend,
+                 max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0,
+                 queue_size: int = 1024):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.queue_wait_ms = Histogram()
+        self.batch_latency_ms = Histogram()
+        self.batch_size = Histogram(buckets=(1, 2, 4, 8, 16, 32, 64))
+        self.coalesced = 0
+
+    async def submit(self, request: GenerationRequest) -> str:
+        """
+        Постановка запроса в очередь и ожидание результата
+
+        Raises:
+            ModuleExecutionError: Очередь переполнена или планировщик остановлен (closed)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._closed:
+                raise ModuleExecutionError("communication", "generate", "планировщик генерации остановлен")
+            self._start()
+            try:
+                self._queue.put_nowait(_Pending(request, future, loop, time.perf_counter()))
+            except queue.Full:
+                raise ModuleExecutionError("communication", "generate", "очередь генерации переполнена")
+        return await future
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        with self._lock:
+            if self._closed:
+                raise ModuleExecutionError("communication", "generate", "планировщик генерации остановлен")
+            self._start()
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="response-generator", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Остановка рабочего потока после обработки уже поставленных запросов; планировщик закрывается"""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def _collect(self, first: _Pending) -> Tuple[List[_Pending], bool]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        try:
+            self.backend.on_worker_start()
+        except Exception as e:
+            logger.warning(f"Не удалось настроить поток генерации: {e}")
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        for pending in batch:
+            self.queue_wait_ms.observe((started - pending.enqueued_at) * 1000)
+
+        unique: Dict[GenerationRequest, int] = {}
+        for pending in batch:
+            unique.setdefault(pending.request, len(unique))
+        self.coalesced += len(batch) - len(unique)
+        self.batch_size.observe(len(unique))
+
+        try:
+            outputs = self.backend.generate_batch(list(unique))
+            error = None
+        except Exception as e:
+            logger.error(f"Ошибка пакетной генерации: {e}")
+            outputs, error = None, e
+        self.batch_latency_ms.observe((time.perf_counter() - started) * 1000)
+
+        for pending in batch:
+            if error is not None:
+                pending.loop.call_soon_threadsafe(_resolve, pending.future, None, error)
+            else:
+                result = outputs[unique[pending.request]]
+                pending.loop.call_soon_threadsafe(_resolve, pending.future, result, None)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "queued": self._queue.qsize(),
+            "coalesced": self.coalesced,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+            "batch_latency_ms": self.batch_latency_ms.snapshot(),
+        }
+
+def _resolve(future: asyncio.Future, result: Any, error: Optional[BaseException]) -> None:
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+def _backend_settings(config) -> Tuple:
+    """Настройки, изменение которых требует пересоздания бэкенда"""
+    return (
+        config.backend, config.model_name, config.quantize, config.kv_cache,
+        config.intra_op_threads, config.inter_op_threads, tuple(config.cpu_affinity), config.onnx_path
+    )
+
+class ResponseGenerator:
+    """
+    Генерация ответов через микропакетный планировщик
+
+    Бэкенд создается лениво при первом запросе; изменение бэкенда или модели в
+    конфигурации пересоздает планировщик, размеры пакета применяются на лету.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batcher: Optional[MicroBatcher] = None
+        self.config = config_manager.system.generation
+        config_manager.subscribe("system", self._on_config_change)
+        load_tracker.register_source("generation_queue", self.queue_depth)
+
+    def _on_config_change(self, new_config, old_config):
+        """Применение новых настроек генерации без перезапуска"""
+        config = new_config.generation
+        with self._lock:
+            batcher = self._batcher
+            if batcher is not None and _backend_settings(config) != _backend_settings(self.config):
+                self._batcher = None
+                batcher.stop()
+                batcher.backend.close()
+            elif batcher is not None:
+                batcher.max_batch_size = config.max_batch_size
+                batcher.max_wait_ms = config.max_wait_ms
+            self.config = config
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = MicroBatcher(
+                    create_backend(self.config),
+                    max_batch_size=self.config.max_batch_size,
+                    max_wait_ms=self.config.max_wait_ms,
+                    queue_size=self.config.queue_size
+                )
+            return self._batcher
+
+    async def start(self) -> None:
+        """Загрузка бэкенда при запуске приложения, а не на первом запросе"""
+        await asyncio.to_thread(lambda: self.batcher)
+
+    async def generate(self, message: str, context: str = "", session_id: Optional[str] = None) -> str:
+        """Ответ на сообщение с учетом собранного контекста"""
+        while True:
+            batcher = self._batcher
+            if batcher is None:
+                # Загрузка модели (from_pretrained, квантизация) не блокирует event loop
+                batcher = await asyncio.to_thread(lambda: self.batcher)
+            # session_id нужен только бэкендам с KV-кешем; без него одинаковые запросы объединяются
+            request = GenerationRequest(
+                message, context, self.config.max_new_tokens,
+                session_id if batcher.backend.supports_sessions else None
+            )
+            try:
+                return await batcher.submit(request)
+            except ModuleExecutionError:
+                # Планировщик закрыт сменой конфигурации - запрос уходит в новый
+                if not batcher.closed or self._batcher is batcher:
+                    raise
+
+    def queue_depth(self) -> int:
+        """Запросы, ожидающие генерации"""
+        batcher = self._batcher
+        return batcher.queue_depth() if batcher else 0
+
+    def stats(self) -> Dict[str, Any]:
+        batcher = self._batcher
+        return batcher.stats() if batcher else {"backend": self.config.backend, "started": False}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.stop()
+            batcher.backend.close()
+
+# Глобальный генератор ответов
+response_generator = ResponseGenerator()
@@ -0,0 +1,295 @@
+"""
+Адаптивное обучение: онлайн-оценка вариантов ответа по реакции пользователя
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import config_manager
+from modules.learning.experience_processor import Experience, ExperienceProcessor, experience_processor
+
+logger = logging.getLogger(__name__)
+
+# Тип записей learning_experiences с уроками стиля ответа
+LESSON_TYPE = "response_style"
+# Положение корзины черты стиля: направление дрейфа черты при положительной реакции
+BUCKET_POSITION = {"low": -1.0, "mid": 0.0, "high": 1.0}
+KEY_SEPARATOR = "|"
+
+LessonKey = Tuple[str, str, str]
+
+class AdaptiveLearner:
+    """
+    Онлайн-обучение на опыте
+
+    Для каждого варианта ответа (намерение, настроение, корзина черты стиля)
+    хранится экспоненциальное скользящее среднее реакции пользователя в
+    массивах NumPy; пакет опыта применяется одним векторным шагом без
+    переобучения. Шаг - learning_rate * experience_absorption_rate; n
+    реакций на один вариант в пакете дают шаг 1 - (1 - rate)^n к их среднему.
+    Реакция на ответы с низкой или высокой корзиной смещает черту стиля
+    общения. preferred_bucket выбирает для ответа корзину с заметно лучшей
+    ожидаемой реакцией, чем у корзины текущего значения черты; корзина черты
+    сохраняется, пока по ней мало реакций, и с вероятностью исследования,
+    чтобы ее оценка могла восстановиться. Измененные уроки периодически
+    сохраняются в learning_experiences (impact_score - оценка, applied_count -
+    число учтенных реакций).
+    """
+
+    def __init__(self,
+                 processor: Optional[ExperienceProcessor] = None,
+                 config_provider: Optional[Callable] = None,
+                 session_factory: Optional[Callable] = None,
+                 traits=None):
+        self.processor = processor or experience_processor
+        self._config_provider = config_provider or (lambda: config_manager.psyche.learning_parameters)
+        self._session_factory = session_factory
+        self._traits = traits
+        self._lock = threading.Lock()
+        self._index: Dict[LessonKey, int] = {}
+        self._keys: List[LessonKey] = []
+        self.values = np.zeros(16, dtype=np.float32)
+        self.counts = np.zeros(16, dtype=np.int64)
+        self._dirty = np.zeros(16, dtype=bool)
+        self.updates = 0
+        self._random = random.Random()
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    @property
+    def traits(self):
+        if self._traits is None:
+            from modules.personality.traits import personality
+            self._traits = personality
+        return self._traits
+
+    def _slots(self, keys: Sequence[LessonKey]) -> np.ndarray:
+        """Индексы уроков с созданием новых; вызывается под блокировкой"""
+        slots = np.empty(len(keys), dtype=np.intp)
+        for position, key in enumerate(keys):
+            slot = self._index.get(key)
+            if slot is None:
+                slot = len(self._keys)
+                self._index[key] = slot
+                self._keys.append(key)
+            slots[position] = slot
+        size = len(self._keys)
+        if size > len(self.values):
+            capacity = max(size, 2 * len(self.values))
+            self.values = np.concatenate([self.values, np.zeros(capacity - len(self.values), dtype=np.float32)])
+            self.counts = np.concatenate([self.counts, np.zeros(capacity - len(self.counts), dtype=np.int64)])
+            self._dirty = np.concatenate([self._dirty, np.zeros(capacity - len(self._dirty), dtype=bool)])
+        return slots
+
+    def update(self, experiences: Sequence[Experience]) -> int:
+        """
+        Применение пакета опыта
+
+        Returns:
+            Количество учтенных реакций
+        """
+        if not experiences:
+            return 0
+        config = self.config
+        rate = min(max(config.learning_rate * config.experience_absorption_rate, 0.0), 1.0)
+        rewards = np.fromiter((experience.reward for experience in experiences), dtype=np.float64, count=len(experiences))
+        with self._lock:
+            slots = self._slots([(e.intent, e.mood, e.bucket) for e in experiences])
+            unique, inverse = np.unique(slots, return_inverse=True)
+            counts = np.bincount(inverse)
+            means = np.bincount(inverse, weights=rewards) / counts
+            step = 1.0 - (1.0 - rate) ** counts
+            self.values[unique] += (step * (means - self.values[unique])).astype(np.float32)
+            self.counts[unique] += counts
+            self._dirty[unique] = True
+            self.updates += len(experiences)
+
+        if config.trait_drift_weight:
+            positions = np.fromiter(
+                (BUCKET_POSITION.get(e.bucket, 0.0) for e in experiences), dtype=np.float64, count=len(experiences)
+            )
+            signal = float(np.mean(rewards * positions))
+            if signal:
+                trait = config_manager.communication.style.trait
+                self.traits.apply_drift({trait: signal}, weight=config.experience_absorption_rate * config.trait_drift_weight)
+        return len(experiences)
+
+    def learn_pending(self, cpu_deadline: Optional[float] = None, batch_size: int = 256) -> int:
+        """
+        Разбор накопленных событий и обучение на полученном опыте
+
+        Args:
+            cpu_deadline: Предел time.thread_time(), после которого остальные
+                события остаются в очереди до следующего запуска
+        """
+        learned = 0
+        while cpu_deadline is None or time.thread_time() < cpu_deadline:
+            events = self.processor.drain(batch_size)
+            if not events:
+                break
+            learned += self.update(self.processor.process(events))
+        return learned
+
+    def expected_reward(self, intent: str, mood: str, bucket: str) -> Optional[float]:
+        """Ожидаемая реакция пользователя на вариант ответа (None - опыта еще нет)"""
+        slot = self._index.get((intent, mood, bucket))
+        return None if slot is None else float(self.values[slot])
+
+    def preferred_bucket(self, intent: str, mood: str, bucket: str) -> str:
+        """
+        Корзина стиля для ответа: bucket или корзина, ожидаемая реакция на
+        которую выше реакции на bucket больше чем на style_selection_margin
+
+        Сравниваются только корзины не менее чем с style_min_count реакциями;
+        пока реакций на bucket меньше, а также с вероятностью
+        style_exploration_rate выбирается bucket.
+        """
+        config = self.config
+        if not config.reward_guided_style:
+            return bucket
+        with self._lock:
+            rewards, counts = {}, {}
+            for candidate in BUCKET_POSITION:
+                slot = self._index.get((intent, mood, candidate))
+                if slot is not None:
+                    rewards[candidate], counts[candidate] = float(self.values[slot]), int(self.counts[slot])
+        if counts.get(bucket, 0) < config.style_min_count:
+            return bucket
+        if self._random.random() < config.style_exploration_rate:
+            return bucket
+        best = max(
+            (candidate for candidate in rewards if counts[candidate] >= config.style_min_count),
+            key=rewards.get
+        )
+        if rewards[best] > rewards[bucket] + config.style_selection_margin:
+            return best
+        return bucket
+
+    def lessons(self) -> List[Dict[str, object]]:
+        """Уроки по убыванию числа учтенных реакций"""
+        with self._lock:
+            size = len(self._keys)
+            order = np.argsort(-self.counts[:size], kind="stable")
+            return [
+                {
+                    "intent": self._keys[slot][0], "mood": self._keys[slot][1], "bucket": self._keys[slot][2],
+                    "expected_reward": round(float(self.values[slot]), 4), "count": int(self.counts[slot]),
+                }
+                for slot in order
+            ]
+
+    def load(self, db=None) -> int:
+        """
+        Восстановление оценок из последней контрольной точки в БД
+
+        Returns:
+            Количество загруженных уроков
+        """
+        from database import crud
+
+        own_session = db is None
+        db = self._get_session() if own_session else db
+        try:
+            rows = crud.crud_learning_experience.get_by_type(db, LESSON_TYPE)
+        finally:
+            if own_session:
+                db.close()
+        loaded = [
+            (tuple(row.description.split(KEY_SEPARATOR)), row.impact_score or 0.0, row.applied_count or 0)
+            for row in rows if row.description and row.description.count(KEY_SEPARATOR) == 2
+        ]
+        with self._lock:
+            slots = self._slots([key for key, _, _ in loaded])
+            for slot, (_, impact, applied) in zip(slots, loaded):
+                self.values[slot] = impact
+                self.counts[slot] = applied
+                self._dirty[slot] = False
+        logger.info(f"Уроки адаптивного обучения загружены: {len(loaded)}")
+        return len(loaded)
+
+    def checkpoint(self, db=None) -> int:
+        """
+        Сохранение измененных уроков одним пакетом
+
+        Returns:
+            Количество сохраненных уроков
+        """
+        with self._lock:
+            slots = np.flatnonzero(self._dirty[:len(self._keys)])
+            if not len(slots):
+                return 0
+            self._dirty[slots] = False
+            lessons = {}
+            for slot in slots:
+                intent, mood, bucket = self._keys[slot]
+                value = float(self.values[slot])
+                lessons[KEY_SEPARATOR.join((intent, mood, bucket))] = {
+                    "impact_score": round(value, 4),
+                    "applied_count": int(self.counts[slot]),
+                    "lesson_learned": (
+                        f"Ответ {intent} при настроении {mood} (корзина {bucket}): "
+                        f"ожидаемая реакция {value:+.2f}"
+                    ),
+                }
+
+        from database import crud
+        own_session = db is None
+        db = self._get_session() if own_session else db
+        try:
+            return crud.crud_learning_experience.upsert_lessons(db, LESSON_TYPE, lessons)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить уроки адаптивного обучения: {e}")
+            db.rollback()
+            with self._lock:
+                self._dirty[slots] = True
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+    def _get_session(self):
+        if self._session_factory is None:
+            from database.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self.processor.stats(),
+            "lessons": len(self._keys),
+            "updates": self.updates,
+            "unsaved": int(self._dirty[:len(self._keys)].sum()),
+        }
+
+# Глобальное адаптивное обучение
+adaptive_learner = AdaptiveLearner()
+
+def learning_job(context) -> int:
+    """Обучение на накопленных событиях в пределах бюджета задачи"""
+    return adaptive_learner.learn_pending(context.cpu_deadline)
+
+def checkpoint_job(context) -> int:
+    """Периодическое сохранение уроков в БД"""
+    return adaptive_learner.checkpoint()
+
+def register_jobs(scheduler) -> None:
+    """Регистрация задач обучения в планировщике"""
+    from core.scheduler import IntervalTrigger
+
+    scheduler.add_job(
+        "learning", learning_job,
+        IntervalTrigger(lambda: config_manager.psyche.learning_parameters.process_interval_seconds),
+        module="learning", priority="low"
+    )
+    scheduler.add_job(
+        "learning_checkpoint", checkpoint_job,
+        IntervalTrigger(lambda: config_manager.psyche.learning_parameters.checkpoint_interval_seconds),
+        module="learning", priority="low"
+    )
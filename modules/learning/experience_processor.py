@@ -0,0 +1,118 @@
+"""
+Обработка опыта: события взаимодействия превращаются в опыт с оценкой реакции пользователя
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from core.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# Знак и сила реакции пользователя по его эмоции
+EMOTION_VALENCE = {
+    "happy": 1.0,
+    "excited": 0.8,
+    "neutral": 0.0,
+    "sad": -0.7,
+    "angry": -1.0,
+}
+
+@dataclass(frozen=True)
+class InteractionEvent:
+    """Событие обработки сообщения: как ответила система и что почувствовал пользователь"""
+    session_id: str
+    intent: str
+    mood: str
+    bucket: str
+    user_emotion: Optional[str] = None
+    intensity: float = 0.0
+
+@dataclass(frozen=True)
+class Experience:
+    """Опыт: вариант ответа и реакция пользователя на него (reward в [-1, 1])"""
+    intent: str
+    mood: str
+    bucket: str
+    reward: float
+
+class ExperienceProcessor:
+    """
+    Очередь событий взаимодействия и их разбор в опыт
+
+    submit - только добавление в ограниченную очередь, поэтому обработка
+    сообщения не ждет обучения. Реакцией на ответ считается эмоция
+    следующего сообщения той же сессии; последний ответ помнится для
+    ограниченного числа сессий.
+    """
+
+    def __init__(self, config_provider: Optional[Callable] = None):
+        self._config_provider = config_provider or (lambda: config_manager.psyche.learning_parameters)
+        self._lock = threading.Lock()
+        self._events: deque = deque()
+        self._responses: "OrderedDict[str, Tuple[str, str, str]]" = OrderedDict()
+        self.dropped = 0
+        self.processed = 0
+        self._apply_config(self._config_provider())
+        if config_provider is None:
+            config_manager.subscribe("psyche", self._on_config_change)
+
+    def _apply_config(self, config):
+        with self._lock:
+            self.config = config
+            self._events = deque(self._events, maxlen=config.max_pending_events)
+
+    def _on_config_change(self, new_config, old_config):
+        self._apply_config(new_config.learning_parameters)
+
+    @property
+    def pending(self) -> int:
+        return len(self._events)
+
+    def submit(self, event: InteractionEvent) -> None:
+        """Постановка события в очередь; при переполнении вытесняется самое старое"""
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+
+    def drain(self, limit: Optional[int] = None) -> List[InteractionEvent]:
+        """Извлечение до limit событий из очереди"""
+        with self._lock:
+            count = len(self._events) if limit is None else min(limit, len(self._events))
+            return [self._events.popleft() for _ in range(count)]
+
+    def process(self, events: List[InteractionEvent]) -> List[Experience]:
+        """
+        Опыт из событий
+
+        Событие с эмоцией пользователя оценивает предыдущий ответ той же сессии;
+        сам ответ события запоминается до следующего сообщения сессии.
+        """
+        experiences = []
+        responses = self._responses
+        limit = self.config.max_tracked_sessions
+        for event in events:
+            previous = responses.pop(event.session_id, None)
+            if previous is not None and event.user_emotion is not None:
+                valence = EMOTION_VALENCE.get(event.user_emotion, 0.0)
+                experiences.append(Experience(*previous, reward=valence * min(max(event.intensity, 0.0), 1.0)))
+            responses[event.session_id] = (event.intent, event.mood, event.bucket)
+            if len(responses) > limit:
+                responses.popitem(last=False)
+        self.processed += len(events)
+        return experiences
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "tracked_sessions": len(self._responses),
+        }
+
+# Глобальная обработка опыта
+experience_processor = ExperienceProcessor()
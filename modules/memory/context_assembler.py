@@ -0,0 +1,230 @@
+"""
+Сборка контекста диалога: сводка сессии, последние реплики и припомненная память
+"""
+
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from core.config import config_manager
+from modules.memory.knowledge_base import extract_concepts
+
+logger = logging.getLogger(__name__)
+
+# Взаимодействий сессии, читаемых из БД за один запрос
+REFRESH_PAGE_SIZE = 500
+
+@dataclass
+class SessionContext:
+    """Инкрементально обновляемое состояние сессии"""
+    last_interaction_id: int = 0
+    version: int = 0
+    recent: deque = field(default_factory=deque)
+    concepts: Counter = field(default_factory=Counter)
+    summarized_turns: int = 0
+    summary: str = ""
+
+@dataclass
+class AssembledContext:
+    """Собранный контекст в пределах бюджета"""
+    session_id: str
+    version: int
+    text: str
+    memory_ids: List[int] = field(default_factory=list)
+    turns: int = 0
+    truncated: bool = False
+
+    @property
+    def chars(self) -> int:
+        return len(self.text)
+
+class ContextAssembler:
+    """
+    Сборщик контекста сессии с бюджетом по символам (или оценке токенов)
+
+    Для каждой сессии хранится последний учтенный id взаимодействия: из БД
+    читается только дельта. Реплики, вытесненные из окна recent_turns,
+    сворачиваются в сводку (частоты концепций), поэтому полная история сессии
+    никогда не загружается. Блок сессии (сводка + последние реплики) кешируется
+    по (session_id, version); припомненная память добавляется на каждом запросе
+    в оставшийся бюджет.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self._blocks: Dict[Tuple[str, int, int], Tuple[str, int, bool]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._apply_config(config_manager.memory.context)
+        config_manager.subscribe("memory", self._on_config_change)
+
+    def _apply_config(self, config):
+        with self._lock:
+            self.config = config
+            self._blocks.clear()
+            for state in self._sessions.values():
+                self._trim(state)
+
+    def _on_config_change(self, new_config, old_config):
+        """Применение нового бюджета и окна реплик без перезапуска"""
+        self._apply_config(new_config.context)
+
+    @property
+    def budget(self) -> int:
+        """Бюджет контекста в символах"""
+        budget = self.config.max_chars
+        if self.config.max_tokens > 0:
+            budget = min(budget, int(self.config.max_tokens * self.config.chars_per_token))
+        return budget
+
+    def _session(self, session_id: str) -> SessionContext:
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = SessionContext()
+            self._sessions[session_id] = state
+            while len(self._sessions) > self.config.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self._drop_blocks(evicted)
+        else:
+            self._sessions.move_to_end(session_id)
+        return state
+
+    def _drop_blocks(self, session_id: str) -> None:
+        for key in [key for key in self._blocks if key[0] == session_id]:
+            del self._blocks[key]
+
+    def refresh(self, db: Session, session_id: str) -> SessionContext:
+        """
+        Догрузка новых взаимодействий сессии
+
+        Дельта читается страницами до конца, поэтому после перезапуска
+        последние реплики сессии - действительно последние, а более старые
+        свернуты в сводку. Запросы к БД идут вне блокировки.
+        """
+        from database import crud
+
+        with self._lock:
+            state = self._session(session_id)
+            after_id = state.last_interaction_id
+        while True:
+            interactions = crud.crud_interaction.get_session_interactions_after(
+                db, session_id, after_id, REFRESH_PAGE_SIZE
+            )
+            if interactions:
+                with self._lock:
+                    self._append(session_id, state, interactions)
+                after_id = interactions[-1].id
+            if len(interactions) < REFRESH_PAGE_SIZE:
+                return state
+
+    def _append(self, session_id: str, state: SessionContext, interactions) -> None:
+        """Учет страницы взаимодействий; вызывается под блокировкой"""
+        appended = False
+        for interaction in interactions:
+            # Параллельный refresh той же сессии мог уже учесть страницу
+            if interaction.id <= state.last_interaction_id:
+                continue
+            state.recent.append((interaction.user_input or "", interaction.ai_response or ""))
+            state.last_interaction_id = interaction.id
+            appended = True
+        if appended:
+            self._trim(state)
+            self._drop_blocks(session_id)
+            state.version += 1
+
+    def _trim(self, state: SessionContext) -> None:
+        """Свертка реплик, вышедших за окно, в сводку"""
+        folded = False
+        while len(state.recent) > self.config.recent_turns:
+            user_input, _ = state.recent.popleft()
+            state.concepts.update(extract_concepts(user_input))
+            state.summarized_turns += 1
+            folded = True
+        if folded:
+            topics = ", ".join(c for c, _ in state.concepts.most_common(self.config.summary_concepts))
+            state.summary = f"Ранее в диалоге ({state.summarized_turns} реплик): {topics}"[
+                :self.config.summary_max_chars
+            ]
+
+    def _session_block(self, session_id: str, state: SessionContext, budget: int) -> Tuple[str, int, bool]:
+        """Сводка и последние реплики в пределах budget (с кешированием)"""
+        key = (session_id, state.version, budget)
+        block = self._blocks.get(key)
+        if block is not None:
+            self.cache_hits += 1
+            return block
+        self.cache_misses += 1
+
+        parts: List[str] = []
+        used = 0
+        truncated = False
+        if state.summary and len(state.summary) <= budget:
+            parts.append(state.summary)
+            used += len(state.summary) + 1
+        turns: List[str] = []
+        for user_input, ai_response in reversed(state.recent):
+            turn = f"Пользователь: {user_input}\nAI: {ai_response}"
+            if used + len(turn) + 1 > budget:
+                truncated = True
+                break
+            turns.append(turn)
+            used += len(turn) + 1
+        parts.extend(reversed(turns))
+        block = ("\n".join(parts), len(turns), truncated)
+        self._blocks[key] = block
+        return block
+
+    def assemble(self,
+                 db: Session,
+                 session_id: str,
+                 memories: Optional[List[Dict[str, Any]]] = None) -> AssembledContext:
+        """
+        Сборка контекста сессии
+
+        Args:
+            db: Сессия БД
+            session_id: ID сессии
+            memories: Припомненная память (результаты recall_memory, по убыванию оценки)
+        """
+        state = self.refresh(db, session_id)
+        with self._lock:
+            budget = self.budget
+            memory_budget = int(budget * self.config.memory_share) if memories else 0
+            session_text, turns, truncated = self._session_block(session_id, state, budget - memory_budget)
+            version = state.version
+
+        used = len(session_text)
+        memory_lines: List[str] = []
+        memory_ids: List[int] = []
+        for memory in memories or []:
+            line = f"Память: {memory['content']}"
+            if used + len(line) + 1 > budget:
+                truncated = True
+                break
+            memory_lines.append(line)
+            memory_ids.append(int(memory["id"]))
+            used += len(line) + 1
+
+        text = "\n".join(part for part in ("\n".join(memory_lines), session_text) if part)
+        return AssembledContext(
+            session_id=session_id,
+            version=version,
+            text=text,
+            memory_ids=memory_ids,
+            turns=turns,
+            truncated=truncated
+        )
+
+    def forget_session(self, session_id: str) -> None:
+        """Удаление состояния сессии"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._drop_blocks(session_id)
+
+# Глобальный сборщик контекста
+context_assembler = ContextAssembler()
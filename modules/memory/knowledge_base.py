@@ -0,0 +1,384 @@
+"""
+База знаний: граф концепций с ассоциативным обходом
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from core.config import config_manager
+from modules.senses.input_parser import input_parser
+
+logger = logging.getLogger(__name__)
+
+# Типы памяти, из которых строится граф концепций
+FACT_MEMORY_TYPES = ("fact", "knowledge")
+
+def _concept_key(name: str) -> str:
+    return name.lower().replace("ё", "е")
+
+def extract_concepts(text) -> List[str]:
+    """Извлечение концепций (значимых слов) из текста факта"""
+    return list(input_parser.parse(text).concepts)
+
+def _expand(indptr: np.ndarray, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Позиции ребер всех узлов nodes в CSR массивах
+
+    Returns:
+        (позиции ребер, индекс исходного узла в nodes для каждой позиции)
+    """
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    owner = np.repeat(np.arange(len(nodes)), lengths)
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owner] + offsets, owner
+
+class KnowledgeGraph:
+    """
+    Граф концепций в компактном целочисленном представлении
+
+    Концепции интернируются в номера 0..n-1. Ребра копятся в растущих массивах
+    (COO) и при первом обходе после изменения собираются в CSR: indptr/indices/
+    weights, где дубликаты ребер суммируются, а веса нормируются по исходящей
+    степени для распространения активации. Результаты обходов кешируются в LRU,
+    кеш сбрасывается при любом изменении графа. Для каждого ребра помнится
+    факт-источник: ребра удаленных или пониженных фактов убираются вместе с
+    концепциями, у которых не осталось связей.
+    """
+
+    def __init__(self, cache_size: int = 1024, window: int = 5):
+        self._lock = threading.RLock()
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._src = np.empty(1024, dtype=np.int32)
+        self._dst = np.empty(1024, dtype=np.int32)
+        self._weight = np.empty(1024, dtype=np.float32)
+        # Идентификатор факта-источника ребра (0 - ребро добавлено не из факта)
+        self._memory = np.empty(1024, dtype=np.int64)
+        self._edge_count = 0
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.cache_size = cache_size
+        self.window = window
+        self.version = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._watermark = 0
+        self._apply_config(config_manager.memory)
+        config_manager.subscribe("memory", self._on_config_change)
+
+    def _apply_config(self, config):
+        self.concept_mapping = config.knowledge_base.concept_mapping
+        self.association_strength = config.recall.association_strength
+
+    def _on_config_change(self, new_config, old_config):
+        """Новая сила ассоциаций меняет результаты обхода - кеш сбрасывается"""
+        with self._lock:
+            self._apply_config(new_config)
+            self._cache.clear()
+
+    @property
+    def concept_count(self) -> int:
+        return len(self._names)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def concept_id(self, name: str, create: bool = False) -> Optional[int]:
+        """Номер концепции (с созданием при create=True)"""
+        key = _concept_key(name)
+        concept_id = self._ids.get(key)
+        if concept_id is None and create:
+            concept_id = len(self._names)
+            self._ids[key] = concept_id
+            self._names.append(key)
+        return concept_id
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._edge_count + extra
+        if needed <= len(self._src):
+            return
+        capacity = max(needed, len(self._src) * 2)
+        for attr in ("_src", "_dst", "_weight", "_memory"):
+            old = getattr(self, attr)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self._edge_count] = old[:self._edge_count]
+            setattr(self, attr, grown)
+
+    def add_edges(self, edges: Iterable[Tuple[str, str, float]], symmetric: bool = True, memory_id: int = 0) -> int:
+        """
+        Добавление ребер (концепция, концепция, вес) факта memory_id
+
+        Returns:
+            Количество добавленных ребер
+        """
+        with self._lock:
+            src, dst, weight = [], [], []
+            for a, b, w in edges:
+                # Петли пропускаются до создания концепций: концепция без ребер не нужна графу
+                if _concept_key(a) == _concept_key(b):
+                    continue
+                ia, ib = self.concept_id(a, create=True), self.concept_id(b, create=True)
+                src.append(ia)
+                dst.append(ib)
+                weight.append(w)
+                if symmetric:
+                    src.append(ib)
+                    dst.append(ia)
+                    weight.append(w)
+            if not src:
+                return 0
+            self._reserve(len(src))
+            end = self._edge_count + len(src)
+            self._src[self._edge_count:end] = src
+            self._dst[self._edge_count:end] = dst
+            self._weight[self._edge_count:end] = weight
+            self._memory[self._edge_count:end] = memory_id
+            self._edge_count = end
+            self._invalidate()
+            return len(src)
+
+    def add_fact(self, text: str, importance: float = 1.0, memory_id: int = 0) -> int:
+        """Добавление факта: связи между концепциями в пределах окна"""
+        if not self.concept_mapping:
+            return 0
+        concepts = extract_concepts(text)
+        edges = []
+        for i, concept in enumerate(concepts):
+            for j in range(i + 1, min(i + self.window, len(concepts))):
+                edges.append((concept, concepts[j], float(importance) / (j - i)))
+        return self.add_edges(edges, memory_id=memory_id)
+
+    def remove_memories(self, memory_ids: Iterable[int]) -> int:
+        """
+        Удаление ребер фактов memory_ids и концепций, оставшихся без связей
+
+        Returns:
+            Количество удаленных ребер
+        """
+        memory_ids = np.fromiter(memory_ids, dtype=np.int64)
+        with self._lock:
+            count = self._edge_count
+            keep = ~np.isin(self._memory[:count], memory_ids)
+            removed = count - int(keep.sum())
+            if not removed:
+                return 0
+            src, dst = self._src[:count][keep], self._dst[:count][keep]
+            used = np.unique(np.concatenate([src, dst]))
+            kept = len(src)
+            self._src[:kept] = np.searchsorted(used, src)
+            self._dst[:kept] = np.searchsorted(used, dst)
+            self._weight[:kept] = self._weight[:count][keep]
+            self._memory[:kept] = self._memory[:count][keep]
+            self._edge_count = kept
+            self._names = [self._names[i] for i in used]
+            self._ids = {name: i for i, name in enumerate(self._names)}
+            self._invalidate()
+            return removed
+
+    def _invalidate(self) -> None:
+        self._csr = None
+        self._cache.clear()
+        self.version += 1
+
+    def _build_csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Сборка CSR из накопленных ребер с суммированием дубликатов"""
+        n = len(self._names)
+        src = self._src[:self._edge_count]
+        dst = self._dst[:self._edge_count]
+        weight = self._weight[:self._edge_count]
+
+        keys = src.astype(np.int64) * max(n, 1) + dst
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        unique_mask = np.ones(len(keys), dtype=bool)
+        unique_mask[1:] = keys[1:] != keys[:-1]
+        group_starts = np.flatnonzero(unique_mask)
+        weights = np.add.reduceat(weight[order], group_starts) if len(group_starts) else weight[:0]
+        rows = src[order][group_starts]
+        indices = dst[order][group_starts].astype(np.int64)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        # bincount, а не reduceat: у концепций без исходящих ребер пустые строки
+        row_sums = np.bincount(rows, weights=weights, minlength=n)
+        degree = np.repeat(row_sums, np.diff(indptr))
+        normalized = np.divide(weights, degree, out=np.zeros_like(weights), where=degree > 0)
+        return indptr, indices, weights.astype(np.float32), normalized.astype(np.float32)
+
+    def _get_csr(self):
+        if self._csr is None:
+            self._csr = self._build_csr()
+        return self._csr
+
+    def _cached(self, key: Tuple, compute):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+            self.cache_misses += 1
+            result = compute()
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result
+
+    def neighbors(self, concept: str) -> Dict[str, float]:
+        """Прямые соседи концепции с весами связей"""
+        with self._lock:
+            concept_id = self.concept_id(concept)
+            if concept_id is None:
+                return {}
+            indptr, indices, weights, _ = self._get_csr()
+            start, end = indptr[concept_id], indptr[concept_id + 1]
+            return {self._names[i]: float(w) for i, w in zip(indices[start:end], weights[start:end])}
+
+    def bfs(self, seeds: Sequence[str], max_hops: int = 2) -> Dict[str, int]:
+        """Обход в ширину: концепция -> число шагов от ближайшей исходной"""
+        key = ("bfs", tuple(sorted(set(seeds))), max_hops)
+        return self._cached(key, lambda: self._bfs(key[1], max_hops))
+
+    def _bfs(self, seeds: Tuple[str, ...], max_hops: int) -> Dict[str, int]:
+        seed_ids = [i for i in (self.concept_id(s) for s in seeds) if i is not None]
+        if not seed_ids:
+            return {}
+        indptr, indices, _, _ = self._get_csr()
+        distance = np.full(len(self._names), -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(seed_ids, dtype=np.int64))
+        distance[frontier] = 0
+        for hop in range(1, max_hops + 1):
+            positions, _ = _expand(indptr, frontier)
+            reached = np.unique(indices[positions])
+            frontier = reached[distance[reached] < 0]
+            if not len(frontier):
+                break
+            distance[frontier] = hop
+        found = np.flatnonzero(distance >= 0)
+        return {self._names[i]: int(distance[i]) for i in found}
+
+    def spread_activation(self,
+                          seeds: Sequence[str],
+                          max_hops: int = 2,
+                          decay: Optional[float] = None,
+                          threshold: float = 0.01,
+                          top_k: int = 20) -> List[Tuple[str, float]]:
+        """
+        Взвешенное распространение активации от исходных концепций
+
+        На каждом шаге активация узла делится между соседями пропорционально
+        весам связей и ослабляется на decay (по умолчанию association_strength).
+        Узлы с приростом ниже threshold дальше не распространяют активацию.
+
+        Returns:
+            До top_k пар (концепция, активация) по убыванию активации, без исходных
+        """
+        decay = self.association_strength if decay is None else decay
+        key = ("spread", tuple(sorted(set(seeds))), max_hops, decay, threshold, top_k)
+        return self._cached(key, lambda: self._spread(key[1], max_hops, decay, threshold, top_k))
+
+    def _spread(self, seeds, max_hops, decay, threshold, top_k) -> List[Tuple[str, float]]:
+        seed_ids = np.unique(np.asarray(
+            [i for i in (self.concept_id(s) for s in seeds) if i is not None], dtype=np.int64
+        ))
+        if not len(seed_ids):
+            return []
+        n = len(self._names)
+        indptr, indices, _, normalized = self._get_csr()
+        activation = np.zeros(n, dtype=np.float32)
+        delta = np.zeros(n, dtype=np.float32)
+        delta[seed_ids] = 1.0
+        activation += delta
+        for _ in range(max_hops):
+            frontier = np.flatnonzero(delta >= threshold)
+            if not len(frontier):
+                break
+            positions, owner = _expand(indptr, frontier)
+            contributions = delta[frontier][owner] * normalized[positions] * decay
+            delta = np.bincount(indices[positions], weights=contributions, minlength=n).astype(np.float32)
+            activation += delta
+        activation[seed_ids] = 0.0
+        candidates = np.flatnonzero(activation > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-activation[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-activation[candidates], kind="stable")]
+        return [(self._names[i], float(activation[i])) for i in candidates]
+
+    def sync(self, db: Session, chunk_size: int = 1000) -> int:
+        """
+        Синхронизация с таблицей memories: удаление ребер фактов, которых уже
+        нет среди фактов (удалены или понижены забыванием), и догрузка новых
+        фактов по возрастанию id
+
+        Returns:
+            Количество обработанных новых фактов
+        """
+        from database.models import Memory
+
+        present = np.fromiter((memory_id for memory_id, in db.query(Memory.id).filter(
+            Memory.id <= self._watermark,
+            Memory.memory_type.in_(FACT_MEMORY_TYPES)
+        ).yield_per(chunk_size)), dtype=np.int64)
+        with self._lock:
+            loaded = np.unique(self._memory[:self._edge_count])
+        missing = np.setdiff1d(loaded[loaded > 0], present, assume_unique=True)
+        if len(missing):
+            logger.info(f"Граф концепций: удалено ребер забытых фактов {self.remove_memories(missing)}")
+
+        rows = db.query(Memory.id, Memory.content, Memory.importance).filter(
+            Memory.id > self._watermark,
+            Memory.memory_type.in_(FACT_MEMORY_TYPES)
+        ).order_by(Memory.id).yield_per(chunk_size)
+        processed = 0
+        for memory_id, content, importance in rows:
+            self.add_fact(content, importance or 1.0, memory_id)
+            self._watermark = max(self._watermark, memory_id)
+            processed += 1
+        return processed
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер графа и статистика кеша обходов"""
+        return {
+            "concepts": self.concept_count,
+            "edges": self.edge_count,
+            "version": self.version,
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+# Глобальный граф концепций
+knowledge_graph = KnowledgeGraph()
+
+def sync_graph() -> int:
+    """Синхронизация глобального графа концепций с БД в собственной сессии"""
+    from database.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return knowledge_graph.sync(db)
+    finally:
+        db.close()
+
+def sync_job(context) -> int:
+    """Плановая синхронизация графа концепций (задача планировщика)"""
+    return sync_graph()
+
+def register_jobs(scheduler) -> None:
+    """Регистрация задач базы знаний в планировщике"""
+    from core.scheduler import IntervalTrigger
+
+    scheduler.add_job(
+        "knowledge_graph_sync", sync_job,
+        IntervalTrigger(lambda: config_manager.memory.knowledge_base.sync_interval_seconds),
+        module="memory", priority="low"
+    )
@@ -0,0 +1,192 @@
+"""
+Долговременная память: забывание по кривой Эббингауза
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field, asdict
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from core.cache import recall_cache
+from core.config import config_manager
+from database import crud
+from database.models import Memory
+from modules.memory.knowledge_base import knowledge_graph
+from modules.memory.memory_utils import to_epoch
+from modules.memory.tag_index import tag_index
+
+logger = logging.getLogger(__name__)
+
+# Тип, в который переводится память при понижении вместо удаления
+DORMANT_MEMORY_TYPE = crud.DORMANT_MEMORY_TYPE
+
+@dataclass
+class ForgettingReport:
+    """Отчет о проходе забывания"""
+    total: int
+    capacity: int
+    excess: int
+    mode: str
+    dry_run: bool
+    threshold: Optional[float] = None
+    affected_ids: List[int] = field(default_factory=list)
+    affected: int = 0
+    duration_ms: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class ForgettingEngine:
+    """
+    Прореживание долговременной памяти при превышении емкости
+    
+    Учитываются только типы long_term.memory_types: кратковременная память
+    и факты базы знаний живут по своим правилам, понижение переводит запись
+    в тип dormant и выводит ее из-под емкости.
+    
+    Оценка удержания для каждой записи:
+        stability = retention_period * (1 + ln(1 + access_frequency))
+        retention = importance * exp(-age / stability) * (1 + ln(1 + access_frequency))
+    где age - время с последнего обращения (или создания). Оценки считаются
+    векторно по чанкам, потоково читаемым из БД (yield_per); в памяти держатся
+    только excess худших кандидатов.
+    """
+    
+    def __init__(self,
+                 mode: str = "delete",
+                 chunk_size: int = 5000,
+                 batch_size: int = 500):
+        if mode not in ("delete", "demote"):
+            raise ValueError(f"Неизвестный режим забывания: {mode}")
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self._apply_config(config_manager.memory.long_term)
+        config_manager.subscribe("memory", self._on_config_change)
+    
+    def _apply_config(self, config):
+        self.capacity = config.capacity
+        self.retention_period = float(config.retention_period)
+        self.memory_types = tuple(config.memory_types)
+    
+    def _on_config_change(self, new_config, old_config):
+        """Применение новой емкости и периода удержания без перезапуска"""
+        self._apply_config(new_config.long_term)
+    
+    def retention_scores(self,
+                         importance: np.ndarray,
+                         access_frequency: np.ndarray,
+                         age_seconds: np.ndarray) -> np.ndarray:
+        """Векторный расчет оценки удержания"""
+        reinforcement = 1.0 + np.log1p(access_frequency)
+        stability = self.retention_period * reinforcement
+        return importance * np.exp(-age_seconds / stability) * reinforcement
+    
+    def _active_query(self, db: Session):
+        return db.query(Memory).filter(Memory.memory_type.in_(self.memory_types))
+    
+    def _stream_scores(self, db: Session, now: float) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Потоковое чтение памяти и расчет оценок по чанкам"""
+        rows = db.query(
+            Memory.id, Memory.importance, Memory.access_frequency,
+            Memory.last_accessed, Memory.created_at
+        ).filter(Memory.memory_type.in_(self.memory_types)).yield_per(self.chunk_size)
+        
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            ids = np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk))
+            importance = np.fromiter((row[1] or 0.0 for row in chunk), dtype=np.float64, count=len(chunk))
+            frequency = np.fromiter((row[2] or 0 for row in chunk), dtype=np.float64, count=len(chunk))
+            last_seen = np.fromiter(
+                (to_epoch(row[3] or row[4]) for row in chunk), dtype=np.float64, count=len(chunk)
+            )
+            age = np.maximum(now - last_seen, 0.0)
+            yield ids, self.retention_scores(importance, frequency, age)
+    
+    def select_victims(self, db: Session, excess: int, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Выбор excess записей с наименьшей оценкой удержания
+        
+        Returns:
+            (ids, scores), отсортированные по возрастанию оценки
+        """
+        now = now if now is not None else time.time()
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float64)
+        for ids, scores in self._stream_scores(db, now):
+            ids = np.concatenate([best_ids, ids])
+            scores = np.concatenate([best_scores, scores])
+            if len(scores) > excess:
+                keep = np.argpartition(scores, excess - 1)[:excess]
+                ids, scores = ids[keep], scores[keep]
+            best_ids, best_scores = ids, scores
+        order = np.argsort(best_scores, kind="stable")
+        return best_ids[order], best_scores[order]
+    
+    def run(self, db: Session, dry_run: bool = False, now: Optional[float] = None) -> ForgettingReport:
+        """
+        Проход забывания: удаление или понижение наименее удерживаемых записей
+        
+        Args:
+            db: Сессия БД
+            dry_run: Только отчет, без изменений в БД
+            now: Текущее время (epoch seconds), для тестов
+        """
+        started = time.perf_counter()
+        total = self._active_query(db).count()
+        excess = max(total - self.capacity, 0)
+        report = ForgettingReport(
+            total=total, capacity=self.capacity, excess=excess, mode=self.mode, dry_run=dry_run
+        )
+        if excess:
+            ids, scores = self.select_victims(db, excess, now)
+            report.affected_ids = ids.tolist()
+            report.threshold = float(scores[-1]) if len(scores) else None
+            if not dry_run:
+                report.affected = self._apply(db, report.affected_ids)
+                logger.info(
+                    f"Забывание: {report.affected} записей ({self.mode}), "
+                    f"порог удержания {report.threshold:.4f}"
+                )
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        return report
+    
+    def _apply(self, db: Session, memory_ids: List[int]) -> int:
+        affected = 0
+        for start in range(0, len(memory_ids), self.batch_size):
+            batch = memory_ids[start:start + self.batch_size]
+            if self.mode == "delete":
+                affected += crud.crud_memory.delete_many(db, batch)
+                tag_index.remove_memories(batch)
+            else:
+                affected += crud.crud_memory.set_type_many(db, batch, DORMANT_MEMORY_TYPE)
+            knowledge_graph.remove_memories(batch)
+        if affected:
+            recall_cache.invalidate()
+        return affected
+
+# Глобальный экземпляр механизма забывания
+forgetting_engine = ForgettingEngine()
+
+def forgetting_job(context) -> ForgettingReport:
+    """Плановый проход забывания (задача планировщика)"""
+    from database.session import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        return forgetting_engine.run(db)
+    finally:
+        db.close()
+
+def register_jobs(scheduler) -> None:
+    """Регистрация задач долговременной памяти в планировщике"""
+    from core.scheduler import IntervalTrigger
+    
+    scheduler.add_job("forgetting", forgetting_job, IntervalTrigger(86400), module="memory", priority="low")
@@ -0,0 +1,14 @@
+"""
+Вспомогательные функции модуля памяти
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+def to_epoch(moment: Optional[datetime]) -> float:
+    """Перевод даты в epoch seconds; наивные даты считаются UTC"""
+    if moment is None:
+        return 0.0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
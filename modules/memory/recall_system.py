@@ -0,0 +1,280 @@
+"""
+Система припоминания: ранжирование кандидатов и учет обращений к памяти
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from core.config import config_manager
+from modules.memory.knowledge_base import extract_concepts, knowledge_graph
+from modules.memory.memory_utils import to_epoch
+from modules.senses.input_parser import TextInput, input_parser, normalize
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RecallResult:
+    """Результат ранжированного припоминания"""
+    memories: List[Any] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+class RecallRanker:
+    """
+    Ассоциативное припоминание: объединение кандидатов из нескольких источников
+    
+    Кандидаты собираются тремя стадиями:
+        text     - совпадение терминов запроса с содержимым;
+        semantic - концепции, активированные в графе знаний от терминов запроса;
+        context  - концепции последних взаимодействий сессии.
+    Итоговая оценка считается векторно:
+        score = text_weight * text + semantic_weight * semantic
+              + context_weight * context_sensitivity * context + recency_weight * recency
+    и отсекается на relevance_threshold от лучшей оценки. Top-k выбирается
+    через argpartition без полной сортировки кандидатов.
+    """
+    
+    def __init__(self, graph=None):
+        self.graph = graph if graph is not None else knowledge_graph
+    
+    def rank(self,
+             db: Session,
+             query: TextInput,
+             memory_type: Optional[str] = None,
+             limit: int = 10,
+             memory_ids: Optional[List[int]] = None,
+             session_id: Optional[str] = None,
+             now: Optional[float] = None) -> RecallResult:
+        """
+        Ранжированный поиск памяти
+        
+        Args:
+            db: Сессия БД
+            query: Запрос (текст или разобранный ввод)
+            memory_type: Фильтр по типу памяти
+            limit: Количество результатов
+            memory_ids: Ограничение поиска заданными записями (например, по тегам)
+            session_id: Сессия, последние взаимодействия которой задают контекст
+            now: Текущее время (epoch seconds), для тестов
+        """
+        config = config_manager.memory.recall
+        result = RecallResult()
+        candidates: Dict[int, Any] = {}
+        
+        def stage(name, fetch):
+            started = time.perf_counter()
+            found = fetch()
+            for memory in found:
+                candidates.setdefault(memory.id, memory)
+            result.stages[name] = {
+                "candidates": len(found),
+                "ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+        
+        parsed = input_parser.parse(query)
+        terms = list(dict.fromkeys(parsed.concepts)) or [parsed.normalized.strip()]
+        stage("text", lambda: _search(db, terms, memory_type, config.candidate_limit, memory_ids))
+        
+        activation: Dict[str, float] = {}
+        def fetch_semantic():
+            activation.update(self.graph.spread_activation(terms, decay=config.association_strength))
+            concepts = [c for c in activation if c not in terms]
+            return _search(db, concepts, memory_type, config.candidate_limit, memory_ids)
+        stage("semantic", fetch_semantic)
+        
+        context_terms: List[str] = []
+        def fetch_context():
+            if not session_id or config.context_sensitivity <= 0:
+                return []
+            context_terms.extend(self._context_terms(db, session_id, config.context_window, terms))
+            return _search(db, context_terms, memory_type, config.candidate_limit, memory_ids)
+        stage("context", fetch_context)
+        
+        started = time.perf_counter()
+        if candidates:
+            memories = list(candidates.values())
+            scores = self._score(memories, parsed.normalized.strip(), terms, activation, context_terms, config, now)
+            keep = np.flatnonzero(scores >= config.relevance_threshold * scores.max())
+            if len(keep) > limit:
+                keep = keep[np.argpartition(-scores[keep], limit - 1)[:limit]]
+            keep = keep[np.argsort(-scores[keep], kind="stable")]
+            result.memories = [memories[i] for i in keep]
+            result.scores = [float(scores[i]) for i in keep]
+        result.stages["scoring"] = {
+            "candidates": len(candidates),
+            "ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        return result
+    
+    def _context_terms(self, db: Session, session_id: str, window: int, exclude: List[str]) -> List[str]:
+        """Концепции последних взаимодействий сессии, кроме терминов запроса"""
+        from database import crud
+        
+        interactions = crud.crud_interaction.get_recent_session_interactions(db, session_id, window)
+        concepts = []
+        for interaction in interactions:
+            concepts.extend(extract_concepts(interaction.user_input))
+        return [c for c in dict.fromkeys(concepts) if c not in exclude][:20]
+    
+    def _score(self, memories, phrase, terms, activation, context_terms, config, now) -> np.ndarray:
+        """Векторный расчет итоговых оценок кандидатов"""
+        contents = np.array([normalize(memory.content) for memory in memories], dtype=str)
+        
+        term_hits = _match_matrix(contents, terms)
+        text = term_hits.mean(axis=0)
+        if phrase:
+            text = np.maximum(text, (np.char.find(contents, phrase) >= 0).astype(np.float64))
+        
+        semantic = np.zeros(len(memories))
+        if activation:
+            concepts = list(activation)
+            weights = np.fromiter(activation.values(), dtype=np.float64, count=len(concepts))
+            semantic = _normalize(weights @ _match_matrix(contents, concepts))
+        
+        context = np.zeros(len(memories))
+        if context_terms:
+            context = _normalize(_match_matrix(contents, context_terms).sum(axis=0))
+        
+        now = now if now is not None else time.time()
+        seen = np.fromiter(
+            (to_epoch(memory.last_accessed or memory.created_at) for memory in memories),
+            dtype=np.float64, count=len(memories)
+        )
+        recency = np.power(0.5, np.maximum(now - seen, 0.0) / max(config.recency_half_life, 1))
+        
+        return (config.text_weight * text
+                + config.semantic_weight * semantic
+                + config.context_weight * config.context_sensitivity * context
+                + config.recency_weight * recency)
+
+def _search(db: Session, terms: List[str], memory_type, limit: int, memory_ids) -> List[Any]:
+    """Кандидаты, содержащие хотя бы один из терминов"""
+    from database import crud
+    return crud.crud_memory.search_any(db, terms, memory_type, limit, memory_ids) if terms else []
+
+def _match_matrix(contents: np.ndarray, terms: List[str]) -> np.ndarray:
+    """Матрица вхождений термин x кандидат: поиск подстрок по всей матрице одним np.char.find"""
+    return (np.char.find(contents[None, :], np.array(terms, dtype=str)[:, None]) >= 0).astype(np.float64)
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    peak = values.max() if len(values) else 0.0
+    return values / peak if peak > 0 else values
+
+class MemoryAccessTracker:
+    """
+    Учет обращений к памяти без записи в БД на пути припоминания
+    
+    Попадания копятся в словаре memory_id -> (число обращений, время последнего),
+    фоновый поток периодически сбрасывает их пакетами через
+    CRUDMemory.record_access_batch (один UPDATE ... FROM (VALUES ...) на пакет).
+    """
+    
+    def __init__(self,
+                 session_factory: Optional[Callable] = None,
+                 flush_interval: float = 5.0,
+                 batch_size: int = 500,
+                 autostart: bool = True):
+        self._session_factory = session_factory
+        self.autostart = autostart
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[int, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushed_total = 0
+    
+    def record(self, memory_ids: Iterable[int]) -> None:
+        """Регистрация обращений к памяти (только в памяти процесса)"""
+        now = datetime.utcnow()
+        with self._lock:
+            pending = self._pending
+            for memory_id in memory_ids:
+                count, _ = pending.get(memory_id, (0, now))
+                pending[memory_id] = (count + 1, now)
+        if self._thread is None and self.autostart:
+            self.start()
+    
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+    
+    def flush(self) -> int:
+        """
+        Сброс накопленных обращений в БД
+        
+        Returns:
+            Количество обновленных записей
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            
+            from database import crud
+            db = self._get_session()
+            updated = 0
+            items = list(pending.items())
+            try:
+                for start in range(0, len(items), self.batch_size):
+                    batch = dict(items[start:start + self.batch_size])
+                    updated += crud.crud_memory.record_access_batch(db, batch)
+                    for memory_id in batch:
+                        pending.pop(memory_id)
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить обращения к памяти: {e}")
+                db.rollback()
+                self._merge_back(pending)
+            finally:
+                db.close()
+            self.flushed_total += updated
+            return updated
+    
+    def _merge_back(self, pending: Dict[int, Tuple[int, datetime]]) -> None:
+        """Возврат несохраненных обращений для следующей попытки"""
+        with self._lock:
+            for memory_id, (count, accessed_at) in pending.items():
+                current_count, current_at = self._pending.get(memory_id, (0, accessed_at))
+                self._pending[memory_id] = (current_count + count, max(current_at, accessed_at))
+    
+    def _get_session(self):
+        if self._session_factory is None:
+            from database.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+    
+    def start(self) -> None:
+        """Запуск фонового сброса"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="memory-access-flusher", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Остановка фонового сброса с финальным сбросом накопленного"""
+        thread, self._thread = self._thread, None
+        self._stop_event.set()
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+# Глобальный экземпляр учета обращений к памяти
+memory_access_tracker = MemoryAccessTracker()
+
+# Глобальный ранжировщик припоминания
+recall_ranker = RecallRanker()
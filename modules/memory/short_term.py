@@ -0,0 +1,65 @@
+"""
+Кратковременная память: ограниченный буфер последних элементов с затуханием
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from core.config import config_manager
+
+class ShortTermMemory:
+    """
+    Кратковременная память фиксированной емкости
+    
+    Емкость, скорость затухания и порог консолидации берутся из memory_config.json
+    и применяются на лету при изменении конфигурации.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items: deque = deque()
+        self._apply_config(config_manager.memory.short_term)
+        config_manager.subscribe("memory", self._on_config_change)
+    
+    def _apply_config(self, config):
+        with self._lock:
+            self.capacity = config.capacity
+            self.decay_rate = config.decay_rate
+            self.consolidation_threshold = config.consolidation_threshold
+            self._items = deque(self._items, maxlen=self.capacity)
+    
+    def _on_config_change(self, new_config, old_config):
+        """Применение новой версии конфигурации памяти без перезапуска"""
+        self._apply_config(new_config.short_term)
+    
+    def add(self, content: Any, importance: float = 0.5, context: Optional[Dict[str, Any]] = None) -> None:
+        """Добавление элемента; при переполнении вытесняется самый старый"""
+        with self._lock:
+            self._items.append({
+                "content": content,
+                "importance": importance,
+                "context": context or {},
+                "timestamp": datetime.utcnow()
+            })
+    
+    def decay(self) -> None:
+        """Ослабление важности всех элементов на decay_rate"""
+        with self._lock:
+            for item in self._items:
+                item["importance"] *= (1.0 - self.decay_rate)
+    
+    def get_consolidation_candidates(self) -> List[Dict[str, Any]]:
+        """Элементы, достаточно важные для переноса в долговременную память"""
+        with self._lock:
+            return [item for item in self._items if item["importance"] >= self.consolidation_threshold]
+    
+    def get_recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Последние элементы, начиная с самых новых"""
+        with self._lock:
+            items = list(reversed(self._items))
+        return items[:limit] if limit else items
+    
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,153 @@
+"""
+Индекс тегов памяти: тег -> отсортированный массив memory_id
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+class TagIndex:
+    """
+    Инвертированный индекс тегов в памяти процесса
+    
+    Для каждого тега хранится отсортированный массив memory_id (int64).
+    Запросы AND отвечаются пересечением массивов, начиная с самого короткого,
+    OR - объединением. Новые связи сначала копятся в буфере и сливаются с
+    массивом при первом обращении к тегу.
+    
+    Синхронизация с таблицей memory_tags инкрементальная: связи читаются
+    страницами по возрастанию пары (memory_id, tag_id), связи одной памяти
+    могут занимать несколько страниц. Память и ее теги сохраняются разными
+    транзакциями, а параллельные сохранения фиксируются не по порядку id,
+    поэтому каждая синхронизация перечитывает связи последних RESYNC_WINDOW
+    memory_id до отметки и добавляет только отсутствующие в индексе.
+    """
+    
+    # Порог накопленных удалений, после которого они вычищаются из массивов
+    COMPACT_THRESHOLD = 10000
+    # Сколько memory_id до отметки синхронизации перечитывается каждый раз
+    RESYNC_WINDOW = 1000
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[int, np.ndarray] = {}
+        self._pending: Dict[int, List[int]] = {}
+        self._removed = np.empty(0, dtype=np.int64)
+        # Последняя синхронизированная связь (memory_id, tag_id)
+        self._watermark: Tuple[int, int] = (0, 0)
+    
+    @property
+    def watermark(self) -> Tuple[int, int]:
+        return self._watermark
+    
+    def add(self, memory_id: int, tag_ids: Iterable[int]) -> None:
+        """Добавление связей памяти с тегами"""
+        with self._lock:
+            if len(self._removed):
+                # SQLite может переиспользовать id удаленной записи
+                self._removed = self._removed[self._removed != memory_id]
+            for tag_id in tag_ids:
+                self._pending.setdefault(tag_id, []).append(memory_id)
+    
+    def remove_memories(self, memory_ids: Iterable[int]) -> None:
+        """Исключение удаленной памяти из индекса"""
+        removed = np.fromiter(memory_ids, dtype=np.int64)
+        if not len(removed):
+            return
+        with self._lock:
+            self._removed = np.union1d(self._removed, removed)
+            if len(self._removed) >= self.COMPACT_THRESHOLD:
+                self._compact()
+    
+    def _compact(self) -> None:
+        for tag_id in list(self._pending):
+            self._postings_for(tag_id)
+        for tag_id, postings in self._postings.items():
+            self._postings[tag_id] = np.setdiff1d(postings, self._removed, assume_unique=True)
+        self._removed = np.empty(0, dtype=np.int64)
+    
+    def _postings_for(self, tag_id: int) -> np.ndarray:
+        postings = self._postings.get(tag_id)
+        pending = self._pending.pop(tag_id, None)
+        if pending:
+            pending = np.asarray(pending, dtype=np.int64)
+            postings = np.union1d(postings, pending) if postings is not None else np.unique(pending)
+            self._postings[tag_id] = postings
+        return postings if postings is not None else np.empty(0, dtype=np.int64)
+    
+    def query(self, tag_ids: List[Optional[int]], mode: str = "and") -> np.ndarray:
+        """
+        Поиск памяти по набору тегов
+        
+        Args:
+            tag_ids: Идентификаторы тегов; None - неизвестный тег
+            mode: "and" - все теги, "or" - любой из тегов
+        
+        Returns:
+            Отсортированный массив memory_id
+        """
+        with self._lock:
+            if mode == "and":
+                if not tag_ids or any(tag_id is None for tag_id in tag_ids):
+                    return np.empty(0, dtype=np.int64)
+                postings = sorted((self._postings_for(tag_id) for tag_id in set(tag_ids)), key=len)
+                result = postings[0]
+                for other in postings[1:]:
+                    if not len(result):
+                        break
+                    result = np.intersect1d(result, other, assume_unique=True)
+            else:
+                postings = [self._postings_for(tag_id) for tag_id in set(tag_ids) if tag_id is not None]
+                result = np.unique(np.concatenate(postings)) if postings else np.empty(0, dtype=np.int64)
+            if len(self._removed) and len(result):
+                result = result[~np.isin(result, self._removed, assume_unique=True)]
+            return result
+    
+    def sync(self, db: Session, batch_size: int = 10000) -> int:
+        """
+        Догрузка новых связей из memory_tags
+        
+        Returns:
+            Количество загруженных связей, которых не было в индексе
+        """
+        from database import crud
+        
+        loaded = 0
+        cursor = (max(self._watermark[0] - self.RESYNC_WINDOW, 0), 0)
+        while True:
+            links = crud.crud_tag.get_links_after(db, cursor[0], cursor[1], batch_size)
+            if not links:
+                return loaded
+            by_tag: Dict[int, List[int]] = {}
+            for memory_id, tag_id in links:
+                by_tag.setdefault(tag_id, []).append(memory_id)
+            with self._lock:
+                for tag_id, memory_ids in by_tag.items():
+                    memory_ids = np.asarray(memory_ids, dtype=np.int64)
+                    fresh = memory_ids[~np.isin(memory_ids, self._postings_for(tag_id), assume_unique=True)]
+                    if len(fresh):
+                        self._pending.setdefault(tag_id, []).extend(fresh.tolist())
+                        loaded += len(fresh)
+                cursor = tuple(links[-1])
+                self._watermark = max(self._watermark, cursor)
+            if len(links) < batch_size:
+                return loaded
+    
+    def stats(self) -> Dict[str, int]:
+        """Размер индекса"""
+        with self._lock:
+            return {
+                "tags": len(set(self._postings) | set(self._pending)),
+                "links": int(sum(len(p) for p in self._postings.values()) +
+                             sum(len(p) for p in self._pending.values())),
+                "removed": int(len(self._removed)),
+                "watermark": self._watermark[0],
+            }
+
+# Глобальный индекс тегов памяти
+tag_index = TagIndex()
@@ -1,8 +1,21 @@
+from core.config import config_manager
+
 class MoodStateManager:
     def __init__(self):
         self.current_mood = "neutral"
         self.mood_intensity = 0.5
         self.mood_history = []
+        self._apply_config(config_manager.mood)
+        config_manager.subscribe("mood", self._on_config_change)
+    
+    def _apply_config(self, config):
+        self.base_states = config.base_states
+        self.decay_rate = config.decay_rate
+        self.intensity_threshold = config.intensity_threshold
+    
+    def _on_config_change(self, new_config, old_config):
+        """Применение новой версии конфигурации настроения без перезапуска"""
+        self._apply_config(new_config)
     
     def update_mood(self, new_mood, intensity=0.5, reason=None):
         self.current_mood = new_mood
@@ -35,4 +48,4 @@ class MoodStateManager:
                 return "improving"
             elif recent_moods[-1] < recent_moods[0]:
                 return "declining"
-        return "stable"
\ No newline at end of file
+        return "stable"
@@ -0,0 +1,239 @@
+"""
+Черты личности (Big Five): вектор значений с версией и постепенным дрейфом
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Union
+
+import numpy as np
+
+from core.config import config_manager
+from core.exceptions import ModuleExecutionError
+
+logger = logging.getLogger(__name__)
+
+# Порядок черт в векторе
+BIG_FIVE = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+TRAIT_INDEX = {name: index for index, name in enumerate(BIG_FIVE)}
+DEFAULT_TRAIT_VALUE = 0.5
+
+@dataclass(frozen=True)
+class TraitSnapshot:
+    """
+    Неизменяемый снимок черт личности определенной версии
+
+    values - вектор float32 в порядке BIG_FIVE только для чтения; снимок
+    разделяется всеми читателями до следующего изменения черт.
+    """
+    version: int
+    values: np.ndarray
+
+    def __getitem__(self, trait: str) -> float:
+        return float(self.values[TRAIT_INDEX[trait]])
+
+    def get(self, trait: str, default: float = DEFAULT_TRAIT_VALUE) -> float:
+        index = TRAIT_INDEX.get(trait)
+        return default if index is None else float(self.values[index])
+
+    def to_dict(self) -> Dict[str, float]:
+        return {name: round(float(value), 4) for name, value in zip(BIG_FIVE, self.values)}
+
+def _frozen(values: np.ndarray) -> np.ndarray:
+    values = np.clip(values, 0.0, 1.0).astype(np.float32)
+    values.flags.writeable = False
+    return values
+
+def trait_vector(values: Mapping[str, float], default: float = DEFAULT_TRAIT_VALUE) -> np.ndarray:
+    """
+    Вектор черт в порядке BIG_FIVE из словаря имя -> значение
+
+    Raises:
+        ModuleExecutionError: Неизвестная черта
+    """
+    vector = np.full(len(BIG_FIVE), default, dtype=np.float32)
+    for name, value in values.items():
+        if name not in TRAIT_INDEX:
+            raise ModuleExecutionError("personality", "trait_vector", f"неизвестная черта {name}")
+        vector[TRAIT_INDEX[name]] = float(value)
+    return vector
+
+class PersonalityTraits:
+    """
+    Модель черт личности
+
+    Каждое изменение создает новый снимок с увеличенной версией, поэтому
+    чтение (механизм принятия решений, стиль общения) - одно обращение к
+    атрибуту без блокировок и копирования. Измененные черты сохраняются
+    отложенно: все изменения за persist_debounce_seconds записываются одним
+    пакетом через CRUDPersonality.upsert_traits.
+    """
+
+    def __init__(self,
+                 session_factory: Optional[Callable] = None,
+                 config_provider: Optional[Callable] = None,
+                 autopersist: bool = True):
+        self._session_factory = session_factory
+        self._config_provider = config_provider or (lambda: config_manager.personality)
+        self.autopersist = autopersist
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.persisted_total = 0
+        self._baseline = _frozen(trait_vector(self.config.baseline))
+        self._snapshot = TraitSnapshot(0, self._baseline)
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def snapshot(self) -> TraitSnapshot:
+        """Текущий снимок черт (общий для всех читателей)"""
+        return self._snapshot
+
+    def _publish(self, values: np.ndarray) -> TraitSnapshot:
+        """Подмена снимка новой версией; вызывается под блокировкой"""
+        snapshot = TraitSnapshot(self._snapshot.version + 1, _frozen(values))
+        self._snapshot = snapshot
+        self._dirty = True
+        self._schedule_persist()
+        return snapshot
+
+    def set_trait(self, trait: str, value: float) -> TraitSnapshot:
+        """
+        Установка значения черты
+
+        Raises:
+            ModuleExecutionError: Неизвестная черта
+        """
+        index = TRAIT_INDEX.get(trait)
+        if index is None:
+            raise ModuleExecutionError("personality", "set_trait", f"неизвестная черта {trait}")
+        with self._lock:
+            values = self._snapshot.values.copy()
+            values[index] = value
+            return self._publish(values)
+
+    def apply_drift(self, signal: Union[Mapping[str, float], np.ndarray], weight: float = 1.0) -> TraitSnapshot:
+        """
+        Постепенный дрейф черт под влиянием опыта
+
+        Каждая черта смещается на drift_rate * weight * signal, но не более
+        чем на max_drift_step за одно обновление.
+
+        Args:
+            signal: Направление изменения по чертам (словарь или вектор BIG_FIVE),
+                обычно в диапазоне [-1, 1]
+            weight: Значимость опыта
+
+        Raises:
+            ModuleExecutionError: Неизвестная черта или вектор не той длины
+        """
+        config = self.config
+        vector = trait_vector(signal, 0.0) if isinstance(signal, Mapping) else np.asarray(signal, dtype=np.float32)
+        if vector.shape != (len(BIG_FIVE),):
+            raise ModuleExecutionError(
+                "personality", "apply_drift", f"вектор дрейфа формы {vector.shape}, ожидается ({len(BIG_FIVE)},)"
+            )
+        step = np.clip(vector * (config.drift_rate * weight), -config.max_drift_step, config.max_drift_step)
+        if not np.any(step):
+            return self._snapshot
+        with self._lock:
+            return self._publish(self._snapshot.values + step)
+
+    def load(self, db=None) -> TraitSnapshot:
+        """
+        Загрузка черт из БД
+
+        Черты, которых нет в БД, берутся из personality.baseline.
+        """
+        from database import crud
+
+        own_session = db is None
+        db = self._get_session() if own_session else db
+        try:
+            stored = {name: value for name, value in crud.crud_personality.get_traits(db).items() if name in TRAIT_INDEX}
+            baselines = {name: value for name, value in crud.crud_personality.get_baselines(db).items() if name in TRAIT_INDEX}
+        finally:
+            if own_session:
+                db.close()
+        with self._lock:
+            self._baseline = _frozen(trait_vector({**self.config.baseline, **baselines}))
+            values = self._baseline.copy()
+            for name, value in stored.items():
+                values[TRAIT_INDEX[name]] = value
+            self._snapshot = TraitSnapshot(self._snapshot.version + 1, _frozen(values))
+            self._dirty = len(stored) < len(BIG_FIVE)
+        logger.info(f"Черты личности загружены: {self._snapshot.to_dict()}")
+        return self._snapshot
+
+    def flush(self) -> int:
+        """
+        Сохранение текущих значений черт одним пакетом
+
+        Returns:
+            Количество сохраненных черт (0, если изменений не было)
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                snapshot, baseline = self._snapshot, self._baseline
+                self._dirty = False
+
+            from database import crud
+            db = self._get_session()
+            try:
+                saved = crud.crud_personality.upsert_traits(
+                    db, dict(zip(BIG_FIVE, snapshot.values.tolist())), dict(zip(BIG_FIVE, baseline.tolist()))
+                )
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить черты личности: {e}")
+                db.rollback()
+                with self._lock:
+                    self._dirty = True
+                return 0
+            finally:
+                db.close()
+            self.persisted_total += saved
+            return saved
+
+    def _schedule_persist(self) -> None:
+        """Отложенное сохранение: изменения внутри окна объединяются в одну запись"""
+        if not self.autopersist or self._timer is not None:
+            return
+        self._timer = threading.Timer(self.config.persist_debounce_seconds, self._persist)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _persist(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _get_session(self):
+        if self._session_factory is None:
+            from database.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def stop(self) -> None:
+        """Отмена отложенного сохранения с финальным сбросом изменений"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+# Глобальная модель черт личности
+personality = PersonalityTraits()
@@ -1,7 +1,29 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from core.config import config_manager
+from modules.personality.traits import personality
+from modules.psyche.decision_making import decision_engine
+
+logger = logging.getLogger(__name__)
+
 class Consciousness:
     def __init__(self):
         self.self_awareness_level = 0.1
         self.reflection_capability = 0.1
+        self._apply_config(config_manager.psyche.consciousness)
+        config_manager.subscribe("psyche", self._on_config_change)
+    
+    def _apply_config(self, config):
+        self.max_awareness_level = config.self_awareness_level
+        self.reflection_interval = config.reflection_interval_seconds
+        self.introspection_depth = config.introspection_depth
+    
+    def _on_config_change(self, new_config, old_config):
+        """Применение новой версии конфигурации психики без перезапуска"""
+        self._apply_config(new_config.consciousness)
     
     def reflect(self, current_state):
         """Базовая рефлексия"""
@@ -13,24 +35,77 @@ class Consciousness:
     
     def update_awareness(self, experience):
         """Обновление уровня самосознания"""
-        self.self_awareness_level = min(1.0, self.self_awareness_level + 0.01)
+        self.self_awareness_level = min(self.max_awareness_level, self.self_awareness_level + 0.01)
         return self.self_awareness_level
 
 class Subconscious:
     def __init__(self):
-        self.background_processes = []
+        self._lock = threading.Lock()
+        self.background_processes = deque()
+        self.dropped = 0
+        self.completed = 0
+        self._apply_config(config_manager.psyche.subconscious)
+        config_manager.subscribe("psyche", self._on_config_change)
+    
+    def _apply_config(self, config):
+        with self._lock:
+            self.config = config
+            self.background_processes = deque(self.background_processes, maxlen=config.max_background_processes)
+    
+    def _on_config_change(self, new_config, old_config):
+        self._apply_config(new_config.subconscious)
     
     def add_process(self, process):
-        self.background_processes.append(process)
-        return len(self.background_processes)
+        """Постановка фонового процесса в очередь; при переполнении вытесняется самый старый"""
+        with self._lock:
+            if len(self.background_processes) == self.background_processes.maxlen:
+                self.dropped += 1
+            self.background_processes.append(process)
+            return len(self.background_processes)
+    
+    def run_pending(self, cpu_deadline=None):
+        """
+        Выполнение накопленных процессов (вызываемых объектов)
+        
+        Args:
+            cpu_deadline: Предел time.thread_time(), после которого остальные
+                процессы остаются в очереди до следующего запуска
+        
+        Returns:
+            Количество выполненных процессов
+        """
+        executed = 0
+        while cpu_deadline is None or time.thread_time() < cpu_deadline:
+            with self._lock:
+                if not self.background_processes:
+                    break
+                process = self.background_processes.popleft()
+            if callable(process):
+                try:
+                    process()
+                except Exception as e:
+                    logger.error(f"Ошибка фонового процесса: {e}")
+            executed += 1
+        self.completed += executed
+        return executed
 
 class DecisionMaker:
+    def __init__(self, engine=None):
+        self.engine = engine or decision_engine
+    
     def make_decision(self, options, context=None):
-        """Принятие решений на основе контекста"""
-        if not options:
-            return None
-        return {
-            "decision": options[0],
-            "confidence": 0.5,
-            "reasoning": "Basic decision making"
-        }
\ No newline at end of file
+        """
+        Принятие решений на основе контекста
+        
+        Варианты оцениваются по признакам rational/emotional/intuitive с весами,
+        учитывающими текущие черты личности; context может содержать готовую
+        матрицу признаков ("features") и снимок черт ("traits").
+        """
+        context = context or {}
+        traits = context.get("traits") or personality.snapshot()
+        decision = self.engine.decide(options, context.get("features"), traits)
+        return decision.to_dict() if decision else None
+
+# Глобальные экземпляры сознания и подсознания
+consciousness = Consciousness()
+subconscious = Subconscious()
@@ -0,0 +1,189 @@
+"""
+Принятие решений: векторная оценка вариантов по рациональному, эмоциональному и интуитивному признакам
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from core.config import config_manager
+from modules.personality.traits import TraitSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Столбцы матрицы признаков вариантов
+FEATURES = ("rational", "emotional", "intuitive")
+
+# Влияние черт личности (столбцы BIG_FIVE) на веса признаков (строки FEATURES)
+TRAIT_INFLUENCE = np.array([
+    # openness, conscientiousness, extraversion, agreeableness, neuroticism
+    [0.0, 1.0, 0.0, 0.0, -0.5],
+    [0.0, 0.0, 0.0, 0.5, 1.0],
+    [1.0, 0.0, 0.5, 0.0, 0.0],
+], dtype=np.float32)
+
+@dataclass
+class Decision:
+    """Решение по одному набору вариантов"""
+    # None, если уверенность ниже confidence_threshold
+    decision: Any
+    index: int
+    confidence: float
+    accepted: bool
+    scores: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "decision": self.decision,
+            "confidence": self.confidence,
+            "accepted": self.accepted,
+            "reasoning": (
+                f"Вариант {self.index} выбран с уверенностью {self.confidence:.2f}"
+                if self.accepted else
+                f"Уверенность {self.confidence:.2f} ниже порога, решение отложено"
+            ),
+        }
+
+@dataclass
+class BatchDecision:
+    """Решения по пакету наборов вариантов (строка - набор)"""
+    best: np.ndarray
+    confidence: np.ndarray
+    accepted: np.ndarray
+    scores: np.ndarray
+
+def feature_matrix(options: Sequence[Any]) -> np.ndarray:
+    """
+    Матрица признаков (варианты x FEATURES)
+
+    Вариант - словарь или объект с числовыми полями rational/emotional/intuitive;
+    отсутствующие признаки равны 0.
+    """
+    matrix = np.zeros((len(options), len(FEATURES)), dtype=np.float32)
+    for row, option in enumerate(options):
+        getter = option.get if isinstance(option, Mapping) else (lambda name, default: getattr(option, name, default))
+        for column, name in enumerate(FEATURES):
+            matrix[row, column] = float(getter(name, 0.0) or 0.0)
+    return matrix
+
+def softmax(scores: np.ndarray, temperature: float, axis: int = -1) -> np.ndarray:
+    """Устойчивый softmax с температурой; -inf дает нулевую вероятность"""
+    scaled = scores / max(temperature, 1e-6)
+    peak = scaled.max(axis=axis, keepdims=True)
+    exp = np.exp(scaled - np.where(np.isfinite(peak), peak, 0.0))
+    total = exp.sum(axis=axis, keepdims=True)
+    return np.divide(exp, total, out=np.zeros_like(exp), where=total > 0)
+
+class DecisionEngine:
+    """
+    Механизм принятия решений
+
+    Оценка варианта - скалярное произведение его признаков на вектор весов
+    (rationality_weight, emotional_weight, intuitive_weight); уверенность -
+    вероятность лучшего варианта по softmax с температурой temperature.
+    Решение принимается, только если уверенность не ниже confidence_threshold.
+    Снимок черт личности масштабирует веса с силой personality_influence
+    (нейтральная личность 0.5 по всем чертам веса не меняет).
+    """
+
+    def __init__(self, config_provider: Callable = None):
+        self._config_provider = config_provider or (lambda: config_manager.psyche.decision_making)
+        self._lock = threading.Lock()
+        self._apply_config(self._config_provider())
+        if config_provider is None:
+            config_manager.subscribe("psyche", self._on_config_change)
+
+    def _apply_config(self, config):
+        weights = np.array(
+            [config.rationality_weight, config.emotional_weight, config.intuitive_weight], dtype=np.float32
+        )
+        with self._lock:
+            self.config = config
+            self.weights = weights
+            self._trait_weights = (None, weights)
+
+    def _on_config_change(self, new_config, old_config):
+        """Новые веса применяются без перезапуска"""
+        self._apply_config(new_config.decision_making)
+
+    def weights_for(self, traits: Optional[TraitSnapshot] = None) -> np.ndarray:
+        """Веса признаков с учетом черт личности (пересчитываются при смене версии снимка)"""
+        if traits is None:
+            return self.weights
+        key, weights = self._trait_weights
+        if key == (traits.version, id(self.weights)):
+            return weights
+        centered = 2.0 * (traits.values - 0.5)
+        scale = 1.0 + self.config.personality_influence * (TRAIT_INFLUENCE @ centered)
+        weights = (self.weights * np.maximum(scale, 0.0)).astype(np.float32)
+        self._trait_weights = ((traits.version, id(self.weights)), weights)
+        return weights
+
+    def score(self, features: np.ndarray, traits: Optional[TraitSnapshot] = None) -> np.ndarray:
+        """Оценки вариантов: features (..., FEATURES) @ weights"""
+        return np.asarray(features, dtype=np.float32) @ self.weights_for(traits)
+
+    def decide(self, options: Sequence[Any], features: Optional[np.ndarray] = None,
+               traits: Optional[TraitSnapshot] = None) -> Optional[Decision]:
+        """
+        Выбор лучшего варианта
+
+        Args:
+            options: Варианты решения
+            features: Готовая матрица признаков (иначе строится из options)
+            traits: Снимок черт личности (None - без учета личности)
+        """
+        if not len(options):
+            return None
+        config = self.config
+        scores = self.score(feature_matrix(options) if features is None else features, traits)
+        probabilities = softmax(scores, config.temperature)
+        best = int(np.argmax(probabilities))
+        confidence = float(probabilities[best])
+        accepted = confidence >= config.confidence_threshold
+        return Decision(
+            decision=options[best] if accepted else None,
+            index=best,
+            confidence=round(confidence, 4),
+            accepted=accepted,
+            scores=scores.tolist(),
+        )
+
+    def rank_batch(self, features: np.ndarray, mask: Optional[np.ndarray] = None,
+                   traits: Optional[TraitSnapshot] = None) -> BatchDecision:
+        """
+        Ранжирование кандидатов для пакета сообщений одним вычислением
+
+        Args:
+            features: Массив (сообщения x кандидаты x FEATURES)
+            mask: Булев массив (сообщения x кандидаты); False - пустая позиция
+                выравнивания, не участвующая в выборе
+            traits: Снимок черт личности (None - без учета личности)
+        """
+        config = self.config
+        scores = self.score(features, traits)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        probabilities = softmax(scores, config.temperature, axis=1)
+        best = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(best)), best]
+        return BatchDecision(
+            best=best,
+            confidence=confidence,
+            accepted=confidence >= config.confidence_threshold,
+            scores=scores,
+        )
+
+    def top_k(self, features: np.ndarray, k: int) -> np.ndarray:
+        """Индексы k лучших кандидатов по убыванию оценки"""
+        scores = self.score(features)
+        if k >= len(scores):
+            return np.argsort(-scores, kind="stable")
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+# Глобальный механизм принятия решений
+decision_engine = DecisionEngine()
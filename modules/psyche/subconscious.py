@@ -0,0 +1,42 @@
+"""
+Фоновые задачи психики: периодическая рефлексия и подсознательные процессы
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from core.config import config_manager
+from core.scheduler import IntervalTrigger, JobContext
+from core.state_manager import state_manager
+from modules.psyche.consciousness import consciousness, subconscious
+
+logger = logging.getLogger(__name__)
+
+def reflect_job(context: JobContext) -> Dict[str, Any]:
+    """Периодическая рефлексия по текущему состоянию системы"""
+    state = state_manager.get_full_state()
+    reflection = consciousness.reflect(state)
+    if state.get("last_interaction"):
+        consciousness.update_awareness(state["last_interaction"])
+    state_manager.set_state("last_reflection", {**reflection, "timestamp": datetime.utcnow().isoformat()})
+    return reflection
+
+def subconscious_job(context: JobContext) -> int:
+    """Выполнение накопленных подсознательных процессов в пределах бюджета задачи"""
+    if not config_manager.psyche.subconscious.background_processing:
+        return 0
+    return subconscious.run_pending(context.cpu_deadline)
+
+def register_jobs(scheduler) -> None:
+    """Регистрация задач психики в планировщике"""
+    scheduler.add_job(
+        "reflection", reflect_job,
+        IntervalTrigger(lambda: config_manager.psyche.consciousness.reflection_interval_seconds),
+        module="psyche", priority="low"
+    )
+    scheduler.add_job(
+        "subconscious", subconscious_job,
+        IntervalTrigger(lambda: config_manager.psyche.subconscious.process_interval_seconds),
+        module="psyche", priority="low"
+    )
@@ -0,0 +1,60 @@
+"""
+Поведенческие реакции: действия, выполняемые по сработавшим правилам
+"""
+
+import logging
+from typing import Callable, Dict, List, Mapping, Sequence
+
+from modules.reactions.reaction_triggers import Reaction
+
+logger = logging.getLogger(__name__)
+
+class BehavioralResponder:
+    """
+    Выполнение поведенческих реакций
+
+    Действие правила ({"type": "behavioral", "action": ...}) ищется в реестре
+    обработчиков; модули добавляют свои действия через register.
+    """
+
+    def __init__(self):
+        self._actions: Dict[str, Callable[[Mapping], None]] = {}
+
+    def register(self, action: str, handler: Callable[[Mapping], None]) -> None:
+        self._actions[action] = handler
+
+    @property
+    def actions(self) -> List[str]:
+        return sorted(self._actions)
+
+    def apply(self, reactions: Sequence[Reaction]) -> List[str]:
+        """
+        Выполнение поведенческих реакций
+
+        Returns:
+            Имена правил, действия которых выполнены
+        """
+        applied = []
+        for reaction in reactions:
+            if reaction.type != "behavioral":
+                continue
+            handler = self._actions.get(reaction.params.get("action"))
+            if handler is None:
+                logger.warning(f"Правило {reaction.rule}: неизвестное действие {reaction.params.get('action')}")
+                continue
+            try:
+                handler(reaction.params)
+                applied.append(reaction.rule)
+            except Exception as e:
+                logger.error(f"Ошибка действия правила {reaction.rule}: {e}")
+        return applied
+
+def trait_drift(params: Mapping) -> None:
+    """Дрейф черт личности: {"traits": {черта: сигнал}, "weight": значимость}"""
+    from modules.personality.traits import personality
+
+    personality.apply_drift(dict(params.get("traits", {})), float(params.get("weight", 1.0)))
+
+# Глобальное выполнение поведенческих реакций
+behavioral_responder = BehavioralResponder()
+behavioral_responder.register("trait_drift", trait_drift)
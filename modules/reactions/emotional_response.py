@@ -0,0 +1,31 @@
+"""
+Эмоциональные реакции: выбор смены настроения по сработавшим правилам
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from modules.reactions.reaction_triggers import Reaction
+
+@dataclass(frozen=True)
+class EmotionalShift:
+    """Предлагаемая смена настроения"""
+    emotion: str
+    intensity: float
+    rule: str
+
+def select_emotion(reactions: Sequence[Reaction]) -> Optional[EmotionalShift]:
+    """
+    Самая сильная эмоциональная реакция
+
+    При равной интенсивности побеждает реакция с большим приоритетом
+    (реакции приходят отсортированными по приоритету).
+    """
+    best = None
+    for reaction in reactions:
+        if reaction.type != "emotional":
+            continue
+        intensity = float(reaction.params.get("intensity", 1.0))
+        if best is None or intensity > best.intensity:
+            best = EmotionalShift(reaction.params["emotion"], intensity, reaction.rule)
+    return best
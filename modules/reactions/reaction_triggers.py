@@ -0,0 +1,369 @@
+"""
+Триггеры реакций: правила "условия -> реакция" с индексом по самым избирательным условиям
+"""
+
+import heapq
+import logging
+import math
+import threading
+from dataclasses import dataclass, field
+from itertools import product
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import ReactionRuleConfig, config_manager
+from core.exceptions import ModuleExecutionError
+from modules.personality.traits import DEFAULT_TRAIT_VALUE, TRAIT_INDEX, TraitSnapshot
+from modules.senses.input_parser import normalize, stem
+
+logger = logging.getLogger(__name__)
+
+REACTION_TYPES = ("emotional", "behavioral")
+# Условия с одним значением у сообщения; правило без слов индексируется
+# составным ключом по всем своим таким условиям
+KEY_ATTRIBUTES = ("intent", "mood", "emotion")
+# Ожидаемая доля сообщений, совпадающих с одним значением условия: правило со
+# словами индексируется по словам, если это избирательнее составного ключа
+ATTRIBUTE_MATCH_RATE = {
+    "words": 0.01,
+    "emotion": 0.2,
+    "mood": 0.2,
+    "intent": 0.25,
+}
+
+@dataclass(frozen=True)
+class TriggerFacts:
+    """Факты сообщения, по которым проверяются условия правил"""
+    intent: Optional[str] = None
+    mood: Optional[str] = None
+    emotion: Optional[str] = None
+    stems: FrozenSet[str] = frozenset()
+    traits: Optional[TraitSnapshot] = None
+    memory_hits: int = 0
+
+@dataclass(frozen=True)
+class Reaction:
+    """Реакция сработавшего правила"""
+    rule: str
+    type: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Правило, скомпилированное в ключи индекса и проверки"""
+    id: int
+    name: str
+    priority: int
+    reaction: Reaction
+    # "words" - индекс по основам слов, "key" - составной ключ, None - без индекса
+    indexed_on: Optional[str]
+    keys: Tuple[Hashable, ...]
+    # Проверки условий, не покрытых ключом индекса
+    checks: Tuple[Callable[[TriggerFacts], bool], ...]
+    # Проверки всех условий на множества значений (для перебора без индекса)
+    set_checks: Tuple[Callable[[TriggerFacts], bool], ...]
+    # Числовые условия: диапазоны черт в порядке BIG_FIVE и минимум воспоминаний
+    trait_low: np.ndarray
+    trait_high: np.ndarray
+    min_memory_hits: int
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        """Порядок реакций: по убыванию приоритета, затем по порядку в конфигурации"""
+        return -self.priority, self.id
+
+    @property
+    def numeric(self) -> bool:
+        return self.min_memory_hits > 0 or bool(self.trait_low.any()) or bool((self.trait_high < 1.0).any())
+
+    def matches_all(self, facts: TriggerFacts) -> bool:
+        """Проверка всех условий правила без индекса"""
+        values = _trait_values(facts)
+        return (
+            facts.memory_hits >= self.min_memory_hits
+            and bool(np.all(self.trait_low <= values)) and bool(np.all(values <= self.trait_high))
+            and all(check(facts) for check in self.set_checks)
+        )
+
+RANK = attrgetter("rank")
+
+def _trait_values(facts: TriggerFacts) -> np.ndarray:
+    return NEUTRAL_TRAITS if facts.traits is None else facts.traits.values
+
+NEUTRAL_TRAITS = np.full(len(TRAIT_INDEX), DEFAULT_TRAIT_VALUE, dtype=np.float32)
+
+def _word_keys(words: Sequence[str]) -> FrozenSet[str]:
+    """Слова условия в виде основ, как в ParsedInput.stems"""
+    return frozenset(stem(normalize(word).strip()) for word in words if word and word.strip())
+
+def _set_check(attribute: str, keys: FrozenSet[str]) -> Callable[[TriggerFacts], bool]:
+    if attribute == "words":
+        return lambda facts: not keys.isdisjoint(facts.stems)
+    return lambda facts: getattr(facts, attribute) in keys
+
+def compile_rule(rule_id: int, rule: ReactionRuleConfig) -> CompiledRule:
+    """
+    Компиляция правила
+
+    Raises:
+        ValueError: Неизвестная черта, тип реакции или некорректный диапазон
+    """
+    name = rule.name or f"rule_{rule_id}"
+    reaction = dict(rule.reaction)
+    reaction_type = reaction.pop("type", None)
+    if reaction_type not in REACTION_TYPES:
+        raise ValueError(f"Правило {name}: неизвестный тип реакции {reaction_type}")
+    if reaction_type == "emotional" and "emotion" not in reaction:
+        raise ValueError(f"Правило {name}: эмоциональная реакция без emotion")
+
+    trait_low = np.zeros(len(TRAIT_INDEX), dtype=np.float32)
+    trait_high = np.ones(len(TRAIT_INDEX), dtype=np.float32)
+    for trait, bounds in rule.traits.items():
+        if trait not in TRAIT_INDEX:
+            raise ValueError(f"Правило {name}: неизвестная черта {trait}")
+        if len(bounds) != 2 or bounds[0] > bounds[1]:
+            raise ValueError(f"Правило {name}: диапазон черты {trait} должен быть [min, max]")
+        trait_low[TRAIT_INDEX[trait]], trait_high[TRAIT_INDEX[trait]] = bounds
+
+    values = {attribute: frozenset(getattr(rule, attribute)) for attribute in KEY_ATTRIBUTES}
+    values = {attribute: keys for attribute, keys in values.items() if keys}
+    words = _word_keys(rule.words)
+    set_checks = [_set_check(attribute, keys) for attribute, keys in values.items()]
+    if words:
+        set_checks.append(_set_check("words", words))
+
+    key_rate = math.prod(len(keys) * ATTRIBUTE_MATCH_RATE[attribute] for attribute, keys in values.items())
+    if words and (not values or len(words) * ATTRIBUTE_MATCH_RATE["words"] < key_rate):
+        indexed_on, keys = "words", tuple(sorted(words))
+        checks = [_set_check(attribute, attribute_keys) for attribute, attribute_keys in values.items()]
+    elif values:
+        indexed_on = "key"
+        keys = tuple(
+            tuple(zip(values, combination))
+            for combination in product(*(sorted(attribute_keys) for attribute_keys in values.values()))
+        )
+        checks = [_set_check("words", words)] if words else []
+    else:
+        indexed_on, keys, checks = None, (), []
+
+    return CompiledRule(
+        id=rule_id,
+        name=name,
+        priority=rule.priority,
+        reaction=Reaction(name, reaction_type, reaction),
+        indexed_on=indexed_on,
+        keys=keys,
+        checks=tuple(checks),
+        set_checks=tuple(set_checks),
+        trait_low=trait_low,
+        trait_high=trait_high,
+        min_memory_hits=max(rule.min_memory_hits, 0),
+    )
+
+@dataclass(frozen=True)
+class RuleBucket:
+    """
+    Корзина индекса: правила с одним ключом
+
+    Числовые условия всех правил корзины проверяются одной векторной
+    операцией; массивы не строятся, если числовых условий в корзине нет.
+    """
+    rules: Tuple[CompiledRule, ...]
+    trait_low: Optional[np.ndarray] = None
+    trait_high: Optional[np.ndarray] = None
+    min_memory_hits: Optional[np.ndarray] = None
+
+    @classmethod
+    def build(cls, rules: Sequence[CompiledRule]) -> "RuleBucket":
+        rules = tuple(rules)
+        if not any(rule.numeric for rule in rules):
+            return cls(rules)
+        return cls(
+            rules,
+            np.stack([rule.trait_low for rule in rules]),
+            np.stack([rule.trait_high for rule in rules]),
+            np.array([rule.min_memory_hits for rule in rules], dtype=np.int64),
+        )
+
+    def select(self, trait_values: np.ndarray, memory_hits: int) -> Iterable[CompiledRule]:
+        """Правила корзины, числовые условия которых выполнены"""
+        if self.trait_low is None:
+            return self.rules
+        mask = (self.min_memory_hits <= memory_hits) & np.all(
+            (self.trait_low <= trait_values) & (trait_values <= self.trait_high), axis=1
+        )
+        rules = self.rules
+        return [rules[i] for i in np.flatnonzero(mask)]
+
+@dataclass(frozen=True)
+class RuleNetwork:
+    """
+    Скомпилированный набор правил
+
+    keyed - корзины по составному ключу ((условие, значение), ...), words -
+    корзины по основе слова, unindexed - правила только с числовыми условиями.
+    """
+    version: int
+    rules: Tuple[CompiledRule, ...]
+    keyed: Mapping[Tuple, RuleBucket]
+    words: Mapping[str, RuleBucket]
+    unindexed: RuleBucket
+    # Наборы условий, встречающиеся в составных ключах
+    key_shapes: Tuple[Tuple[str, ...], ...]
+
+    @property
+    def size(self) -> int:
+        return len(self.rules)
+
+    def buckets(self, facts: TriggerFacts) -> Tuple[List[RuleBucket], List[RuleBucket]]:
+        """
+        Корзины, ключ которых совпал с фактами сообщения
+
+        Returns:
+            (корзины составных ключей и без индекса, корзины слов)
+        """
+        keyed = self.keyed
+        buckets = [self.unindexed]
+        for shape in self.key_shapes:
+            bucket = keyed.get(tuple((attribute, getattr(facts, attribute)) for attribute in shape))
+            if bucket is not None:
+                buckets.append(bucket)
+        words = self.words
+        word_buckets = [words[key] for key in facts.stems if key in words]
+        return buckets, word_buckets
+
+def build_network(rules: Sequence[ReactionRuleConfig], version: int = 0) -> RuleNetwork:
+    """Компиляция правил в индекс по самому избирательному условию каждого правила"""
+    compiled = [compile_rule(rule_id, rule) for rule_id, rule in enumerate(rules)]
+    keyed: Dict[Tuple, List[CompiledRule]] = {}
+    words: Dict[str, List[CompiledRule]] = {}
+    unindexed = []
+    for rule in compiled:
+        if rule.indexed_on is None:
+            unindexed.append(rule)
+            continue
+        target = words if rule.indexed_on == "words" else keyed
+        for key in rule.keys:
+            target.setdefault(key, []).append(rule)
+    shapes = {tuple(attribute for attribute, _ in key) for key in keyed}
+    return RuleNetwork(
+        version=version,
+        rules=tuple(compiled),
+        keyed={key: RuleBucket.build(bucket) for key, bucket in keyed.items()},
+        words={key: RuleBucket.build(bucket) for key, bucket in words.items()},
+        unindexed=RuleBucket.build(unindexed),
+        key_shapes=tuple(sorted(shapes, key=lambda shape: (len(shape), shape))),
+    )
+
+class ReactionTriggerEngine:
+    """
+    Механизм триггеров реакций
+
+    Правила reactions.rules компилируются в индекс: правило со словами
+    попадает в корзины основ своих слов, правило с намерением, настроением
+    или эмоцией - в корзины составного ключа по всем этим условиям, поэтому
+    проверяются только правила из корзин, совпавших с фактами сообщения.
+    Диапазоны черт и минимум воспоминаний корзины проверяются векторно,
+    оставшиеся условия правил по словам - скомпилированными функциями.
+    Индекс перестраивается при изменении
+    reactions_config.json и подменяется атомарно.
+    """
+
+    def __init__(self, config_provider: Callable = None):
+        self._config_provider = config_provider or (lambda: config_manager.reactions)
+        self._lock = threading.Lock()
+        self._network: Optional[RuleNetwork] = None
+        self._compilations = 0
+        self.evaluations = 0
+        self.examined = 0
+        self.matched = 0
+        self.reload()
+        if config_provider is None:
+            config_manager.subscribe("reactions", self._on_config_change)
+
+    @property
+    def config(self):
+        return self._config_provider()
+
+    @property
+    def network(self) -> RuleNetwork:
+        return self._network
+
+    def _on_config_change(self, new_config, old_config):
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Перекомпиляция правил
+
+        Returns:
+            True, если индекс перестроен
+        """
+        rules = self.config.rules
+        with self._lock:
+            try:
+                network = build_network(rules, self._compilations + 1)
+            except (ValueError, TypeError) as e:
+                if self._network is None:
+                    raise ModuleExecutionError("reactions", "compile_rules", str(e))
+                logger.error(f"Ошибка компиляции правил реакций, используется прежняя версия: {e}")
+                return False
+            self._compilations += 1
+            self._network = network
+        logger.info(f"Правила реакций скомпилированы: {network.size}, версия {network.version}")
+        return True
+
+    def evaluate(self, facts: TriggerFacts, limit: Optional[int] = None) -> List[Reaction]:
+        """
+        Реакции на сообщение по убыванию приоритета
+
+        Args:
+            facts: Факты сообщения
+            limit: Не более limit реакций (по умолчанию reactions.max_reactions)
+        """
+        config = self.config
+        if not config.enabled:
+            return []
+        network = self._network
+        trait_values = _trait_values(facts)
+        hits = facts.memory_hits
+        buckets, word_buckets = network.buckets(facts)
+        matched = []
+        examined = 0
+        # Составной ключ однозначен для сообщения: правило не попадает в две корзины
+        for bucket in buckets:
+            examined += len(bucket.rules)
+            for rule in bucket.select(trait_values, hits):
+                if not rule.checks or all(check(facts) for check in rule.checks):
+                    matched.append(rule)
+        seen = set()
+        for bucket in word_buckets:
+            examined += len(bucket.rules)
+            for rule in bucket.select(trait_values, hits):
+                if rule.id not in seen:
+                    seen.add(rule.id)
+                    if all(check(facts) for check in rule.checks):
+                        matched.append(rule)
+        self.evaluations += 1
+        self.examined += examined
+        self.matched += len(matched)
+        limit = config.max_reactions if limit is None else limit
+        return [rule.reaction for rule in heapq.nsmallest(limit, matched, key=RANK)]
+
+    def stats(self) -> Dict[str, Any]:
+        network = self._network
+        evaluations = max(self.evaluations, 1)
+        return {
+            "version": network.version,
+            "rules": network.size,
+            "unindexed": len(network.unindexed.rules),
+            "buckets": {"key": len(network.keyed), "words": len(network.words)},
+            "evaluations": self.evaluations,
+            "avg_examined": round(self.examined / evaluations, 2),
+            "avg_matched": round(self.matched / evaluations, 2),
+        }
+
+# Глобальный механизм триггеров реакций
+reaction_engine = ReactionTriggerEngine()
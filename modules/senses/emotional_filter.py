@@ -0,0 +1,314 @@
+"""
+Эмоциональный фильтр: определение эмоции во входящем сообщении
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from core.config import config_manager
+from core.exceptions import ModuleExecutionError
+from modules.senses.input_parser import ParsedInput, TextInput, input_parser, normalize
+
+logger = logging.getLogger(__name__)
+
+NEUTRAL = "neutral"
+# Основы короче этой длины сравниваются только целиком
+MIN_STEM_LENGTH = 4
+# Максимальная длина окончания при сопоставлении по основе
+MAX_SUFFIX_LENGTH = 4
+# Вклад слова после отрицания ("не рад")
+NEGATION_FACTOR = -0.5
+
+@dataclass
+class EmotionResult:
+    """Результат определения эмоции"""
+    emotion: str = NEUTRAL
+    intensity: float = 0.0
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"emotion": self.emotion, "intensity": self.intensity, "scores": self.scores}
+
+class EmotionClassifier:
+    """Интерфейс классификатора эмоций"""
+
+    name = "base"
+    # Тяжелые классификаторы выполняются в пуле процессов
+    cpu_heavy = False
+
+    def classify_batch(self, texts: Sequence[TextInput]) -> List[EmotionResult]:
+        raise NotImplementedError
+
+    def classify(self, text: TextInput) -> EmotionResult:
+        return self.classify_batch([text])[0]
+
+class LexiconEmotionClassifier(EmotionClassifier):
+    """
+    Лексиконный классификатор русского и английского текста
+
+    Лексиконы (data/lexicons/emotion_*.json) компилируются в словарь
+    основа -> id и матрицу весов (основы x эмоции). id токенов из разобранного
+    ввода (input_parser) отображаются в основы лексикона через таблицу поиска,
+    после чего оценки всех сообщений пакета считаются одним набором векторных
+    операций с учетом отрицаний и усилителей перед словом.
+    """
+
+    name = "lexicon"
+
+    def __init__(self, lexicon_paths: Iterable[Path], emotions: Sequence[str]):
+        self.emotions = tuple(e for e in emotions if e != NEUTRAL)
+        self._emotion_index = {emotion: i for i, emotion in enumerate(self.emotions)}
+        self._stems: Dict[str, int] = {}
+        rows: List[np.ndarray] = [np.zeros(len(self.emotions), dtype=np.float32)]
+        self._negations = set()
+        self._intensifiers: Dict[str, float] = {}
+        for path in lexicon_paths:
+            self._load(Path(path), rows)
+        self.weights = np.vstack(rows)
+        self._lookup = np.full(0, -1, dtype=np.int32)
+        self._modifiers = np.ones(0, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def _load(self, path: Path, rows: List[np.ndarray]) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            lexicon = json.load(f)
+        self._negations.update(normalize(word) for word in lexicon.get("negations", []))
+        self._intensifiers.update({normalize(w): float(k) for w, k in lexicon.get("intensifiers", {}).items()})
+        for emotion, stems in lexicon.get("emotions", {}).items():
+            column = self._emotion_index.get(emotion)
+            if column is None:
+                logger.warning(f"Эмоция {emotion} из {path.name} не входит в base_states")
+                continue
+            for stem, weight in stems.items():
+                stem = normalize(stem)
+                if stem not in self._stems:
+                    self._stems[stem] = len(rows)
+                    rows.append(np.zeros(len(self.emotions), dtype=np.float32))
+                rows[self._stems[stem]][column] = max(rows[self._stems[stem]][column], float(weight))
+
+    def _match(self, token: str) -> int:
+        """id основы лексикона для токена (0 - не эмоциональное слово)"""
+        stem_id = self._stems.get(token, 0)
+        if not stem_id:
+            shortest = max(MIN_STEM_LENGTH, len(token) - MAX_SUFFIX_LENGTH)
+            for length in range(len(token) - 1, shortest - 1, -1):
+                stem_id = self._stems.get(token[:length], 0)
+                if stem_id:
+                    break
+        return stem_id
+
+    def _resolve(self, token_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Основы лексикона и множители для id словаря токенов
+
+        Таблицы поиска индексируются id из словаря разборщика ввода; каждый
+        токен сопоставляется с лексиконом один раз за время жизни процесса.
+        """
+        vocabulary = input_parser.vocabulary
+        with self._lock:
+            size = len(vocabulary)
+            if size > len(self._lookup):
+                grown = max(size, 2 * len(self._lookup))
+                self._lookup = np.concatenate([self._lookup, np.full(grown - len(self._lookup), -1, np.int32)])
+                self._modifiers = np.concatenate([self._modifiers, np.ones(grown - len(self._modifiers), np.float32)])
+            for token_id in np.unique(token_ids[self._lookup[token_ids] < 0]):
+                token = vocabulary.token(token_id)
+                if token in self._negations:
+                    self._modifiers[token_id] = NEGATION_FACTOR
+                    self._lookup[token_id] = 0
+                elif token in self._intensifiers:
+                    self._modifiers[token_id] = self._intensifiers[token]
+                    self._lookup[token_id] = 0
+                else:
+                    self._lookup[token_id] = self._match(token)
+            return self._lookup[token_ids], self._modifiers[token_ids]
+
+    def _encode(self, texts: Sequence[TextInput]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Массивы (id основы, номер сообщения, множитель) для эмоциональных слов пакета"""
+        parsed = input_parser.parse_many(texts)
+        lengths = np.fromiter((len(p) for p in parsed), dtype=np.int64, count=len(parsed))
+        if not lengths.sum():
+            return np.empty(0, np.int32), np.empty(0, np.int64), np.empty(0, np.float32)
+        token_ids = np.concatenate([p.token_ids for p in parsed])
+        owners = np.repeat(np.arange(len(parsed)), lengths)
+        stem_ids, modifiers = self._resolve(token_ids)
+
+        # Множитель слова задают до двух предшествующих модификаторов ("не очень рад")
+        previous = _shift(modifiers, owners, 1)
+        before_previous = _shift(modifiers, owners, 2)
+        factors = previous * np.where(previous != 1.0, before_previous, 1.0)
+
+        emotional = stem_ids > 0
+        return stem_ids[emotional], owners[emotional], factors[emotional].astype(np.float32)
+
+    def score_batch(self, texts: Sequence[TextInput]) -> np.ndarray:
+        """Матрица оценок (сообщения x эмоции)"""
+        ids, owners, factors = self._encode(texts)
+        contributions = self.weights[ids] * factors[:, None]
+        scores = np.empty((len(texts), len(self.emotions)), dtype=np.float32)
+        for column in range(len(self.emotions)):
+            scores[:, column] = np.bincount(owners, weights=contributions[:, column], minlength=len(texts))
+        return np.maximum(scores, 0.0)
+
+    def classify_batch(self, texts: Sequence[TextInput]) -> List[EmotionResult]:
+        if not texts:
+            return []
+        scores = self.score_batch(texts)
+        best = scores.argmax(axis=1)
+        peak = scores[np.arange(len(texts)), best]
+        intensity = np.tanh(peak)
+        return [
+            EmotionResult(
+                emotion=self.emotions[best[i]] if peak[i] > 0 else NEUTRAL,
+                intensity=round(float(intensity[i]), 4),
+                scores={e: round(float(s), 4) for e, s in zip(self.emotions, scores[i]) if s > 0}
+            )
+            for i in range(len(texts))
+        ]
+
+class TransformerEmotionClassifier(EmotionClassifier):
+    """Классификатор эмоций на модели transformers (text-classification)"""
+
+    name = "transformer"
+    cpu_heavy = True
+
+    def __init__(self, model_name: str, label_map: Dict[str, str], batch_size: int = 32):
+        try:
+            from transformers import pipeline
+        except ImportError as e:
+            raise ModuleExecutionError("senses", "load_emotion_model", f"нужен transformers: {e}")
+        self.pipeline = pipeline("text-classification", model=model_name, device=-1)
+        self.label_map = {label.lower(): emotion for label, emotion in label_map.items()}
+        self.batch_size = batch_size
+
+    def classify_batch(self, texts: Sequence[TextInput]) -> List[EmotionResult]:
+        texts = [text.text if isinstance(text, ParsedInput) else text for text in texts]
+        results = []
+        for prediction in self.pipeline(texts, batch_size=self.batch_size, truncation=True):
+            emotion = self.label_map.get(prediction["label"].lower(), NEUTRAL)
+            score = round(float(prediction["score"]), 4)
+            results.append(EmotionResult(emotion, score if emotion != NEUTRAL else 0.0, {emotion: score}))
+        return results
+
+def _shift(values: np.ndarray, owners: np.ndarray, offset: int) -> np.ndarray:
+    """values[i - offset] в пределах того же сообщения, иначе 1"""
+    shifted = np.ones_like(values)
+    if len(values) > offset:
+        same = owners[offset:] == owners[:-offset]
+        shifted[offset:] = np.where(same, values[:-offset], 1.0)
+    return shifted
+
+CLASSIFIER_TYPES = {
+    "lexicon": LexiconEmotionClassifier,
+    "transformer": TransformerEmotionClassifier,
+}
+
+def create_classifier(config, emotions: Sequence[str]) -> EmotionClassifier:
+    """Классификатор по конфигурации emotion_detection"""
+    if config.classifier == "lexicon":
+        lexicon_dir = Path(config.lexicon_dir)
+        return LexiconEmotionClassifier(sorted(lexicon_dir.glob("emotion_*.json")), emotions)
+    if config.classifier == "transformer":
+        return TransformerEmotionClassifier(config.model_name, dict(config.label_map), config.batch_size)
+    raise ModuleExecutionError("senses", "create_classifier", f"неизвестный классификатор: {config.classifier}")
+
+class EmotionalFilter:
+    """Определение эмоции пользователя; классификатор пересоздается при смене конфигурации"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._classifier: Optional[EmotionClassifier] = None
+        self._apply_config(config_manager.mood)
+        config_manager.subscribe("mood", self._on_config_change)
+
+    def _apply_config(self, config):
+        with self._lock:
+            self.config = config.emotion_detection
+            self.emotions = config.base_states
+            self._classifier = None
+
+    def _on_config_change(self, new_config, old_config):
+        """Новые лексиконы или модель применяются без перезапуска"""
+        if (new_config.emotion_detection, new_config.base_states) != (self.config, self.emotions):
+            self._apply_config(new_config)
+
+    @property
+    def classifier(self) -> EmotionClassifier:
+        with self._lock:
+            if self._classifier is None:
+                self._classifier = create_classifier(self.config, self.emotions)
+            return self._classifier
+
+    def analyze(self, text: TextInput) -> EmotionResult:
+        return self.classifier.classify(text)
+
+    def analyze_batch(self, texts: Sequence[TextInput]) -> List[EmotionResult]:
+        return self.classifier.classify_batch(texts)
+
+    @property
+    def cpu_heavy(self) -> bool:
+        """Тяжелый ли классификатор конфигурации (без его создания в этом процессе)"""
+        classifier_type = CLASSIFIER_TYPES.get(self.config.classifier)
+        return classifier_type is not None and classifier_type.cpu_heavy
+
+    async def analyze_async(self, text: TextInput) -> EmotionResult:
+        """
+        Анализ без блокировки event loop для тяжелых классификаторов
+
+        Тяжелый классификатор загружается только в рабочих процессах пула,
+        а не в процессе сервера.
+        """
+        if not self.cpu_heavy:
+            return self.analyze(text)
+        from core.executor import process_executor
+        # id токенов локальны для процесса, поэтому в пул передается исходный текст
+        raw = text.text if isinstance(text, ParsedInput) else text
+        return (await process_executor.run(classify_texts, [raw]))[0]
+
+    def backfill_user_emotions(self, db: Session, batch_size: Optional[int] = None) -> int:
+        """
+        Заполнение interactions.user_emotion для старых взаимодействий
+
+        Читает строки без эмоции пакетами по возрастанию id (keyset), оценивает
+        пакет целиком и записывает одним executemany UPDATE.
+
+        Returns:
+            Количество обновленных строк
+        """
+        from database.models import Interaction
+
+        batch_size = batch_size or self.config.batch_size
+        table = Interaction.__table__
+        statement = update(table).where(table.c.id == bindparam("_id")).values(user_emotion=bindparam("_emotion"))
+        last_id = 0
+        updated = 0
+        while True:
+            rows = db.query(Interaction.id, Interaction.user_input).filter(
+                Interaction.user_emotion.is_(None),
+                Interaction.id > last_id
+            ).order_by(Interaction.id).limit(batch_size).all()
+            if not rows:
+                return updated
+            results = self.analyze_batch([user_input or "" for _, user_input in rows])
+            db.execute(statement, [
+                {"_id": row_id, "_emotion": result.emotion} for (row_id, _), result in zip(rows, results)
+            ])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"Эмоции заполнены для {updated} взаимодействий")
+
+def classify_texts(texts: Sequence[str]) -> List[EmotionResult]:
+    """Точка входа для пула процессов (классификатор загружается в процессе один раз)"""
+    return emotional_filter.analyze_batch(texts)
+
+# Глобальный эмоциональный фильтр
+emotional_filter = EmotionalFilter()
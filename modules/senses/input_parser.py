@@ -0,0 +1,179 @@
+"""
+Разбор входного текста: нормализация, токенизация и легкий стемминг
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Буквы и цифры любой письменности (кириллица, латиница)
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Минимальная длина основы после отсечения окончания
+MIN_STEM_LENGTH = 3
+# Минимальная длина слова-концепции
+MIN_CONCEPT_LENGTH = 3
+
+# Окончания и суффиксы, отсекаемые легким стеммером (длинные проверяются первыми)
+_RU_ENDINGS = tuple(sorted({
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "иях", "ках", "ешь", "ишь", "ете", "ите",
+    "ах", "ях", "ов", "ев", "ей", "ой", "ый", "ий", "ая", "яя", "ое", "ее", "ые", "ие", "ом", "ем",
+    "ам", "ям", "ую", "юю", "ть", "ти", "ся", "сь", "ет", "ут", "ют", "ит", "ат", "ят",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+}, key=len, reverse=True))
+_EN_ENDINGS = ("ingly", "edly", "ing", "ies", "ed", "ly", "es", "s")
+
+_STOPWORDS = frozenset({
+    "the", "and", "for", "are", "was", "with", "that", "this", "from", "have", "has", "not",
+    "это", "как", "что", "для", "или", "она", "они", "его", "так", "все", "был", "была",
+    "при", "над", "под", "без", "уже", "еще", "где", "кто", "тот", "эта", "эти",
+})
+
+def normalize(text: str) -> str:
+    """Нормализация Unicode (NFKC), нижний регистр, ё -> е"""
+    return unicodedata.normalize("NFKC", text or "").casefold().replace("ё", "е")
+
+def tokenize(text: str) -> List[str]:
+    """Токены нормализованного текста"""
+    return _TOKEN_RE.findall(normalize(text))
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Легкий стемминг: отсечение одного окончания с сохранением основы"""
+    if token.isdigit():
+        return token
+    endings = _EN_ENDINGS if token.isascii() else _RU_ENDINGS
+    for ending in endings:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM_LENGTH:
+            return token[:-len(ending)]
+    return token
+
+class Vocabulary:
+    """
+    Интернирование токенов: строка -> стабильный целочисленный id
+
+    id 0 зарезервирован за пустым токеном и возвращается при переполнении
+    словаря, поэтому id можно использовать как индекс в массивах таблиц
+    поиска у потребителей (лексиконы, индексы памяти).
+    """
+
+    def __init__(self, max_size: int = 1_000_000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {"": 0}
+        self._tokens: List[str] = [""]
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def id(self, token: str) -> int:
+        token_id = self._ids.get(token)
+        if token_id is not None:
+            return token_id
+        with self._lock:
+            token_id = self._ids.get(token)
+            if token_id is None:
+                if len(self._tokens) >= self.max_size:
+                    return 0
+                token_id = len(self._tokens)
+                self._tokens.append(token)
+                self._ids[token] = token_id
+            return token_id
+
+    def ids(self, tokens: Iterable[str]) -> np.ndarray:
+        ids = np.fromiter((self.id(token) for token in tokens), dtype=np.int32)
+        ids.flags.writeable = False
+        return ids
+
+    def token(self, token_id: int) -> str:
+        return self._tokens[token_id]
+
+@dataclass(frozen=True, eq=False)
+class ParsedInput:
+    """
+    Разобранное сообщение, передаваемое по конвейеру обработки
+
+    Токены и их id вычисляются один раз; модули читают их отсюда, а не
+    токенизируют текст заново.
+    """
+    text: str
+    normalized: str
+    tokens: Tuple[str, ...]
+    stems: Tuple[str, ...]
+    token_ids: np.ndarray
+    stem_ids: np.ndarray
+    concepts: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def has_word(self, *words: str) -> bool:
+        """Есть ли среди токенов хотя бы одно из слов"""
+        return any(word in self.tokens for word in words)
+
+    def has_phrase(self, phrase: str) -> bool:
+        """Встречается ли фраза как последовательность токенов"""
+        needle = tuple(tokenize(phrase))
+        size = len(needle)
+        return bool(size) and any(
+            self.tokens[i:i + size] == needle for i in range(len(self.tokens) - size + 1)
+        )
+
+# Текст или уже разобранное сообщение
+TextInput = Union[str, ParsedInput]
+
+class InputParser:
+    """Разбор сообщений с кешем последних результатов"""
+
+    def __init__(self, vocabulary: Vocabulary = None, cache_size: int = 4096):
+        self.vocabulary = vocabulary or Vocabulary()
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, ParsedInput]" = OrderedDict()
+
+    def parse(self, text: TextInput) -> ParsedInput:
+        """Разбор текста (уже разобранный ввод возвращается как есть)"""
+        if isinstance(text, ParsedInput):
+            return text
+        text = text or ""
+        with self._lock:
+            parsed = self._cache.get(text)
+            if parsed is not None:
+                self._cache.move_to_end(text)
+                return parsed
+
+        normalized = normalize(text)
+        tokens = tuple(_TOKEN_RE.findall(normalized))
+        stems = tuple(stem(token) for token in tokens)
+        parsed = ParsedInput(
+            text=text,
+            normalized=normalized,
+            tokens=tokens,
+            stems=stems,
+            token_ids=self.vocabulary.ids(tokens),
+            stem_ids=self.vocabulary.ids(stems),
+            concepts=tuple(
+                token for token in tokens
+                if len(token) >= MIN_CONCEPT_LENGTH and token not in _STOPWORDS
+            ),
+        )
+        with self._lock:
+            self._cache[text] = parsed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return parsed
+
+    def parse_many(self, texts: Sequence[TextInput]) -> List[ParsedInput]:
+        return [self.parse(text) for text in texts]
+
+# Глобальный разборщик ввода
+input_parser = InputParser()
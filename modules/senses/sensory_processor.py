@@ -0,0 +1,36 @@
+"""
+Сенсорный процессор: первичное восприятие входящих сообщений
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from modules.senses.emotional_filter import EmotionResult, emotional_filter
+from modules.senses.input_parser import ParsedInput, TextInput, input_parser
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Perception:
+    """Восприятие сообщения пользователя"""
+    parsed: ParsedInput
+    emotion: EmotionResult
+
+class SensoryProcessor:
+    """Восприятие сообщений: разбор ввода и определение эмоции пользователя"""
+
+    def __init__(self, emotion_filter=None):
+        self.emotion_filter = emotion_filter or emotional_filter
+
+    async def perceive(self, message: TextInput) -> Perception:
+        parsed = input_parser.parse(message)
+        return Perception(parsed, await self.emotion_filter.analyze_async(parsed))
+
+    def perceive_batch(self, messages: Sequence[TextInput]) -> List[Perception]:
+        """Пакетное восприятие (для офлайн-обработки истории)"""
+        parsed = input_parser.parse_many(messages)
+        return [Perception(p, emotion) for p, emotion in zip(parsed, self.emotion_filter.analyze_batch(parsed))]
+
+# Глобальный сенсорный процессор
+sensory_processor = SensoryProcessor()
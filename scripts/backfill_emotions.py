@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Заполнение interactions.user_emotion для взаимодействий без эмоции
+
+Примеры:
+    python scripts/backfill_emotions.py
+    python scripts/backfill_emotions.py --batch-size 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Добавление корневой директории в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.session import SessionLocal
+from modules.senses.emotional_filter import emotional_filter
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=None, help="Размер пакета (по умолчанию из mood_config)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        updated = emotional_filter.backfill_user_emotions(db, args.batch_size)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    rate = updated / elapsed if elapsed else 0.0
+    print(f"Обновлено взаимодействий: {updated} за {elapsed:.2f} с ({rate:.0f} строк/с)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк генерации ответов на CPU: токены в секунду и RSS процесса
+
+Примеры:
+    python scripts/benchmark_generation.py --model distilgpt2 --batch-size 4
+    python scripts/benchmark_generation.py --model distilgpt2 --no-quantize
+    python scripts/benchmark_generation.py --model distilgpt2 --export-onnx data/models/distilgpt2.onnx
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+
+# Добавление корневой директории в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import config_manager
+from modules.communication.response_generator import (
+    GenerationRequest,
+    MicroBatcher,
+    create_backend,
+)
+
+PROMPTS = [
+    "Привет! Расскажи о себе.",
+    "Что ты помнишь о нашем прошлом разговоре?",
+    "Как у тебя настроение сегодня?",
+    "Объясни, что такое память человека.",
+]
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в МБ (Linux), иначе пиковый"""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=None, help="stub, transformers или onnx")
+    parser.add_argument("--model", default=None, help="Имя или путь модели transformers")
+    parser.add_argument("--requests", type=int, default=32, help="Количество запросов")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None, help="Число intra-op потоков")
+    parser.add_argument("--no-quantize", action="store_true", help="Без int8 (веса через mmap)")
+    parser.add_argument("--onnx-path", default=None, help="ONNX модель для бэкенда onnx")
+    parser.add_argument("--export-onnx", default=None, help="Экспортировать модель в ONNX и выйти")
+    return parser.parse_args()
+
+def build_config(args):
+    config = config_manager.system.generation
+    overrides = {
+        "backend": args.backend or ("transformers" if args.model else None),
+        "model_name": args.model,
+        "max_batch_size": args.batch_size,
+        "max_new_tokens": args.max_new_tokens,
+        "intra_op_threads": args.threads,
+        "onnx_path": args.onnx_path,
+    }
+    if args.no_quantize:
+        overrides["quantize"] = False
+    return dataclasses.replace(config, **{k: v for k, v in overrides.items() if v is not None})
+
+async def run_benchmark(batcher: MicroBatcher, count: int, max_new_tokens: int):
+    requests = [GenerationRequest(f"{PROMPTS[i % len(PROMPTS)]} ({i})", max_new_tokens=max_new_tokens)
+                for i in range(count)]
+    started = time.perf_counter()
+    replies = await asyncio.gather(*(batcher.submit(request) for request in requests))
+    return replies, time.perf_counter() - started
+
+def main():
+    args = parse_args()
+    config = build_config(args)
+
+    rss_before = rss_mb()
+    load_started = time.perf_counter()
+    backend = create_backend(config)
+    load_seconds = time.perf_counter() - load_started
+
+    if args.export_onnx:
+        path = backend.export_onnx(args.export_onnx)
+        print(f"ONNX модель сохранена: {path}")
+        return 0
+
+    batcher = MicroBatcher(backend, max_batch_size=config.max_batch_size, max_wait_ms=config.max_wait_ms)
+    try:
+        replies, seconds = asyncio.run(run_benchmark(batcher, args.requests, config.max_new_tokens))
+    finally:
+        batcher.stop()
+
+    tokenizer = getattr(backend, "tokenizer", None)
+    if tokenizer is not None:
+        tokens = sum(len(tokenizer(reply)["input_ids"]) for reply in replies)
+    else:
+        tokens = sum(len(reply.split()) for reply in replies)
+
+    print(json.dumps({
+        "backend": backend.name,
+        "model": config.model_name,
+        "quantized": config.quantize,
+        "requests": args.requests,
+        "generated_tokens": tokens,
+        "seconds": round(seconds, 3),
+        "tokens_per_second": round(tokens / seconds, 2) if seconds else None,
+        "load_seconds": round(load_seconds, 3),
+        "rss_mb_before_load": round(rss_before, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "batches": batcher.stats(),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
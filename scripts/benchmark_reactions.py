@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк триггеров реакций: индекс правил против полного перебора на 10 000 правил
+
+Примеры:
+    python scripts/benchmark_reactions.py
+    python scripts/benchmark_reactions.py --rules 50000 --messages 20000 --scan-messages 200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Добавление корневой директории в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import ReactionRuleConfig, ReactionsConfig, config_manager
+from modules.personality.traits import BIG_FIVE, TraitSnapshot, trait_vector
+from modules.reactions.reaction_triggers import ReactionTriggerEngine, TriggerFacts
+
+INTENTS = ("greeting", "wellbeing", "farewell", "fallback")
+VOCABULARY = [f"слово{i}" for i in range(5000)]
+
+def random_rule(rng: random.Random, index: int) -> ReactionRuleConfig:
+    """Правило со случайным набором условий"""
+    moods = config_manager.mood.base_states
+    conditions = {}
+    if rng.random() < 0.5:
+        conditions["words"] = tuple(rng.sample(VOCABULARY, rng.randint(1, 3)))
+    if rng.random() < 0.4:
+        conditions["intent"] = (rng.choice(INTENTS),)
+    if rng.random() < 0.4:
+        conditions["emotion"] = (rng.choice(moods),)
+    if rng.random() < 0.3:
+        conditions["mood"] = tuple(rng.sample(moods, 2))
+    if rng.random() < 0.3:
+        low = round(rng.random() * 0.8, 2)
+        conditions["traits"] = {rng.choice(BIG_FIVE): (low, 1.0)}
+    if not conditions or rng.random() < 0.2:
+        conditions["min_memory_hits"] = rng.randint(1, 5)
+    return ReactionRuleConfig(
+        name=f"rule_{index}",
+        reaction={"type": "emotional", "emotion": rng.choice(moods), "intensity": rng.random()},
+        priority=rng.randint(0, 100),
+        **conditions,
+    )
+
+def random_facts(rng: random.Random) -> TriggerFacts:
+    moods = config_manager.mood.base_states
+    return TriggerFacts(
+        intent=rng.choice(INTENTS),
+        mood=rng.choice(moods),
+        emotion=rng.choice(moods),
+        stems=frozenset(rng.sample(VOCABULARY, 12)),
+        traits=TraitSnapshot(1, trait_vector({name: rng.random() for name in BIG_FIVE})),
+        memory_hits=rng.randint(0, 5),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=10_000, help="Количество правил")
+    parser.add_argument("--messages", type=int, default=10_000, help="Количество сообщений")
+    parser.add_argument("--scan-messages", type=int, default=1000,
+                        help="Количество сообщений для полного перебора (он медленный)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    config = ReactionsConfig(max_reactions=3, rules=tuple(random_rule(rng, i) for i in range(args.rules)))
+    started = time.perf_counter()
+    engine = ReactionTriggerEngine(lambda: config)
+    compile_ms = (time.perf_counter() - started) * 1000
+    messages = [random_facts(rng) for _ in range(args.messages)]
+
+    started = time.perf_counter()
+    indexed = [engine.evaluate(facts) for facts in messages]
+    indexed_elapsed = time.perf_counter() - started
+
+    # Полный перебор: все правила с проверкой всех условий на части сообщений
+    sample = messages[:args.scan_messages]
+    rules = engine.network.rules
+    started = time.perf_counter()
+    scanned = []
+    for facts in sample:
+        matched = [rule for rule in rules if rule.matches_all(facts)]
+        matched.sort(key=lambda rule: (-rule.priority, rule.id))
+        scanned.append([rule.reaction for rule in matched[:config.max_reactions]])
+    scan_elapsed = time.perf_counter() - started
+
+    indexed_rate = args.messages / indexed_elapsed
+    scan_rate = len(sample) / scan_elapsed
+    same = indexed[:len(sample)] == scanned
+    stats = engine.stats()
+    print(f"Правил: {stats['rules']}, компиляция {compile_ms:.1f} мс, без индекса: {stats['unindexed']}")
+    print(f"Индекс: {indexed_rate:,.0f} сообщений/с, проверено правил в среднем {stats['avg_examined']}")
+    print(f"Полный перебор: {scan_rate:,.0f} сообщений/с ({len(sample)} сообщений)")
+    print(f"Ускорение: x{indexed_rate / scan_rate:.1f}, результаты совпадают: {same}")
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
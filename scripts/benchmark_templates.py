@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк отрисовки шаблонов ответов (цель - не менее 100 000 отрисовок в секунду)
+
+Примеры:
+    python scripts/benchmark_templates.py
+    python scripts/benchmark_templates.py --renders 1000000
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+# Добавление корневой директории в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import config_manager
+from modules.communication.communication_style import style_engine
+
+TARGET_RENDERS_PER_SEC = 100_000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=200_000, help="Количество отрисовок")
+    args = parser.parse_args()
+
+    combos = list(itertools.product(
+        style_engine.intents, config_manager.mood.base_states, (0.1, 0.5, 0.9)
+    ))
+    cycle = itertools.islice(itertools.cycle(combos), args.renders)
+
+    started = time.perf_counter()
+    for intent, mood, trait_value in cycle:
+        style_engine.render(intent, mood, trait_value, message="Тестовое сообщение")
+    elapsed = time.perf_counter() - started
+
+    rate = args.renders / elapsed
+    status = "OK" if rate >= TARGET_RENDERS_PER_SEC else "НИЖЕ ЦЕЛИ"
+    print(f"Отрисовок: {args.renders} за {elapsed:.3f} с - {rate:,.0f}/с [{status}]")
+    print(f"Вариантов в таблице: {style_engine.stats()['variants']}, версия {style_engine.version}")
+    return 0 if rate >= TARGET_RENDERS_PER_SEC else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
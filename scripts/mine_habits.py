@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Поиск привычек по истории взаимодействий (с сохраненного watermark)
+
+Примеры:
+    python scripts/mine_habits.py
+    python scripts/mine_habits.py --max-rows 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Добавление корневой директории в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.session import SessionLocal
+from modules.character.habits import habit_miner
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-rows", type=int, default=None, help="Ограничение числа взаимодействий за запуск")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = habit_miner.run(db, max_rows=args.max_rows)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    rate = report.processed / elapsed if elapsed else 0.0
+    print(
+        f"Обработано взаимодействий: {report.processed} за {elapsed:.2f} с ({rate:.0f} строк/с), "
+        f"watermark {report.watermark}, привычек обновлено {report.habits_updated}, новых {report.habits_created}"
+    )
+
+if __name__ == "__main__":
+    main()
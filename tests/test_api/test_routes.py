@@ -2,6 +2,8 @@
 Тесты для API endpoints
 """
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -9,6 +11,7 @@ from sqlalchemy.orm import sessionmaker
 
 from api.app import app
 from database.session import get_db
+from database import crud
 from database.models import Base
 
 # Тестовая база данных
@@ -137,6 +140,48 @@ class TestAPIEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert "modules" in data
+    
+    def test_interactions_keyset_pagination(self):
+        """Тест постраничного списка взаимодействий по курсору"""
+        db = TestingSessionLocal()
+        for i in range(5):
+            crud.crud_interaction.create(db, {
+                "session_id": "page-session", "user_input": f"вопрос {i}", "ai_response": "ответ"
+            })
+        db.close()
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"session_id": "page-session", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/interactions", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(item["user_input"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert seen == [f"вопрос {i}" for i in range(5)]
+        
+        response = client.get("/api/v1/interactions", params={"session_id": "page-session", "cursor": "мусор"})
+        assert response.status_code == 400
+    
+    def test_export_interactions_ndjson(self):
+        """Тест потоковой выгрузки взаимодействий"""
+        db = TestingSessionLocal()
+        for i in range(3):
+            crud.crud_interaction.create(db, {
+                "session_id": "export-session", "user_input": f"вопрос {i}", "ai_response": "ответ"
+            })
+        db.close()
+        
+        response = client.get("/api/v1/export/interactions", params={"session_id": "export-session"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["user_input"] for row in rows] == ["вопрос 0", "вопрос 1", "вопрос 2"]
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
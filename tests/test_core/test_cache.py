@@ -0,0 +1,94 @@
+"""
+Тесты кеша ответов
+"""
+
+import asyncio
+
+import pytest
+
+from core.cache import ResponseCache
+from core.config import ResponseCacheConfig
+
+def _cache(**overrides):
+    config = ResponseCacheConfig(**overrides)
+    return ResponseCache("test", lambda: config)
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = _cache(max_entries=2, max_bytes=1000)
+    cache.set("a", "x")
+    cache.set("b", "y")
+    assert cache.get("a") == "x"
+    cache.set("c", "z")
+    assert cache.get("b") is None
+    assert cache.get("a") == "x"
+    
+    cache = _cache(max_entries=100, max_bytes=20)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    assert cache.bytes <= 20
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiration_and_invalidation():
+    cache = _cache(ttl_seconds=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    
+    cache = _cache()
+    generation = cache.generation
+    cache.set("a", 1)
+    cache.invalidate()
+    assert cache.get("a") is None
+    assert cache.bytes == 0
+    assert not cache.set("b", 2, generation)
+
+def test_single_flight_coalesces_concurrent_requests():
+    cache = _cache()
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "ответ"
+    
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+    
+    assert asyncio.run(run()) == ["ответ"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get("key") == "ответ"
+
+def test_failed_computation_is_not_cached():
+    cache = _cache()
+    
+    async def fail():
+        raise RuntimeError("сбой")
+    
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("key", fail))
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["inflight"] == 0
+
+def test_owner_cancellation_does_not_cancel_coalesced_requests():
+    cache = _cache()
+    
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "ответ"
+    
+    async def run():
+        owner = asyncio.ensure_future(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get_or_compute("key", compute)) for _ in range(2)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        results = await asyncio.gather(*waiters)
+        return owner, results
+    
+    owner, results = asyncio.run(run())
+    assert owner.cancelled()
+    assert results == ["ответ", "ответ"]
+    assert cache.get("key") == "ответ"
+    assert cache.stats()["inflight"] == 0
@@ -0,0 +1,74 @@
+"""
+Тесты менеджера конфигурации модулей
+"""
+
+import json
+import os
+
+import pytest
+
+from core.config import ConfigManager, MemoryConfig, SystemConfig, build_config
+
+def _write_config(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+@pytest.fixture
+def config_dir(tmp_path):
+    _write_config(tmp_path / "memory_config.json", {
+        "memory": {"short_term": {"capacity": 5}, "recall": {"association_strength": 0.4}}
+    })
+    _write_config(tmp_path / "system_config.json", {
+        "system": {"modules": {"memory": {"enabled": True, "priority": "high"}}}
+    })
+    return tmp_path
+
+def test_typed_configs_are_frozen_and_defaulted(config_dir):
+    manager = ConfigManager(config_dir)
+    assert isinstance(manager.memory, MemoryConfig)
+    assert manager.memory.short_term.capacity == 5
+    assert manager.memory.long_term.capacity == 1000
+    assert manager.system.modules["memory"].priority == "high"
+    assert manager.psyche.decision_making.confidence_threshold == 0.6
+    with pytest.raises(AttributeError):
+        manager.memory.short_term.capacity = 10
+
+def test_reload_swaps_only_changed_and_notifies(config_dir):
+    manager = ConfigManager(config_dir)
+    received = []
+    manager.subscribe("memory", lambda new, old: received.append((new, old)))
+    
+    version = manager.version
+    system_config = manager.system
+    assert manager.reload() == []
+    assert manager.version == version
+    
+    memory_file = config_dir / "memory_config.json"
+    _write_config(memory_file, {"memory": {"short_term": {"capacity": 7}}})
+    stat = memory_file.stat()
+    os.utime(memory_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    
+    assert manager.reload() == ["memory"]
+    assert manager.version == version + 1
+    assert manager.memory.short_term.capacity == 7
+    assert manager.system is system_config
+    assert len(received) == 1
+    assert received[0][1].short_term.capacity == 5
+
+def test_bound_method_subscribers_do_not_leak(config_dir):
+    manager = ConfigManager(config_dir)
+    
+    class Listener:
+        calls = 0
+        def on_change(self, new, old):
+            Listener.calls += 1
+    
+    listener = Listener()
+    manager.subscribe("memory", listener.on_change)
+    manager.update_module_config("memory", {"memory": {}})
+    del listener
+    manager.update_module_config("memory", {"memory": {}})
+    assert Listener.calls == 1
+
+def test_build_config_ignores_unknown_keys():
+    config = build_config(SystemConfig, {"name": "x", "unknown": 1})
+    assert config.name == "x"
@@ -0,0 +1,81 @@
+"""
+Тесты пула процессов для CPU-емких вызовов
+"""
+
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+from core.config import ExecutorConfig, PerformanceConfig
+from core.exceptions import ModuleExecutionError
+from core.executor import ProcessExecutor, decode, encode, worker_resource
+
+def scale(array, factor):
+    return array * factor, os.getpid()
+
+def sleep_for(seconds):
+    time.sleep(seconds)
+
+def load_lexicon():
+    return {"хорошо": 1.0}
+
+def lexicon_size():
+    return len(worker_resource(f"{__name__}:load_lexicon", {}))
+
+def _executor(max_workers=1, **executor):
+    config = PerformanceConfig(
+        response_timeout=30, executor=ExecutorConfig(enabled=True, max_workers=max_workers, **executor)
+    )
+    return ProcessExecutor(lambda: config)
+
+def test_encode_uses_shared_memory_for_large_buffers():
+    array = np.arange(1000, dtype=np.float64)
+    payload, segments = encode(array, shm_threshold=1024)
+    assert [kind for kind, _, _ in payload.buffers] == ["shm"]
+    restored, attached = decode(payload, copy=True)
+    for segment in segments + attached:
+        segment.close()
+    segments[0].unlink()
+    assert np.array_equal(restored, array)
+
+def test_process_executor_runs_prewarmed_workers_and_times_out():
+    executor = _executor(shm_threshold_bytes=1024, warmup=(f"{__name__}:load_lexicon",))
+    
+    async def run():
+        await executor.start()
+        result, pid = await executor.run(scale, np.ones(10000), 2.0)
+        assert pid != os.getpid()
+        assert result.sum() == 20000.0
+        assert await executor.run(lexicon_size) == 1
+        health = await executor.health()
+        assert health["status"] == "healthy"
+        with pytest.raises(ModuleExecutionError):
+            await executor.run(sleep_for, 5, timeout=0.5)
+        assert executor.restarts == 1
+    
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+def test_timeout_replaces_only_the_hung_worker():
+    executor = _executor(max_workers=2)
+    
+    async def run():
+        await executor.run(scale, np.ones(3), 1.0)
+        other = asyncio.ensure_future(executor.run(sleep_for, 1))
+        with pytest.raises(ModuleExecutionError):
+            await executor.run(sleep_for, 5, timeout=0.5)
+        # Задача другого процесса завершается, несмотря на перезапуск зависшего
+        assert await other is None
+        await executor.run(scale, np.ones(3), 1.0)
+    
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert executor.restarts == 1 and executor.timeouts == 1
+    assert executor.completed == 3
@@ -0,0 +1,151 @@
+"""
+Тесты планировщика фоновых задач
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from core.config import SchedulerConfig, JobScheduleConfig
+from core.scheduler import CronTrigger, IntervalTrigger, JobScheduler
+
+def _scheduler(load=0, **overrides):
+    config = SchedulerConfig(**{"jitter": 0.0, **overrides})
+    return JobScheduler(lambda: config, load=lambda: load)
+
+def test_cron_trigger_next_run():
+    trigger = CronTrigger("30 3 * * *")
+    now = datetime(2030, 1, 1, 12, 0).timestamp()
+    assert datetime.fromtimestamp(trigger.next_after(now)) == datetime(2030, 1, 2, 3, 30)
+    
+    weekly = CronTrigger("0 9 * * 1")
+    assert datetime.fromtimestamp(weekly.next_after(now)) == datetime(2030, 1, 7, 9, 0)
+    
+    stepped = CronTrigger("*/15 * * * *")
+    assert datetime.fromtimestamp(stepped.next_after(now)) == datetime(2030, 1, 1, 12, 15)
+    
+    with pytest.raises(ValueError):
+        CronTrigger("61 * * * *")
+
+def test_higher_priority_runs_first():
+    scheduler = _scheduler()
+    calls = []
+    scheduler.add_job("low", lambda ctx: calls.append("low"), IntervalTrigger(10), priority="low", start_now=True)
+    scheduler.add_job("high", lambda ctx: calls.append("high"), IntervalTrigger(10), priority="high", start_now=True)
+    
+    assert sorted(scheduler.tick()) == ["high", "low"]
+    assert scheduler.stats()["queues"] == {"high": 1, "medium": 0, "low": 1}
+    while scheduler.run_next():
+        pass
+    assert calls == ["high", "low"]
+    assert scheduler.get_job("low").next_run > time.time()
+
+def test_low_priority_deferred_under_foreground_load():
+    scheduler = _scheduler(load=10, max_foreground_depth=4, load_backoff_seconds=2.0)
+    calls = []
+    job = scheduler.add_job("job", calls.append, IntervalTrigger(10), priority="low", start_now=True)
+    urgent = scheduler.add_job("urgent", calls.append, IntervalTrigger(10), priority="high", start_now=True)
+    
+    scheduler.tick()
+    scheduler.run_next()
+    scheduler.run_next()
+    
+    assert job.skipped_load == 1 and job.runs == 0
+    assert urgent.runs == 1
+    assert job.state == "idle" and job.next_run > time.time()
+
+def test_interval_job_coalesces_missed_periods():
+    scheduler = _scheduler()
+    job = scheduler.add_job("job", lambda ctx: None, IntervalTrigger(0.01))
+    job.scheduled_at = job.next_run = time.time() - 0.055
+    
+    scheduler.tick()
+    assert scheduler.run_next() == "job"
+    assert job.coalesced == 5 and job.runs == 1
+
+def test_budget_and_rate_limits():
+    scheduler = _scheduler(cpu_budget={"low": 0.01}, rate_per_minute={"medium": 1})
+    scheduler._budgets["low"].charge(1.0)
+    starved = scheduler.add_job("starved", lambda ctx: None, IntervalTrigger(10), priority="low", start_now=True)
+    first = scheduler.add_job("first", lambda ctx: None, IntervalTrigger(10), priority="medium", start_now=True)
+    second = scheduler.add_job("second", lambda ctx: None, IntervalTrigger(10), priority="medium", start_now=True)
+    
+    scheduler.tick()
+    while scheduler._queue.qsize():
+        scheduler.run_next()
+    
+    assert starved.skipped_budget == 1
+    assert first.runs + second.runs == 1
+    assert first.skipped_rate + second.skipped_rate == 1
+
+def test_config_overrides_trigger_and_disables_job():
+    scheduler = _scheduler(jobs={
+        "nightly": JobScheduleConfig(cron="0 2 * * *", priority="high"),
+        "off": JobScheduleConfig(enabled=False),
+    })
+    nightly = scheduler.add_job("nightly", lambda ctx: None, IntervalTrigger(1))
+    off = scheduler.add_job("off", lambda ctx: None, IntervalTrigger(10), start_now=True)
+    
+    assert scheduler.priority_of(nightly) == "high"
+    assert datetime.fromtimestamp(nightly.next_run).time().hour == 2
+    assert scheduler.tick() == []
+    assert off.next_run > time.time()
+
+def test_shutdown_cancels_running_job():
+    scheduler = _scheduler(workers=1, tick_seconds=0.05)
+    seen = []
+    
+    def long_job(ctx):
+        while not ctx.cancelled:
+            time.sleep(0.01)
+        seen.append("cancelled")
+    
+    scheduler.add_job("long", long_job, IntervalTrigger(10), priority="high", start_now=True)
+    scheduler.start()
+    deadline = time.time() + 2
+    while scheduler.get_job("long").state != "running" and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.shutdown(timeout=2)
+    
+    assert seen == ["cancelled"]
+    assert not scheduler.running
+
+def test_deferred_job_runs_once_when_load_drops():
+    load = [10]
+    scheduler = JobScheduler(
+        lambda: SchedulerConfig(jitter=0.0, max_foreground_depth=4, load_backoff_seconds=2.0), load=lambda: load[0]
+    )
+    calls = []
+    job = scheduler.add_job("job", calls.append, IntervalTrigger(0.01))
+    job.scheduled_at = job.next_run = time.time() - 0.055
+    
+    assert scheduler.tick() == ["job"]
+    assert scheduler.run_next() is None
+    assert job.skipped_load == 1 and not calls
+    assert job.next_run > time.time() + 1
+    
+    # Пропущенные за время откладывания периоды объединяются в один запуск
+    load[0] = 0
+    job.next_run = time.time()
+    assert scheduler.tick() == ["job"]
+    assert scheduler.run_next() == "job"
+    assert len(calls) == 1 and job.runs == 1 and job.coalesced >= 5
+
+def test_job_deadline_follows_remaining_cpu_budget():
+    scheduler = _scheduler(cpu_budget={"low": 0.01}, budget_window_seconds=60)
+    budgets = []
+    job = scheduler.add_job(
+        "job", lambda ctx: budgets.append(ctx.cpu_deadline - time.thread_time()), IntervalTrigger(10),
+        priority="low", start_now=True
+    )
+    
+    scheduler.tick()
+    assert scheduler.run_next() == "job"
+    assert 0 < budgets[0] <= 0.6
+    
+    scheduler._budgets["low"].charge(1.0)
+    job.next_run = time.time()
+    scheduler.tick()
+    assert scheduler.run_next() is None
+    assert job.skipped_budget == 1 and job.runs == 1 and len(budgets) == 1
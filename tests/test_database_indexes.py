@@ -0,0 +1,131 @@
+"""
+Регрессионные тесты планов запросов: CRUD запросы должны использовать индексы
+"""
+
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from database import crud
+from database.models import Base
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+def _capture_plans(engine, run_query):
+    """Выполнение CRUD запроса и получение плана каждого выполненного SELECT"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    session = sessionmaker(bind=engine)()
+    try:
+        run_query(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    
+    plans = []
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        cursor = raw.cursor()
+        for statement, parameters in statements:
+            if engine.dialect.name == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                plans.append("\n".join(row[-1] for row in cursor.fetchall()))
+            else:
+                cursor.execute("SET enable_seqscan = off")
+                cursor.execute("EXPLAIN " + statement, parameters)
+                plans.append("\n".join(row[0] for row in cursor.fetchall()))
+    session.close()
+    return plans
+
+CRUD_QUERIES = [
+    ("ix_memories_type_importance_created",
+     lambda db: crud.crud_memory.search(db, "тест", memory_type="fact", limit=10)),
+    ("ix_memories_importance_created",
+     lambda db: crud.crud_memory.search(db, "тест", limit=10)),
+    ("ix_interactions_session_created",
+     lambda db: crud.crud_interaction.get_session_interactions(db, "session-1")),
+    ("ix_interactions_user_created",
+     lambda db: crud.crud_interaction.get_user_interactions(db, "user-1")),
+    ("ix_mood_history_created_at",
+     lambda db: crud.crud_mood_history.get_mood_history(db, hours=24)),
+    ("ix_mood_history_created_at",
+     lambda db: crud.crud_mood_history.get_current_mood(db)),
+    ("ix_system_logs_level_created",
+     lambda db: crud.crud_system_log.get_recent_logs(db, level="ERROR")),
+    ("ix_system_logs_created_at",
+     lambda db: crud.crud_system_log.get_recent_logs(db)),
+    ("ix_system_state_created_at",
+     lambda db: crud.crud_system_state.get_current(db)),
+]
+
+def _engines():
+    engines = [pytest.param("sqlite", id="sqlite")]
+    engines.append(pytest.param(
+        "postgresql", id="postgresql",
+        marks=pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL не задан")
+    ))
+    return engines
+
+@pytest.fixture(params=_engines())
+def engine(request):
+    if request.param == "sqlite":
+        engine = create_engine("sqlite:///:memory:")
+    else:
+        engine = create_engine(POSTGRES_URL)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    if request.param != "sqlite":
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.mark.parametrize("index_name, run_query", CRUD_QUERIES)
+def test_crud_queries_use_indexes(engine, index_name, run_query):
+    plans = _capture_plans(engine, run_query)
+    assert plans, "CRUD метод не выполнил ни одного SELECT"
+    assert any(index_name in plan for plan in plans), "\n".join(plans)
+
+def test_migrations_create_indexes_on_legacy_database(tmp_path):
+    """БД, созданная до появления миграций, получает индексы через alembic upgrade"""
+    from alembic import command
+    from alembic.config import Config
+    
+    migrations_dir = project_root / "database" / "migrations"
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    alembic_cfg = Config(str(migrations_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(migrations_dir))
+    alembic_cfg.attributes["configure_logger"] = False
+    
+    with engine.begin() as connection:
+        alembic_cfg.attributes["connection"] = connection
+        command.upgrade(alembic_cfg, "0001_initial_schema")
+        connection.execute(text(
+            "INSERT INTO memories (content, memory_type, importance) VALUES ('старое', 'fact', 0.5)"
+        ))
+        command.upgrade(alembic_cfg, "head")
+    
+    inspector = inspect(engine)
+    model_indexes = {
+        index.name
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    db_indexes = {
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+    assert model_indexes <= db_indexes
+    assert "ix_memories_last_accessed_active" not in db_indexes
+    assert "user_id" in {column["name"] for column in inspector.get_columns("interactions")}
+    engine.dispose()
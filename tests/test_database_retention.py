@@ -0,0 +1,90 @@
+"""
+Тесты месячного хранения истории и удаления по сроку (SQLite шарды)
+"""
+
+import gzip
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from core.config import RetentionConfig, RetentionTableConfig
+from database.models import Base, Interaction
+from database.retention import RetentionManager, add_months, parse_partition_name
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'retention.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def manager(engine, tmp_path):
+    config = RetentionConfig(
+        sqlite_hot_months=1,
+        archive_directory=str(tmp_path / "archive"),
+        tables={"interactions": RetentionTableConfig(retention_seconds=40 * 86400, archive=True)}
+    )
+    return RetentionManager(engine, lambda: config)
+
+def _add_interactions(engine, moments):
+    session = sessionmaker(bind=engine)()
+    for moment in moments:
+        session.add(Interaction(user_input="привет", ai_response="привет!", created_at=moment))
+    session.commit()
+    session.close()
+
+def test_month_helpers():
+    assert add_months(datetime(2026, 12, 1), 1) == datetime(2027, 1, 1)
+    assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+    assert parse_partition_name("mood_history_p202609") == ("mood_history", datetime(2026, 9, 1))
+    assert parse_partition_name("interactions") is None
+
+def test_rollover_and_expire_drops_whole_shards(engine, manager, tmp_path):
+    now = datetime(2026, 10, 19)
+    _add_interactions(engine, [
+        datetime(2026, 8, 3), datetime(2026, 8, 20),
+        datetime(2026, 9, 10),
+        datetime(2026, 10, 5),
+    ])
+    
+    result = manager.ensure_partitions("interactions", now)
+    assert result.rolled_over == ["interactions_p202608", "interactions_p202609"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM interactions")).scalar() == 1
+    
+    expired = manager.expire("interactions", now)
+    assert expired.dropped == ["interactions_p202608"]
+    assert "interactions_p202608" not in inspect(engine).get_table_names()
+    assert "interactions_p202609" in inspect(engine).get_table_names()
+    
+    archive = Path(expired.archived[0])
+    with gzip.open(archive, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 2
+    assert rows[0]["user_input"] == "привет"
+
+def test_sqlite_rollover_is_archive_only(engine, manager):
+    from database import crud
+    
+    _add_interactions(engine, [datetime(2026, 8, 3), datetime(2026, 10, 5)])
+    manager.ensure_partitions("interactions", datetime(2026, 10, 19))
+    
+    # Перенесенные в шард записи не видны чтению истории, но сохранены в шарде
+    session = sessionmaker(bind=engine)()
+    assert [row.created_at for row in crud.crud_interaction.export_query(session)] == [datetime(2026, 10, 5)]
+    session.close()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM interactions_p202608")).scalar() == 1
+
+def test_tables_without_policy_are_kept(engine, manager):
+    assert manager.retention_seconds("system_logs") is None
+    assert manager.expire("system_logs", datetime(2030, 1, 1)).dropped == []
@@ -0,0 +1,3 @@
+"""
+Module tests
+"""
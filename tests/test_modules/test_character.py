@@ -0,0 +1,177 @@
+"""
+Тесты модуля характера
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.config import HabitMiningConfig, MoralCompassConfig, MoralRuleConfig
+from core.exceptions import ModuleExecutionError
+from database import crud
+from database.models import Base, CharacterHabit, Interaction
+from modules.character.behavioral_patterns import CountMinSketch, HeavyHitters, IntentSequences, ngram_patterns
+from modules.character.habits import CANDIDATES_PARAMETER, WATERMARK_PARAMETER, HabitMiner
+from modules.character.moral_compass import MoralCompass
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'character.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+def _add_interactions(db, messages, session_id="s1"):
+    db.add_all([
+        Interaction(session_id=session_id, user_input=text, ai_response="ok", context_data={"intent": intent})
+        for text, intent in messages
+    ])
+    db.commit()
+
+def test_count_min_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=3)
+    keys = [f"k{i % 40}" for i in range(400)]
+    sketch.add_many(keys)
+    
+    estimates = sketch.estimate([f"k{i}" for i in range(40)])
+    assert np.all(estimates >= 10)
+    assert sketch.total == 400
+
+def test_heavy_hitters_keeps_most_frequent():
+    sketch = CountMinSketch(width=1024, depth=4)
+    hitters = HeavyHitters(k=2)
+    for _ in range(5):
+        keys = ["часто"] * 5 + ["иногда"] * 3 + [f"редко{i}" for i in range(10)]
+        hitters.offer_many(keys, sketch.add_many(keys))
+    
+    top = [key for key, _ in hitters.items()[:2]]
+    assert top == ["часто", "иногда"]
+    assert len(hitters) <= 4
+
+def test_patterns_ngrams_and_intent_sequences():
+    assert ngram_patterns("Как дела сегодня", (2,)) == ["ngram:как дел", "ngram:дел сегодн"]
+    
+    sequences = IntentSequences(length=2, max_sessions=1)
+    assert sequences.push("a", "greeting") is None
+    assert sequences.push("a", "wellbeing") == "intents:greeting>wellbeing"
+    sequences.push("b", "greeting")
+    assert sequences.push("a", "farewell") is None
+
+def test_miner_promotes_frequent_patterns_and_resumes_from_watermark(session_factory):
+    miner = HabitMiner(lambda: HabitMiningConfig(chunk_size=4, ngram_sizes=(2,), min_support=3, top_k=10))
+    db = session_factory()
+    _add_interactions(db, [("привет как дела", "greeting"), ("как дела друг", "wellbeing")] * 3)
+    
+    report = miner.run(db)
+    assert report.processed == 6
+    habits = {habit.habit_name: habit for habit in db.query(CharacterHabit)}
+    assert habits["ngram:как дел"].frequency == 6
+    assert habits["intents:greeting>wellbeing"].frequency == 3
+    assert 0 < habits["ngram:как дел"].strength < 1
+    assert crud.crud_system_state.get_parameter(db, WATERMARK_PARAMETER) == report.watermark
+    
+    _add_interactions(db, [("как дела", "wellbeing")])
+    report = miner.run(db)
+    assert report.processed == 1
+    db.expire_all()
+    assert db.query(CharacterHabit).filter_by(habit_name="ngram:как дел").one().frequency == 7
+    assert miner.run(db).processed == 0
+    db.close()
+
+def test_miner_keeps_candidates_across_restart_and_failed_commit(session_factory):
+    config = HabitMiningConfig(chunk_size=10, ngram_sizes=(2,), intent_sequence_length=0, min_support=3, top_k=10)
+    db = session_factory()
+    _add_interactions(db, [("добрый вечер", "greeting")] * 2)
+    HabitMiner(lambda: config).run(db)
+    assert db.query(CharacterHabit).count() == 0
+    assert crud.crud_system_state.get_parameter(db, CANDIDATES_PARAMETER)["ngram:добр вечер"] == 2
+    
+    # Новый процесс: сохраненный счет кандидата возвращается в sketch
+    miner = HabitMiner(lambda: config)
+    _add_interactions(db, [("добрый вечер", "greeting")])
+    original_commit = db.commit
+    
+    def failing_commit():
+        raise RuntimeError("сбой БД")
+    
+    db.commit = failing_commit
+    with pytest.raises(RuntimeError):
+        miner.run(db)
+    db.rollback()
+    db.commit = original_commit
+    
+    # Повтор после сбоя не учитывает то же взаимодействие дважды
+    report = miner.run(db)
+    assert report.processed == 1 and report.habits_created == 1
+    assert db.query(CharacterHabit).filter_by(habit_name="ngram:добр вечер").one().frequency == 3
+    assert crud.crud_system_state.get_parameter(db, CANDIDATES_PARAMETER) == {}
+    db.close()
+
+def test_miner_continues_intent_sequences_across_restart(session_factory):
+    config = HabitMiningConfig(chunk_size=10, ngram_sizes=(), intent_sequence_length=2, min_support=1, top_k=10)
+    db = session_factory()
+    _add_interactions(db, [("привет", "greeting")])
+    assert HabitMiner(lambda: config).run(db).habits_created == 0
+    
+    # Вторая половина последовательности обрабатывается новым процессом
+    _add_interactions(db, [("пока", "farewell")])
+    report = HabitMiner(lambda: config).run(db)
+    assert report.processed == 1 and report.habits_created == 1
+    assert db.query(CharacterHabit).one().frequency == 1
+    db.close()
+
+def _compass(*rules, **overrides):
+    holder = {"config": MoralCompassConfig(rules=tuple(rules), **overrides)}
+    return MoralCompass(lambda: holder["config"]), holder
+
+def test_moral_compass_checks_rules_of_scope_in_one_pass():
+    compass, _ = _compass(
+        MoralRuleConfig(name="harm", value="safety", scope="input", terms=("сделать бомбу",)),
+        MoralRuleConfig(name="insult", value="respect", scope="response", terms=("дурак",)),
+        MoralRuleConfig(name="email", value="privacy", action="flag", patterns=(r"[\w.]+@[\w.]+",)),
+        values={"safety": 100, "privacy": 80, "respect": 60},
+    )
+    verdict = compass.check("Как сделать бомбы? пиши на a@b.ru", "input")
+    assert not verdict.allowed
+    assert verdict.rules == ["harm", "email"] and verdict.value == "safety"
+    
+    assert compass.check("Ты дурак", "input").allowed
+    assert not compass.check("Ты дурак", "response").allowed
+    flagged = compass.check("Мой адрес a@b.ru", "response")
+    assert flagged.allowed and flagged.rules == ["email"]
+    
+    accepted, verdicts = compass.filter(["Сам дурак", "Давайте поговорим спокойно"])
+    assert accepted == "Давайте поговорим спокойно" and len(verdicts) == 2
+
+def test_moral_compass_caches_verdicts_and_counts_hits():
+    compass, holder = _compass(MoralRuleConfig(name="insult", terms=("дурак",)), cache_size=2)
+    for text in ("дурак", "дурак", "привет", "пока"):
+        compass.check(text)
+    stats = compass.stats()
+    assert stats["checks"] == 4 and stats["cache_hits"] == 1 and stats["cache_size"] == 2
+    assert stats["rules"]["insult"]["hits"] == 2 and stats["blocked"] == 2
+    assert stats["check_ms"]["response"]["count"] == 3
+    
+    # Некорректное правило не заменяет рабочие; новые правила сбрасывают кеш
+    holder["config"] = MoralCompassConfig(rules=(MoralRuleConfig(name="bad", patterns=("(",)),))
+    assert compass.reload() is False
+    assert not compass.check("дурак").allowed
+    holder["config"] = MoralCompassConfig(rules=(MoralRuleConfig(name="rude", terms=("грубиян",)),))
+    assert compass.reload() is True
+    assert compass.check("дурак").allowed and compass.stats()["cache_size"] == 1
+    
+    with pytest.raises(ModuleExecutionError):
+        _compass(MoralRuleConfig(name="bad", action="warn"))
+
+def test_moral_compass_async_check():
+    compass, _ = _compass(MoralRuleConfig(name="harm", scope="input", terms=("бомба",)))
+    
+    async def check():
+        return await asyncio.gather(compass.check_async("бомба", "input"), compass.check_async("бомба", "input"))
+    
+    first, second = asyncio.run(check())
+    assert not first.allowed and first == second
@@ -0,0 +1,213 @@
+"""
+Тесты модуля коммуникации
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from core.config import StyleConfig
+from core.exceptions import ModuleExecutionError
+from modules.communication.communication_style import StyleEngine, build_table, compile_template
+from modules.communication.response_generator import (
+    GenerationBackend,
+    GenerationRequest,
+    MicroBatcher,
+)
+
+class RecordingBackend(GenerationBackend):
+    name = "recording"
+    
+    def __init__(self):
+        self.batches = []
+        self.thread_names = set()
+    
+    def generate_batch(self, requests):
+        self.batches.append([request.message for request in requests])
+        self.thread_names.add(threading.current_thread().name)
+        return [request.message.upper() for request in requests]
+
+def test_micro_batcher_groups_and_coalesces_concurrent_requests():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=4, max_wait_ms=50)
+    
+    async def run():
+        messages = ["a", "b", "a", "c", "d", "e"]
+        return await asyncio.gather(*(batcher.submit(GenerationRequest(m)) for m in messages))
+    
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.stop()
+    
+    assert results == ["A", "B", "A", "C", "D", "E"]
+    assert backend.thread_names == {"response-generator"}
+    assert sorted(m for batch in backend.batches for m in batch) == ["a", "b", "c", "d", "e"]
+    assert max(len(batch) for batch in backend.batches) <= 4
+    stats = batcher.stats()
+    assert stats["coalesced"] == 1
+    assert stats["queue_wait_ms"]["count"] == 6
+    assert stats["batch_size"]["count"] == len(backend.batches)
+
+def test_response_generator_builds_backend_off_event_loop(monkeypatch):
+    from modules.communication import response_generator as module
+    
+    backend = RecordingBackend()
+    built_in = []
+    
+    def create_backend(config):
+        built_in.append(threading.current_thread().name)
+        return backend
+    
+    monkeypatch.setattr(module, "create_backend", create_backend)
+    generator = module.ResponseGenerator()
+    
+    async def run():
+        loop_thread = threading.current_thread().name
+        return loop_thread, await generator.generate("привет")
+    
+    try:
+        loop_thread, result = asyncio.run(run())
+    finally:
+        generator.shutdown()
+    assert result == "ПРИВЕТ"
+    assert len(built_in) == 1 and built_in[0] != loop_thread
+
+def test_stopped_micro_batcher_rejects_requests_without_restarting():
+    batcher = MicroBatcher(RecordingBackend(), max_wait_ms=1)
+    assert asyncio.run(batcher.submit(GenerationRequest("a"))) == "A"
+    batcher.stop()
+    
+    with pytest.raises(ModuleExecutionError):
+        asyncio.run(batcher.submit(GenerationRequest("b")))
+    assert batcher.closed and batcher._thread is None
+
+def test_micro_batcher_propagates_backend_errors():
+    class FailingBackend(GenerationBackend):
+        def generate_batch(self, requests):
+            raise RuntimeError("сбой модели")
+    
+    batcher = MicroBatcher(FailingBackend(), max_wait_ms=1)
+    
+    async def run():
+        try:
+            await batcher.submit(GenerationRequest("x"))
+        except RuntimeError as e:
+            return str(e)
+    
+    try:
+        assert asyncio.run(run()) == "сбой модели"
+    finally:
+        batcher.stop()
+
+def test_session_kv_cache_evicts_least_recent_session():
+    from modules.communication.response_generator import SessionKVCache
+    
+    cache = SessionKVCache(max_sessions=2)
+    cache.put("s1", "ids1", "kv1")
+    cache.put("s2", "ids2", "kv2")
+    assert cache.get("s1") == ("ids1", "kv1", frozenset())
+    cache.put("s3", "ids3", "kv3")
+    assert cache.get("s2") is None
+    assert len(cache) == 2
+
+@pytest.mark.parametrize("family", ["gpt2", "llama"])
+def test_mmap_model_loads_tiny_checkpoint_and_generates(tmp_path, family):
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    from modules.communication.response_generator import _load_mmap_model
+    
+    if family == "gpt2":
+        config = transformers.GPT2Config(n_layer=1, n_head=2, n_embd=16, n_positions=32, vocab_size=64)
+    else:
+        # У llama непостоянный буфер inv_freq, которого нет в state_dict
+        config = transformers.LlamaConfig(
+            hidden_size=16, intermediate_size=32, num_hidden_layers=1, num_attention_heads=2,
+            num_key_value_heads=2, max_position_embeddings=32, vocab_size=64
+        )
+    torch.manual_seed(0)
+    reference = transformers.AutoModelForCausalLM.from_config(config).eval()
+    reference.save_pretrained(tmp_path / "model")
+    
+    model = _load_mmap_model(str(tmp_path / "model"), str(tmp_path / "cache")).eval()
+    assert not any(tensor.is_meta for tensor in itertools.chain(model.parameters(), model.buffers()))
+    input_ids = torch.tensor([[1, 2, 3]])
+    kwargs = dict(attention_mask=torch.ones_like(input_ids), max_new_tokens=4, do_sample=False, pad_token_id=0)
+    with torch.inference_mode():
+        assert torch.equal(model.generate(input_ids, **kwargs), reference.generate(input_ids, **kwargs))
+
+def test_session_continuation_sends_only_new_context_lines():
+    torch = pytest.importorskip("torch")
+    from modules.communication.response_generator import (
+        GenerationRequest, SessionKVCache, TransformersBackend,
+    )
+    
+    class Tokenizer:
+        pad_token_id = 0
+        prompts = []
+        
+        def __call__(self, text, return_tensors):
+            self.prompts.append(text)
+            return {"input_ids": torch.ones((1, len(text.split())), dtype=torch.long)}
+        
+        def decode(self, ids, skip_special_tokens):
+            return "ответ"
+    
+    backend = TransformersBackend.__new__(TransformersBackend)
+    backend.config = SimpleNamespace(max_context_tokens=1000)
+    backend.kv_cache = SessionKVCache()
+    backend._torch = torch
+    backend.tokenizer = Tokenizer()
+    backend.model = SimpleNamespace(generate=lambda input_ids, past_key_values, **kwargs: SimpleNamespace(
+        sequences=torch.cat([input_ids, torch.zeros((1, 1), dtype=torch.long)], dim=1), past_key_values="kv2"
+    ))
+    backend.kv_cache.put("s", torch.ones((1, 3), dtype=torch.long), "kv1", frozenset({"Память: кошка"}))
+    
+    request = GenerationRequest("как дела", context="Память: кошка\nПамять: собака", session_id="s")
+    assert backend.generate_batch([request]) == ["ответ"]
+    assert "Память: собака" in Tokenizer.prompts[-1] and "кошка" not in Tokenizer.prompts[-1]
+    assert backend.kv_cache.get("s")[2] == {"Память: кошка", "Память: собака"}
+
+def test_compile_template_substitutes_named_fields():
+    assert compile_template("Привет!").render({}) == "Привет!"
+    assert compile_template("Вы сказали: '{message}'.").render({"message": "да"}) == "Вы сказали: 'да'."
+    assert compile_template("{a} и {b}").render({"a": 1, "b": 2}) == "1 и 2"
+    with pytest.raises(ValueError):
+        compile_template("{0:>5}")
+
+def test_build_table_resolves_most_specific_variant():
+    table = build_table([
+        {"intent": "greeting", "text": "общий"},
+        {"intent": "greeting", "mood": "happy", "text": "радостный"},
+        {"intent": "greeting", "bucket": "low", "text": "сдержанный"},
+        {"intent": "greeting", "mood": "happy", "bucket": "high", "text": "восторженный"},
+    ], moods=("happy", "sad"))
+    
+    assert table[("greeting", "happy", "high")].source == "восторженный"
+    assert table[("greeting", "happy", "mid")].source == "радостный"
+    assert table[("greeting", "sad", "low")].source == "сдержанный"
+    assert table[("greeting", "sad", "mid")].source == "общий"
+
+def test_style_engine_reloads_changed_template_file(tmp_path):
+    path = tmp_path / "templates.json"
+    
+    def write(text, mtime):
+        path.write_text(json.dumps({"templates": [{"intent": "greeting", "text": text}]}), encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+    
+    write("Привет!", 1_000_000)
+    engine = StyleEngine(lambda: StyleConfig(templates_path=str(path), reload_check_seconds=0))
+    throttled = StyleEngine(lambda: StyleConfig(templates_path=str(path), reload_check_seconds=3600))
+    assert engine.render("greeting") == "Привет!"
+    version = engine.version
+    
+    write("Здравствуйте!", 2_000_000)
+    assert engine.render("greeting") == "Здравствуйте!"
+    assert engine.version == version + 1
+    # Файл не проверяется чаще reload_check_seconds
+    assert throttled.render("greeting") == "Привет!"
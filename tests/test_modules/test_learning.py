@@ -0,0 +1,105 @@
+"""
+Тесты модуля обучения
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.config import LearningParametersConfig, PersonalityConfig
+from database.models import Base, LearningExperience
+from modules.learning.adaptive_learning import LESSON_TYPE, AdaptiveLearner
+from modules.learning.experience_processor import Experience, ExperienceProcessor, InteractionEvent
+from modules.personality.traits import PersonalityTraits
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'learning.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+def _learner(session_factory=None, **overrides):
+    config = LearningParametersConfig(**overrides)
+    personality_config = PersonalityConfig(drift_rate=0.1)
+    traits = PersonalityTraits(None, lambda: personality_config, autopersist=False)
+    processor = ExperienceProcessor(lambda: config)
+    return AdaptiveLearner(processor, lambda: config, session_factory, traits)
+
+def test_reaction_to_previous_response_becomes_experience():
+    processor = ExperienceProcessor(lambda: LearningParametersConfig(max_pending_events=2))
+    processor.submit(InteractionEvent("s", "greeting", "neutral", "high", "neutral", 0.0))
+    processor.submit(InteractionEvent("s", "fallback", "happy", "mid", "happy", 0.5))
+    processor.submit(InteractionEvent("other", "greeting", "neutral", "mid", "sad", 1.0))
+    
+    # Первое событие вытеснено; у оставшихся нет предыдущего ответа в сессии
+    assert processor.dropped == 1
+    assert processor.process(processor.drain()) == []
+    
+    processor.submit(InteractionEvent("s", "farewell", "happy", "mid", "angry", 0.5))
+    assert processor.process(processor.drain()) == [Experience("fallback", "happy", "mid", -0.5)]
+
+def test_update_moves_estimates_and_drifts_style_trait():
+    learner = _learner(learning_rate=0.5, experience_absorption_rate=1.0)
+    before = learner.traits.snapshot()["extraversion"]
+    
+    learner.update([Experience("greeting", "happy", "high", 1.0)] * 2)
+    assert learner.expected_reward("greeting", "happy", "high") == pytest.approx(0.75)
+    assert learner.expected_reward("greeting", "sad", "high") is None
+    assert learner.traits.snapshot()["extraversion"] > before
+    
+    for i in range(40):
+        learner.update([Experience(f"intent{i}", "neutral", "mid", -1.0)])
+    assert len(learner.lessons()) == 41
+
+def test_learn_pending_and_checkpoint_roundtrip(session_factory):
+    learner = _learner(session_factory)
+    for emotion in ("neutral", "happy", "happy"):
+        learner.processor.submit(InteractionEvent("s", "greeting", "neutral", "mid", emotion, 1.0))
+    
+    assert learner.learn_pending() == 2
+    assert learner.checkpoint() == 1
+    assert learner.checkpoint() == 0
+    
+    db = session_factory()
+    lesson = db.query(LearningExperience).filter_by(experience_type=LESSON_TYPE).one()
+    assert lesson.applied_count == 2
+    db.close()
+    
+    restored = _learner(session_factory)
+    assert restored.load() == 1
+    assert restored.expected_reward("greeting", "neutral", "mid") == pytest.approx(lesson.impact_score, abs=1e-4)
+
+def test_preferred_bucket_follows_expected_reward():
+    learner = _learner(
+        learning_rate=1.0, experience_absorption_rate=1.0, trait_drift_weight=0.0,
+        style_min_count=2, style_exploration_rate=0.0
+    )
+    assert learner.preferred_bucket("greeting", "happy", "mid") == "mid"
+    
+    learner.update([Experience("greeting", "happy", "high", 0.9), Experience("greeting", "happy", "mid", 0.1)])
+    # Реакций на корзины еще меньше style_min_count
+    assert learner.preferred_bucket("greeting", "happy", "mid") == "mid"
+    learner.update([Experience("greeting", "happy", "high", 0.9), Experience("greeting", "happy", "mid", 0.1)])
+    assert learner.preferred_bucket("greeting", "happy", "mid") == "high"
+    assert learner.preferred_bucket("greeting", "sad", "mid") == "mid"
+    
+    # Разница в пределах порога не меняет корзину
+    learner.update([Experience("greeting", "happy", "mid", 0.8)])
+    assert learner.preferred_bucket("greeting", "happy", "mid") == "mid"
+    
+    disabled = _learner(reward_guided_style=False, style_min_count=0)
+    disabled.update([Experience("greeting", "happy", "high", 1.0)])
+    assert disabled.preferred_bucket("greeting", "happy", "mid") == "mid"
+
+def test_preferred_bucket_keeps_exploring_trait_bucket():
+    learner = _learner(
+        learning_rate=1.0, experience_absorption_rate=1.0, trait_drift_weight=0.0,
+        style_min_count=1, style_exploration_rate=0.25
+    )
+    learner.update([Experience("greeting", "happy", "high", 1.0), Experience("greeting", "happy", "mid", -1.0)])
+    learner._random.seed(0)
+    choices = [learner.preferred_bucket("greeting", "happy", "mid") for _ in range(400)]
+    assert 50 < choices.count("mid") < 150
+    assert choices.count("high") == 400 - choices.count("mid")
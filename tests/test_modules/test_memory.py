@@ -0,0 +1,367 @@
+"""
+Тесты модуля памяти
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import crud
+from database.models import Base, Memory
+from modules.memory.recall_system import MemoryAccessTracker
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'memory.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+def _create_memories(session_factory, count):
+    db = session_factory()
+    memories = [Memory(content=f"память {i}", memory_type="fact") for i in range(count)]
+    db.add_all(memories)
+    db.commit()
+    ids = [memory.id for memory in memories]
+    db.close()
+    return ids
+
+def test_record_access_batch_updates_counters(session_factory):
+    ids = _create_memories(session_factory, 3)
+    accessed_at = datetime(2030, 1, 1, 12, 0, 0)
+    
+    db = session_factory()
+    updated = crud.crud_memory.record_access_batch(db, {ids[0]: (2, accessed_at), ids[2]: (1, accessed_at)})
+    assert updated == 2
+    
+    rows = {m.id: m for m in db.query(Memory).all()}
+    assert rows[ids[0]].access_frequency == 2
+    assert rows[ids[0]].last_accessed == accessed_at
+    assert rows[ids[1]].access_frequency == 0
+    assert rows[ids[2]].access_frequency == 1
+    db.close()
+
+def test_access_tracker_accumulates_and_flushes_in_batches(session_factory):
+    ids = _create_memories(session_factory, 5)
+    tracker = MemoryAccessTracker(session_factory=session_factory, batch_size=2, autostart=False)
+    
+    tracker.record(ids)
+    tracker.record(ids[:2])
+    assert tracker.pending_count == 5
+    
+    assert tracker.flush() == 5
+    assert tracker.pending_count == 0
+    
+    db = session_factory()
+    frequencies = {m.id: m.access_frequency for m in db.query(Memory).all()}
+    db.close()
+    assert frequencies[ids[0]] == 2
+    assert frequencies[ids[4]] == 1
+
+def test_forgetting_engine_prunes_lowest_retention(session_factory):
+    from modules.memory.long_term import ForgettingEngine, DORMANT_MEMORY_TYPE
+    
+    now = datetime(2030, 1, 1)
+    db = session_factory()
+    db.add_all([
+        # Кратковременная память и факты не учитываются в емкости долговременной
+        Memory(content="короткое", importance=0.0, memory_type="short_term",
+               created_at=now - timedelta(days=90), last_accessed=now - timedelta(days=90)),
+        Memory(content="факт", importance=0.0, memory_type="fact",
+               created_at=now - timedelta(days=90), last_accessed=now - timedelta(days=90)),
+        Memory(content="важное свежее", importance=5.0, created_at=now, last_accessed=now),
+        Memory(content="старое неважное", importance=0.1,
+               created_at=now - timedelta(days=90), last_accessed=now - timedelta(days=90)),
+        Memory(content="старое, но частое", importance=0.3, access_frequency=50,
+               created_at=now - timedelta(days=90), last_accessed=now - timedelta(days=1)),
+        Memory(content="среднее", importance=1.0,
+               created_at=now - timedelta(days=10), last_accessed=now - timedelta(days=10)),
+    ])
+    for memory in db.query(Memory).filter(Memory.content.notin_(["короткое", "факт"])):
+        memory.memory_type = "long_term"
+    db.commit()
+    
+    engine = ForgettingEngine(chunk_size=2, batch_size=1)
+    engine.capacity = 2
+    epoch_now = now.replace(tzinfo=timezone.utc).timestamp()
+    
+    report = engine.run(db, dry_run=True, now=epoch_now)
+    assert report.excess == 2
+    assert report.affected == 0
+    assert report.total == 4
+    assert db.query(Memory).count() == 6
+    contents = {db.get(Memory, memory_id).content for memory_id in report.affected_ids}
+    assert contents == {"старое неважное", "среднее"}
+    
+    engine.mode = "demote"
+    report = engine.run(db, now=epoch_now)
+    assert report.affected == 2
+    assert db.query(Memory).filter(Memory.memory_type == DORMANT_MEMORY_TYPE).count() == 2
+    assert engine.run(db, now=epoch_now).excess == 0
+    db.close()
+
+def test_tag_index_and_or_queries_and_incremental_sync(session_factory):
+    from modules.memory.tag_index import TagIndex
+    
+    ids = _create_memories(session_factory, 4)
+    db = session_factory()
+    work, music, family = crud.crud_tag.get_or_create_many(db, ["Работа", "музыка", "семья"])
+    crud.crud_tag.attach(db, ids[0], [work.id, music.id])
+    crud.crud_tag.attach(db, ids[1], [work.id])
+    crud.crud_tag.attach(db, ids[2], [music.id, family.id])
+    
+    index = TagIndex()
+    assert index.sync(db, batch_size=2) == 5
+    assert index.query([work.id, music.id], "and").tolist() == [ids[0]]
+    assert index.query([work.id, family.id], "or").tolist() == [ids[0], ids[1], ids[2]]
+    assert index.query([work.id, None], "and").tolist() == []
+    
+    crud.crud_tag.attach(db, ids[3], [family.id])
+    assert index.sync(db) == 1
+    assert index.query([family.id], "and").tolist() == [ids[2], ids[3]]
+    
+    index.remove_memories([ids[2]])
+    assert index.query([family.id, music.id], "or").tolist() == [ids[0], ids[3]]
+    assert crud.crud_tag.get_or_create_many(db, ["работа"])[0].id == work.id
+    db.close()
+
+def test_tag_index_sync_pages_within_one_memory(session_factory):
+    from modules.memory.tag_index import TagIndex
+    
+    ids = _create_memories(session_factory, 2)
+    db = session_factory()
+    tags = crud.crud_tag.get_or_create_many(db, [f"тег{i}" for i in range(5)])
+    crud.crud_tag.attach(db, ids[0], [tag.id for tag in tags])
+    crud.crud_tag.attach(db, ids[1], [tags[0].id])
+    
+    # Связи первой памяти не помещаются в один пакет
+    index = TagIndex()
+    assert index.sync(db, batch_size=2) == 6
+    assert index.query([tag.id for tag in tags], "and").tolist() == [ids[0]]
+    assert index.query([tags[0].id], "and").tolist() == [ids[0], ids[1]]
+    db.close()
+
+def test_tag_index_sync_picks_up_links_committed_late(session_factory):
+    from modules.memory.tag_index import TagIndex
+    
+    ids = _create_memories(session_factory, 3)
+    db = session_factory()
+    first, second = crud.crud_tag.get_or_create_many(db, ["первый", "второй"])
+    crud.crud_tag.attach(db, ids[0], [first.id])
+    crud.crud_tag.attach(db, ids[2], [first.id])
+    
+    index = TagIndex()
+    assert index.sync(db) == 2
+    # Теги второй памяти зафиксированы после связей третьей
+    crud.crud_tag.attach(db, ids[1], [first.id, second.id])
+    assert index.sync(db) == 2
+    assert index.sync(db) == 0
+    assert index.query([first.id], "and").tolist() == ids
+    assert index.query([second.id], "and").tolist() == [ids[1]]
+    db.close()
+
+def test_memory_search_limits_to_long_id_list(session_factory, monkeypatch):
+    monkeypatch.setattr(crud, "MAX_IN_IDS", 2)
+    ids = _create_memories(session_factory, 5)
+    db = session_factory()
+    
+    found = crud.crud_memory.search_any(db, ["память"], limit=2, memory_ids=ids[1:4])
+    assert len(found) == 2 and {memory.id for memory in found} <= set(ids[1:4])
+    assert {memory.id for memory in crud.crud_memory.get_recent(db, memory_ids=ids[1:4])} == set(ids[1:4])
+    assert crud.crud_memory.search(db, "память", memory_ids=ids[:2], limit=10)
+    db.close()
+
+def test_dormant_memories_are_hidden_from_default_queries(session_factory):
+    from modules.memory.recall_system import RecallRanker
+    
+    db = session_factory()
+    db.add_all([
+        Memory(content="кошка спит", memory_type="long_term"),
+        Memory(content="кошка забыта", memory_type=crud.DORMANT_MEMORY_TYPE),
+    ])
+    db.commit()
+    
+    def contents(memories):
+        return {memory.content for memory in memories}
+    
+    assert contents(crud.crud_memory.search_any(db, ["кошка"])) == {"кошка спит"}
+    assert contents(crud.crud_memory.search(db, "кошка")) == {"кошка спит"}
+    assert contents(crud.crud_memory.get_multi(db)) == {"кошка спит"}
+    assert contents(crud.crud_memory.get_recent(db)) == {"кошка спит"}
+    assert contents(crud.crud_memory.export_query(db)) == {"кошка спит"}
+    assert contents(RecallRanker().rank(db, "кошка").memories) == {"кошка спит"}
+    # Явный запрос забытой памяти ее возвращает
+    assert contents(crud.crud_memory.get_multi(db, crud.DORMANT_MEMORY_TYPE)) == {"кошка забыта"}
+    db.close()
+
+def test_knowledge_graph_traversal_and_cache_invalidation(session_factory):
+    from modules.memory.knowledge_base import KnowledgeGraph
+    
+    graph = KnowledgeGraph()
+    graph.add_edges([("кошка", "мышь", 1.0), ("мышь", "сыр", 1.0), ("сыр", "молоко", 1.0)])
+    graph.add_edges([("кошка", "мышь", 1.0)])
+    
+    assert graph.neighbors("кошка") == {"мышь": 2.0}
+    assert graph.bfs(["кошка"], max_hops=2) == {"кошка": 0, "мышь": 1, "сыр": 2}
+    
+    activation = dict(graph.spread_activation(["кошка"], max_hops=3, decay=0.5))
+    assert activation["мышь"] > activation["сыр"] > activation["молоко"] > 0
+    assert "кошка" not in activation
+    
+    graph.bfs(["кошка"], max_hops=2)
+    assert graph.cache_hits == 1
+    
+    graph.add_edges([("кошка", "собака", 1.0)])
+    assert graph.bfs(["кошка"], max_hops=1) == {"кошка": 0, "мышь": 1, "собака": 1}
+    
+    db = session_factory()
+    db.add(Memory(content="Солнце является звездой", memory_type="fact", importance=1.0))
+    db.add(Memory(content="не факт", memory_type="episode"))
+    db.commit()
+    assert graph.sync(db) == 1
+    assert graph.sync(db) == 0
+    assert "звездой" in graph.neighbors("солнце")
+    db.close()
+
+def test_knowledge_graph_sync_drops_forgotten_facts(session_factory):
+    from modules.memory.knowledge_base import KnowledgeGraph
+    
+    db = session_factory()
+    kept = Memory(content="Кошка ловит мышь", memory_type="fact", importance=1.0)
+    forgotten = Memory(content="Собака грызет кость", memory_type="fact", importance=1.0)
+    db.add_all([kept, forgotten])
+    db.commit()
+    
+    graph = KnowledgeGraph()
+    assert graph.sync(db) == 2
+    graph.add_edges([("солнце", "звезда", 1.0)])
+    assert "кость" in graph.neighbors("собака")
+    
+    db.delete(forgotten)
+    db.commit()
+    assert graph.sync(db) == 0
+    assert graph.concept_id("собака") is None and graph.concept_id("кость") is None
+    assert "мышь" in graph.neighbors("кошка")
+    assert graph.neighbors("солнце") == {"звезда": 1.0}
+    
+    # Пониженный забыванием факт тоже уходит из графа
+    kept.memory_type = "dormant"
+    db.commit()
+    graph.sync(db)
+    assert graph.concept_id("кошка") is None
+    assert graph.concept_count == 2
+    db.close()
+
+def test_knowledge_graph_handles_concepts_without_outgoing_edges():
+    from modules.memory.knowledge_base import KnowledgeGraph
+    
+    graph = KnowledgeGraph()
+    graph.add_fact("Москва столица России")
+    # Повтор слова дает только петлю: концепция не создается
+    graph.add_fact("Ладно ладно")
+    assert graph.concept_id("ладно") is None
+    assert graph.spread_activation(["москва"])
+    
+    # Концепция без исходящих ребер в конце списка не ломает сборку CSR
+    graph.add_edges([("солнце", "звезда", 1.0)], symmetric=False)
+    assert graph.neighbors("звезда") == {}
+    assert dict(graph.spread_activation(["солнце"]))["звезда"] > 0
+
+def test_recall_ranker_merges_text_semantic_and_context(session_factory):
+    from database.models import Interaction
+    from modules.memory.knowledge_base import KnowledgeGraph
+    from modules.memory.recall_system import RecallRanker
+    
+    graph = KnowledgeGraph()
+    graph.add_edges([("кофе", "бодрость", 1.0)])
+    ranker = RecallRanker(graph)
+    
+    db = session_factory()
+    now = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    db.add_all([
+        Memory(id=1, content="утром пью кофе", memory_type="fact", created_at=now, last_accessed=now),
+        Memory(id=2, content="бодрость с утра", memory_type="fact", created_at=now, last_accessed=now),
+        Memory(id=3, content="поездка на море", memory_type="episode", created_at=now, last_accessed=now),
+        Memory(id=4, content="погода сегодня", memory_type="fact", created_at=now, last_accessed=now),
+        Interaction(session_id="s1", user_input="вспомни поездка", ai_response="ок"),
+    ])
+    db.commit()
+    
+    result = ranker.rank(db, "кофе", limit=10, session_id="s1", now=now.timestamp())
+    ids = [memory.id for memory in result.memories]
+    assert ids[:2] == [1, 2]
+    assert 4 not in ids
+    assert result.scores == sorted(result.scores, reverse=True)
+    assert set(result.stages) == {"text", "semantic", "context", "scoring"}
+    assert result.stages["context"]["candidates"] == 1
+    
+    result = ranker.rank(db, "кофе", limit=1, now=now.timestamp())
+    assert [memory.id for memory in result.memories] == [1]
+    db.close()
+
+def test_context_assembler_reads_delta_and_respects_budget(session_factory, monkeypatch):
+    from core.config import ContextConfig
+    from database.models import Interaction
+    from modules.memory.context_assembler import ContextAssembler
+    
+    assembler = ContextAssembler()
+    assembler._apply_config(ContextConfig(max_chars=200, recent_turns=2, memory_share=0.3))
+    
+    db = session_factory()
+    db.add_all([
+        Interaction(session_id="s1", user_input=f"вопрос про погоду {i}", ai_response="ответ")
+        for i in range(3)
+    ])
+    db.commit()
+    
+    queries = []
+    original = crud.crud_interaction.get_session_interactions_after
+    monkeypatch.setattr(crud.crud_interaction, "get_session_interactions_after",
+                        lambda db, session_id, after_id=0, limit=500: queries.append(after_id) or
+                        original(db, session_id, after_id, limit))
+    
+    context = assembler.assemble(db, "s1")
+    assert context.version == 1
+    assert context.turns == 2
+    assert "погоду" in context.text and "1 реплик" in context.text
+    
+    again = assembler.assemble(db, "s1")
+    assert again.text == context.text
+    assert assembler.cache_hits == 1
+    
+    db.add(Interaction(session_id="s1", user_input="новый вопрос", ai_response="новый ответ"))
+    db.commit()
+    memories = [{"id": 7, "content": "x" * 40}, {"id": 8, "content": "y" * 300}]
+    updated = assembler.assemble(db, "s1", memories)
+    assert updated.version == 2
+    assert queries[-1] > 0
+    assert updated.memory_ids == [7]
+    assert updated.truncated
+    assert len(updated.text) <= 200
+    assert "новый вопрос" in updated.text
+    db.close()
+
+def test_context_assembler_catches_up_on_long_session(session_factory, monkeypatch):
+    from core.config import ContextConfig
+    from database.models import Interaction
+    from modules.memory import context_assembler as module
+    
+    monkeypatch.setattr(module, "REFRESH_PAGE_SIZE", 2)
+    assembler = module.ContextAssembler()
+    assembler._apply_config(ContextConfig(max_chars=500, recent_turns=2))
+    
+    db = session_factory()
+    db.add_all([
+        Interaction(session_id="s1", user_input=f"вопрос {i}", ai_response=f"ответ {i}")
+        for i in range(7)
+    ])
+    db.commit()
+    
+    context = assembler.assemble(db, "s1")
+    assert context.version == 4
+    assert "вопрос 5" in context.text and "вопрос 6" in context.text
+    assert "вопрос 4" not in context.text
+    assert "5 реплик" in context.text
+    db.close()
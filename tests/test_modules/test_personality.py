@@ -0,0 +1,83 @@
+"""
+Тесты модуля личности
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.config import PersonalityConfig
+from core.exceptions import ModuleExecutionError
+from database import crud
+from database.models import Base, PersonalityTrait
+from modules.personality.traits import BIG_FIVE, PersonalityTraits
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'personality.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+def _traits(session_factory=None, **overrides):
+    config = PersonalityConfig(**overrides)
+    return PersonalityTraits(session_factory, lambda: config, autopersist=False)
+
+def test_snapshot_is_shared_read_only_and_versioned():
+    traits = _traits(baseline={"openness": 0.8})
+    first = traits.snapshot()
+    
+    assert first is traits.snapshot()
+    assert first["openness"] == pytest.approx(0.8)
+    assert first["neuroticism"] == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        first.values[0] = 0.0
+    
+    second = traits.set_trait("extraversion", 0.9)
+    assert second.version == first.version + 1
+    assert first["extraversion"] == pytest.approx(0.5)
+    assert traits.snapshot()["extraversion"] == pytest.approx(0.9)
+
+def test_set_trait_rejects_unknown_trait():
+    with pytest.raises(ModuleExecutionError):
+        _traits().set_trait("charisma", 0.5)
+
+def test_drift_is_incremental_and_bounded():
+    traits = _traits(drift_rate=0.1, max_drift_step=0.05)
+    
+    snapshot = traits.apply_drift({"openness": 0.2, "neuroticism": -1.0})
+    assert snapshot["openness"] == pytest.approx(0.52)
+    assert snapshot["neuroticism"] == pytest.approx(0.45)
+    
+    for _ in range(30):
+        snapshot = traits.apply_drift(np.ones(len(BIG_FIVE)))
+    assert snapshot.values.max() == pytest.approx(1.0)
+    
+    with pytest.raises(ModuleExecutionError):
+        traits.apply_drift(np.ones(3))
+
+def test_upsert_traits_updates_and_creates(session_factory):
+    db = session_factory()
+    db.add(PersonalityTrait(trait_name="openness", current_value=0.1, baseline_value=0.1))
+    db.commit()
+    
+    assert crud.crud_personality.upsert_traits(db, {"openness": 0.7, "neuroticism": 0.2}) == 2
+    assert crud.crud_personality.get_traits(db) == pytest.approx({"openness": 0.7, "neuroticism": 0.2})
+    assert crud.crud_personality.get_baselines(db) == pytest.approx({"openness": 0.1, "neuroticism": 0.2})
+    db.close()
+
+def test_flush_persists_once_and_load_restores(session_factory):
+    traits = _traits(session_factory)
+    traits.set_trait("openness", 0.9)
+    traits.apply_drift({"agreeableness": 1.0})
+    
+    assert traits.flush() == len(BIG_FIVE)
+    assert traits.flush() == 0
+    
+    restored = _traits(session_factory)
+    snapshot = restored.load()
+    assert snapshot["openness"] == pytest.approx(0.9)
+    assert snapshot["agreeableness"] == pytest.approx(0.52)
+    assert not restored.dirty
@@ -0,0 +1,76 @@
+"""
+Тесты модуля психики
+"""
+
+import numpy as np
+
+from core.config import DecisionMakingConfig
+from modules.psyche.decision_making import DecisionEngine
+
+def _engine(**overrides):
+    config = DecisionMakingConfig(**overrides)
+    return DecisionEngine(lambda: config)
+
+def test_decide_picks_highest_weighted_option():
+    engine = _engine(rationality_weight=0.6, emotional_weight=0.3, intuitive_weight=0.1)
+    options = [
+        {"name": "эмоция", "emotional": 1.0},
+        {"name": "расчет", "rational": 1.0},
+        {"name": "интуиция", "intuitive": 1.0},
+    ]
+    decision = engine.decide(options)
+    
+    assert decision.accepted
+    assert decision.decision["name"] == "расчет"
+    assert decision.confidence > 0.6
+
+def test_decide_defers_when_confidence_below_threshold():
+    engine = _engine(confidence_threshold=0.9, temperature=1.0)
+    decision = engine.decide([{"rational": 0.5}, {"rational": 0.4}])
+    
+    assert not decision.accepted
+    assert decision.decision is None
+    assert decision.index == 0
+
+def test_rank_batch_ignores_padding():
+    engine = _engine()
+    features = np.zeros((2, 3, 3), dtype=np.float32)
+    features[0, 2, 0] = 1.0
+    features[1, 1, 1] = 1.0
+    features[1, 2, 0] = 5.0
+    mask = np.array([[True, True, True], [True, True, False]])
+    
+    result = engine.rank_batch(features, mask)
+    
+    assert result.best.tolist() == [2, 1]
+    assert np.isclose(result.confidence[0], np.exp(6) / (np.exp(6) + 2))
+
+def test_top_k_orders_by_score():
+    engine = _engine()
+    features = np.array([[0.1, 0, 0], [0.9, 0, 0], [0.5, 0, 0], [0.7, 0, 0]], dtype=np.float32)
+    assert engine.top_k(features, 2).tolist() == [1, 3]
+
+def test_subconscious_queue_is_bounded():
+    from modules.psyche.consciousness import Subconscious
+    
+    sub = Subconscious()
+    limit = sub.background_processes.maxlen
+    results = []
+    for i in range(limit + 3):
+        sub.add_process(lambda i=i: results.append(i))
+    
+    assert sub.dropped == 3
+    assert sub.run_pending() == limit
+    assert results[0] == 3
+
+def test_traits_scale_feature_weights():
+    from modules.personality.traits import TraitSnapshot, trait_vector
+    
+    engine = _engine(rationality_weight=0.5, emotional_weight=0.5, intuitive_weight=0.0, personality_influence=0.5)
+    neutral = TraitSnapshot(1, trait_vector({}))
+    anxious = TraitSnapshot(2, trait_vector({"neuroticism": 1.0, "conscientiousness": 0.3}))
+    options = [{"rational": 1.0}, {"emotional": 1.0}]
+    
+    assert np.allclose(engine.weights_for(neutral), engine.weights)
+    assert engine.weights_for(anxious) is engine.weights_for(anxious)
+    assert engine.decide(options, traits=anxious).index == 1
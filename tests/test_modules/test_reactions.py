@@ -0,0 +1,97 @@
+"""
+Тесты модуля реакций
+"""
+
+import pytest
+
+from core.config import ReactionRuleConfig, ReactionsConfig
+from core.exceptions import ModuleExecutionError
+from modules.personality.traits import TraitSnapshot, trait_vector
+from modules.reactions.behavioral import BehavioralResponder
+from modules.reactions.emotional_response import select_emotion
+from modules.reactions.reaction_triggers import ReactionTriggerEngine, TriggerFacts, compile_rule
+
+def _rule(name, reaction=None, **conditions):
+    return ReactionRuleConfig(
+        name=name, reaction=reaction or {"type": "emotional", "emotion": "happy", "intensity": 0.5}, **conditions
+    )
+
+def _engine(*rules, max_reactions=3):
+    holder = {"config": ReactionsConfig(max_reactions=max_reactions, rules=tuple(rules))}
+    engine = ReactionTriggerEngine(lambda: holder["config"])
+    return engine, holder
+
+def _names(reactions):
+    return [reaction.rule for reaction in reactions]
+
+def test_rules_are_indexed_on_most_selective_condition():
+    assert compile_rule(0, _rule("w", words=("спасибо",), intent=("greeting",))).indexed_on == "words"
+    keyed = compile_rule(1, _rule("k", intent=("greeting", "farewell"), mood=("happy",)))
+    assert keyed.indexed_on == "key"
+    assert set(keyed.keys) == {
+        (("intent", "farewell"), ("mood", "happy")), (("intent", "greeting"), ("mood", "happy"))
+    }
+    assert compile_rule(2, _rule("n", min_memory_hits=2)).indexed_on is None
+
+def test_evaluate_checks_all_conditions():
+    engine, _ = _engine(
+        _rule("thanks", words=("спасибо",), mood=("neutral",)),
+        _rule("greet_extravert", intent=("greeting",), traits={"extraversion": (0.6, 1.0)}),
+        _rule("remembered", min_memory_hits=2),
+        _rule("sad_greeting", intent=("greeting",), emotion=("sad",)),
+    )
+    extravert = TraitSnapshot(1, trait_vector({"extraversion": 0.9}))
+    facts = TriggerFacts(intent="greeting", mood="neutral", emotion="sad", stems=frozenset({"спасиб"}), traits=extravert)
+    assert set(_names(engine.evaluate(facts))) == {"thanks", "greet_extravert", "sad_greeting"}
+    
+    facts = TriggerFacts(intent="greeting", mood="happy", emotion="happy", stems=frozenset({"спасиб"}), memory_hits=2)
+    assert _names(engine.evaluate(facts)) == ["remembered"]
+    
+    # Индекс дает тот же результат, что и проверка всех правил
+    for rule in engine.network.rules:
+        assert rule.matches_all(facts) == (rule.name == "remembered")
+
+def test_priority_order_and_limit():
+    engine, _ = _engine(
+        _rule("low", intent=("greeting",), priority=1),
+        _rule("high", intent=("greeting",), priority=10),
+        _rule("middle", words=("привет",), priority=5),
+        max_reactions=2,
+    )
+    facts = TriggerFacts(intent="greeting", stems=frozenset({"прив"}))
+    assert _names(engine.evaluate(facts)) == ["high", "middle"]
+    assert _names(engine.evaluate(facts, limit=5)) == ["high", "middle", "low"]
+
+def test_reload_keeps_previous_network_on_invalid_rule():
+    engine, holder = _engine(_rule("greet", intent=("greeting",)))
+    version = engine.network.version
+    
+    holder["config"] = ReactionsConfig(rules=(_rule("bad", traits={"charisma": (0.0, 1.0)}),))
+    assert engine.reload() is False
+    assert engine.network.version == version
+    assert _names(engine.evaluate(TriggerFacts(intent="greeting"))) == ["greet"]
+    
+    holder["config"] = ReactionsConfig(rules=(_rule("bye", intent=("farewell",)),))
+    assert engine.reload() is True
+    assert _names(engine.evaluate(TriggerFacts(intent="farewell"))) == ["bye"]
+    
+    with pytest.raises(ModuleExecutionError):
+        _engine(_rule("bad", reaction={"type": "unknown"}))
+
+def test_emotional_and_behavioral_reactions():
+    engine, _ = _engine(
+        _rule("mild", {"type": "emotional", "emotion": "happy", "intensity": 0.3}, intent=("greeting",), priority=2),
+        _rule("strong", {"type": "emotional", "emotion": "excited", "intensity": 0.7}, intent=("greeting",)),
+        _rule("note", {"type": "behavioral", "action": "note", "value": 1}, intent=("greeting",)),
+        _rule("missing", {"type": "behavioral", "action": "unknown"}, intent=("greeting",)),
+        max_reactions=4,
+    )
+    reactions = engine.evaluate(TriggerFacts(intent="greeting"))
+    shift = select_emotion(reactions)
+    assert (shift.emotion, shift.intensity, shift.rule) == ("excited", 0.7, "strong")
+    
+    calls = []
+    responder = BehavioralResponder()
+    responder.register("note", calls.append)
+    assert responder.apply(reactions) == ["note"]
+    assert calls[0]["value"] == 1
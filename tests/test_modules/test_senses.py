@@ -0,0 +1,91 @@
+"""
+Тесты модуля восприятия
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, Interaction
+from modules.senses.emotional_filter import emotional_filter
+from modules.senses.input_parser import InputParser, normalize, stem
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'senses.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+def test_normalize_handles_nfkc_and_yo():
+    assert normalize("Ёлка ＡＢＣ") == "елка abc"
+
+def test_stem_strips_single_ending():
+    assert stem("радостями") == "радост"
+    assert stem("running") == "runn"
+    assert stem("дом") == "дом"
+
+def test_parse_interns_tokens_once_and_reuses_result():
+    parser = InputParser(cache_size=2)
+    first = parser.parse("Кот видит кота")
+    assert first.tokens == ("кот", "видит", "кота")
+    assert first.token_ids[0] != first.token_ids[2]
+    assert first.stem_ids[0] == first.stem_ids[2]
+    assert parser.parse("Кот видит кота") is first
+    assert parser.parse(first) is first
+    assert first.has_phrase("видит кота") and not first.has_phrase("кота видит")
+
+def test_lexicon_detects_emotions_in_russian_and_english():
+    results = emotional_filter.analyze_batch([
+        "Я так рада тебя видеть!",
+        "Мне грустно и одиноко",
+        "Это меня бесит",
+        "I am so excited!",
+        "Привет, как дела?",
+    ])
+    assert [result.emotion for result in results] == ["happy", "sad", "angry", "excited", "neutral"]
+    assert results[-1].intensity == 0.0
+    assert all(0 < result.intensity < 1 for result in results[:-1])
+
+def test_negation_and_intensifier_change_score():
+    plain, intense, negated, negated_intense = emotional_filter.analyze_batch(
+        ["я рада", "я очень рада", "я не рада", "я не очень рада"]
+    )
+    assert intense.intensity > plain.intensity
+    assert negated.emotion == "neutral"
+    assert negated_intense.emotion == "neutral"
+
+def test_transformer_classifier_is_not_loaded_in_server_process(monkeypatch):
+    import asyncio
+    from dataclasses import replace
+    
+    from core.executor import process_executor
+    from modules.senses.emotional_filter import EmotionalFilter, EmotionResult
+    
+    emotion_filter = EmotionalFilter()
+    emotion_filter.config = replace(emotion_filter.config, classifier="transformer")
+    calls = []
+    
+    async def run(func, texts):
+        calls.append(texts)
+        return [EmotionResult("happy", 0.9)]
+    
+    monkeypatch.setattr(process_executor, "run", run)
+    result = asyncio.run(emotion_filter.analyze_async("я рада"))
+    assert result.emotion == "happy" and calls == [["я рада"]]
+    assert emotion_filter._classifier is None
+
+def test_backfill_fills_only_missing_emotions(session_factory):
+    db = session_factory()
+    db.add_all([
+        Interaction(session_id="s", user_input="Мне очень грустно", ai_response="..."),
+        Interaction(session_id="s", user_input="Я счастлива", ai_response="..."),
+        Interaction(session_id="s", user_input="Привет", ai_response="...", user_emotion="angry"),
+    ])
+    db.commit()
+
+    assert emotional_filter.backfill_user_emotions(db, batch_size=1) == 2
+    emotions = [row.user_emotion for row in db.query(Interaction).order_by(Interaction.id)]
+    assert emotions == ["sad", "happy", "angry"]
+    db.close()